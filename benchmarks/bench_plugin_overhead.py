@@ -0,0 +1,249 @@
+"""Benchmarks of the per test and per session overhead of pytest-boardfarm.
+
+The plugin hooks are called directly with a fake pytest config, fake test
+items and a fake device manager. The boardfarm hooks called by the plugin
+are stubbed, so the benchmarks run offline without any device.
+"""
+
+from __future__ import annotations
+
+import contextlib
+from datetime import datetime
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Callable
+
+import pytest
+from pytest import TestReport  # noqa: PT013
+
+from pytest_boardfarm3 import pytest_plugin
+from pytest_boardfarm3.boardfarm_plugin import THIS_TZ, BoardfarmPlugin
+from pytest_boardfarm3.lib.utils import EnvReqMatcher
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_SIZES = (1_000, 10_000, 50_000)
+_DEVICES = ("board", "lan", "wan")
+
+_BOARDFARM_ENV = {
+    "environment_def": {
+        "board": {
+            "eRouter_Provisioning_mode": "dual",
+            "model": "F3896LG",
+            "software": {"image_uri": "https://example.com/F3896LG-1.0.0.bin"},
+        },
+    },
+}
+_ENV_REQUESTS = (
+    {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}},
+    {"environment_def": {"board": {"eRouter_Provisioning_mode": ["ipv4"]}}},
+    {"environment_def": {"board": {"model": ["F3896LG", "CH7465LG"]}}},
+    {
+        "environment_def": {
+            "board": {
+                "software": {"image_uri": [{"contains_regex": r"F3896LG-\d"}]},
+            },
+        },
+    },
+)
+
+# test phase call information of a passed test phase
+_CALL = SimpleNamespace(excinfo=None)
+
+
+class _Item:
+    """Collected test item with an env_req marker on most of the tests."""
+
+    def __init__(self, index: int, config: Any) -> None:  # noqa: ANN401
+        self.name = f"test_case_{index}[param{index % 10}]"
+        self.nodeid = f"tests/test_suite_{index // 100}.py::{self.name}"
+        self.config = config
+        self._env_req_marker = (
+            pytest.mark.env_req(_ENV_REQUESTS[index % len(_ENV_REQUESTS)]).mark
+            if index % 5
+            else None
+        )
+
+    def get_closest_marker(self, name: str) -> Any:  # noqa: ANN401
+        return self._env_req_marker if name == "env_req" else None
+
+    def add_marker(self, marker: Any) -> None:  # noqa: ANN401
+        pass
+
+
+def _get_config(**options: Any) -> Any:  # noqa: ANN401
+    option = SimpleNamespace(
+        board_name="board1",
+        env_config="env.json",
+        inventory_config="inventory.json",
+        env_req_filter="skip",
+        env_req_order="affinity",
+        cache_contingency_checks=True,
+        report_sidecars="none",
+        test_names=None,
+        test_names_file=None,
+        test_timings_file=None,
+        release_kept_devices=False,
+        **options,
+    )
+    return SimpleNamespace(
+        option=option,
+        getoption=lambda name: getattr(option, name.lstrip("-").replace("-", "_")),
+        hook=SimpleNamespace(pytest_deselected=lambda **_: None),
+        pluginmanager=SimpleNamespace(
+            getplugin=lambda _name: None,
+            has_plugin=lambda _name: False,
+        ),
+    )
+
+
+def _get_plugin(config: Any) -> BoardfarmPlugin:  # noqa: ANN401
+    plugin = BoardfarmPlugin()
+    # stub the boardfarm hooks called for each test
+    plugin._plugin_manager = SimpleNamespace(  # type: ignore[assignment]
+        hook=SimpleNamespace(contingency_check=lambda **_: None),
+    )
+    plugin._session_config = config
+    plugin._env_req_matcher = EnvReqMatcher(_BOARDFARM_ENV)
+    plugin.boardfarm_config = SimpleNamespace(  # type: ignore[assignment]
+        env_config=_BOARDFARM_ENV,
+        inventory_config={name: {"type": "linux"} for name in _DEVICES},
+    )
+    plugin.device_manager = SimpleNamespace(  # type: ignore[assignment]
+        get_devices_by_type=lambda _device_type: {
+            name: SimpleNamespace(device_type="linux") for name in _DEVICES
+        },
+    )
+    return plugin
+
+
+def _run_hook_wrapper(hook_wrapper: Any, result: Any = None) -> None:  # noqa: ANN401
+    next(hook_wrapper)
+    with contextlib.suppress(StopIteration):
+        hook_wrapper.send(SimpleNamespace(get_result=lambda: result))
+
+
+def _get_reports(item: _Item) -> list[TestReport]:
+    return [
+        TestReport(item.nodeid, ("", 0, ""), {}, "passed", None, when, duration=0.01)  # type: ignore[arg-type]
+        for when in ("setup", "call", "teardown")
+    ]
+
+
+@pytest.mark.parametrize("size", _SIZES)
+def test_collection_with_test_names(
+    size: int,
+    benchmark: Callable[..., float],
+) -> None:
+    """Benchmark the selection of a tenth of the tests with --test-names."""
+    test_names = " ".join(f"case-{index}" for index in range(0, size, 10))
+    config = _get_config()
+    config.option.test_names = test_names
+    items = [_Item(index, config) for index in range(size)]
+
+    def _select_tests() -> None:
+        selected_items = list(items)
+        pytest_plugin.pytest_collection_modifyitems(config, selected_items)  # type: ignore[arg-type]
+        assert len(selected_items) == size // 10
+
+    benchmark(_select_tests)
+
+
+@pytest.mark.parametrize("size", _SIZES)
+def test_env_req_evaluation(size: int, benchmark: Callable[..., float]) -> None:
+    """Benchmark env_req filtering and ordering at collection, and test setup."""
+    config = _get_config()
+    items = [_Item(index, config) for index in range(size)]
+
+    def _evaluate_env_requests() -> None:
+        plugin = _get_plugin(config)
+        selected_items = list(items)
+        _run_hook_wrapper(
+            plugin.pytest_collection_modifyitems(config, selected_items),  # type: ignore[arg-type]
+        )
+        for item in selected_items:
+            with contextlib.suppress(pytest.skip.Exception):
+                _run_hook_wrapper(plugin.pytest_runtest_setup(item))  # type: ignore[arg-type]
+
+    benchmark(_evaluate_env_requests)
+
+
+@pytest.mark.parametrize("size", _SIZES)
+def test_report_hooks(
+    size: int,
+    benchmark: Callable[..., float],
+    tmp_path: Path,
+) -> None:
+    """Benchmark makereport, logreport and html row hooks of each test phase.
+
+    As in a run with pytest-html, the timings of each test are gathered for
+    its html row, which is rendered while its teardown report is logged, and
+    the boardfarm report is saved with each report.
+    """
+    config = _get_config()
+    html_plugin = SimpleNamespace(extras=SimpleNamespace(html=lambda content: content))
+    config.pluginmanager.getplugin = lambda name: (
+        html_plugin if name == "html" else None
+    )
+    items = [_Item(index, config) for index in range(size)]
+    reports = [_get_reports(item) for item in items]
+
+    def _make_reports() -> None:
+        plugin = _get_plugin(config)
+        plugin._test_start_time = datetime.now(tz=THIS_TZ)
+        plugin._report.set_config(config, plugin.boardfarm_config)
+        plugin._report_file.open(tmp_path / "report.json")
+        for item, item_reports in zip(items, reports):
+            for report in item_reports:
+                _run_hook_wrapper(
+                    plugin.pytest_runtest_makereport(item, _CALL),  # type: ignore[arg-type]
+                    report,
+                )
+                log_report = plugin.pytest_runtest_logreport(report)
+                next(log_report)
+                if report.when == "teardown":
+                    # pytest-html renders the row of the test with its teardown
+                    cells: list[str] = []
+                    plugin.pytest_html_results_table_row(report, cells=cells)
+                    assert cells[-1] != '<td class="col-teardown"></td>'
+                with contextlib.suppress(StopIteration):
+                    log_report.send(None)
+        plugin._report_file.close()
+
+    benchmark(_make_reports)
+
+
+@pytest.mark.parametrize("size", _SIZES)
+def test_html_summary(size: int, benchmark: Callable[..., float]) -> None:
+    """Benchmark the boardfarm sections of the html report summary."""
+    config = _get_config()
+    plugin = _get_plugin(config)
+    plugin._report.set_config(config, plugin.boardfarm_config)
+    plugin._report.set_setup(
+        {
+            "logs": "boardfarm setup log line\n" * 1000,
+            "device_durations": {
+                name: {"boardfarm_device_boot": 1.0} for name in _DEVICES
+            },
+        },
+        plugin.device_manager,
+    )
+    plugin._report.set_teardown(
+        {"logs": "boardfarm teardown log line\n"},
+        plugin._deployment_profile.as_dict(),
+    )
+    plugin._device_io_metrics = {
+        f"test_{index}": {
+            name: {
+                "bytes_sent": 100,
+                "bytes_received": 1000,
+                "commands": 2,
+                "command_time": 0.2,
+                "max_command_time": 0.15,
+            }
+            for name in _DEVICES
+        }
+        for index in range(size)
+    }
+
+    benchmark(lambda: plugin.pytest_html_results_summary(postfix=[]))
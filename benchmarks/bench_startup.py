@@ -0,0 +1,37 @@
+"""Benchmarks of the startup time added by pytest-boardfarm to any pytest run.
+
+The plugin is loaded through its pytest11 entry point by every pytest run,
+including the runs which do not use boardfarm at all.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _run(*args: str, cwd: Path | None = None) -> None:
+    subprocess.run([sys.executable, *args], cwd=cwd, check=True, capture_output=True)  # noqa: S603
+
+
+def test_plugin_import(benchmark: Callable[..., float]) -> None:
+    """Benchmark the import of the pytest11 entry point of the plugin."""
+    benchmark(lambda: _run("-c", "import pytest_boardfarm3.pytest_plugin"))
+
+
+def test_pytest_run_without_board(
+    tmp_path: Path,
+    benchmark: Callable[..., float],
+) -> None:
+    """Benchmark a pytest run of a single test not using boardfarm."""
+    (tmp_path / "test_startup.py").write_text(
+        "def test_startup():\n    pass\n",
+        encoding="utf-8",
+    )
+    benchmark(
+        lambda: _run("-m", "pytest", "-q", "-p", "no:cacheprovider", cwd=tmp_path),
+    )
@@ -0,0 +1,136 @@
+"""Benchmark fixtures measuring the overhead of pytest-boardfarm."""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import pytest
+
+if TYPE_CHECKING:
+    from _pytest.config.argparsing import Parser
+    from pytest import Config, FixtureRequest  # noqa: PT013
+
+_BASELINES_PATH = Path(__file__).with_name("baselines.json")
+_RESULTS_KEY = pytest.StashKey[dict[str, float]]()
+
+
+def pytest_addoption(parser: Parser) -> None:
+    """Add benchmark command line arguments.
+
+    :param parser: argument parser
+    :type parser: Parser
+    """
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--update-baselines",
+        action="store_true",
+        help=f"Save the measured durations as baselines in {_BASELINES_PATH.name}",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=2.0,
+        help="Fail a benchmark slower than its baseline times this factor",
+    )
+
+
+def _calibration_workload() -> None:
+    mapping = {str(index): index for index in range(100_000)}
+    sorted(mapping.items(), key=lambda item: item[1] % 7)
+
+
+def _measure(function: Callable[[], object], rounds: int) -> float:
+    durations = []
+    for _ in range(rounds):
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+@pytest.fixture(scope="session")
+def calibration() -> float:
+    """Measure a pure python workload to normalize the durations.
+
+    The baselines are saved relative to this workload, so that they can be
+    compared between machines of different speeds.
+
+    :return: duration of the calibration workload in seconds
+    :rtype: float
+    """
+    return _measure(_calibration_workload, rounds=5)
+
+
+@pytest.fixture()
+def benchmark(
+    request: FixtureRequest,
+    calibration: float,  # pylint: disable=redefined-outer-name
+) -> Callable[..., float]:
+    """Benchmark a function and compare it with its baseline.
+
+    :param request: pytest fixture request
+    :type request: FixtureRequest
+    :param calibration: duration of the calibration workload in seconds
+    :type calibration: float
+    :return: function measuring the best duration of the given function
+    :rtype: Callable[..., float]
+    """
+    config = request.config
+    baselines = (
+        json.loads(_BASELINES_PATH.read_text(encoding="utf-8"))
+        if _BASELINES_PATH.is_file()
+        else {}
+    )
+
+    def _benchmark(function: Callable[[], object], rounds: int = 3) -> float:
+        duration = _measure(function, rounds)
+        relative_duration = duration / calibration
+        config.stash.setdefault(_RESULTS_KEY, {})[request.node.name] = relative_duration
+        baseline = baselines.get(request.node.name)
+        if baseline is not None and not config.option.update_baselines:
+            limit = baseline * config.option.benchmark_tolerance
+            assert relative_duration <= limit, (
+                f"{request.node.name} took {relative_duration:.3f} calibrations,"
+                f" the baseline is {baseline:.3f}"
+            )
+        return duration
+
+    return _benchmark
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Save the measured durations as baselines when asked to.
+
+    :param session: pytest session
+    :type session: pytest.Session
+    """
+    config: Config = session.config
+    results = config.stash.get(_RESULTS_KEY, {})
+    if not config.option.update_baselines or not results:
+        return
+    baselines = (
+        json.loads(_BASELINES_PATH.read_text(encoding="utf-8"))
+        if _BASELINES_PATH.is_file()
+        else {}
+    )
+    baselines.update({name: round(value, 4) for name, value in results.items()})
+    _BASELINES_PATH.write_text(
+        json.dumps(dict(sorted(baselines.items())), indent=4) + "\n",
+        encoding="utf-8",
+    )
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    """Show the measured durations relative to the calibration workload.
+
+    :param terminalreporter: pytest terminal reporter
+    :type terminalreporter: pytest.TerminalReporter
+    """
+    results = terminalreporter.config.stash.get(_RESULTS_KEY, {})
+    if results:
+        terminalreporter.section("benchmarks (in calibration workloads)")
+        for name, value in sorted(results.items()):
+            terminalreporter.write_line(f"{name:<60} {value:10.3f}")
@@ -45,6 +45,17 @@ def test(session: nox.Session) -> None:
     session.run("pytest", "unittests")
 
 
+@nox.session(python=_PYTHON_VERSIONS)
+def benchmark(session: nox.Session) -> None:
+    """Benchmark the overhead of pytest-boardfarm against the baselines.
+
+    # noqa: DAR101
+    """
+    session.install("--upgrade", "--pre", "boardfarm3")
+    session.install("--upgrade", ".")
+    session.run("pytest", "benchmarks", *session.posargs)
+
+
 @nox.session(python=_PYTHON_VERSIONS)
 def boardfarm_help(session: nox.Session) -> None:
     """Execute boardfarm --help.
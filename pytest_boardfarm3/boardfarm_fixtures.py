@@ -1,19 +1,32 @@
-"""pytest boardfarm fixtures."""
+"""pytest boardfarm fixtures.
+
+The fixtures are registered in every pytest run, hence boardfarm itself is
+only imported once a fixture needs it, i.e. when the boardfarm plugin is in use.
+"""
+
+from __future__ import annotations
 
 from argparse import Namespace
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 
 import pytest
-from _pytest.config import Config
-from boardfarm3.devices.base_devices import BoardfarmDevice
-from boardfarm3.lib.boardfarm_config import BoardfarmConfig
-from boardfarm3.lib.device_manager import DeviceManager
 
-from pytest_boardfarm3.boardfarm_plugin import BOARDFARM_PLUGIN_NAME, BoardfarmPlugin
 from pytest_boardfarm3.exceptions import BoardfarmPluginError
-from pytest_boardfarm3.lib.test_logger import TestLogger
+from pytest_boardfarm3.lib.test_logger import TEST_LOGGER_KEY, TestLogger
 from pytest_boardfarm3.lib.utils import ContextStorage
 
+if TYPE_CHECKING:
+    import asyncio
+    from collections.abc import Generator
+
+    from _pytest.config import Config
+    from _pytest.fixtures import FixtureRequest
+    from boardfarm3.lib.boardfarm_config import BoardfarmConfig
+    from boardfarm3.lib.device_manager import DeviceManager
+
+    from pytest_boardfarm3.boardfarm_plugin import BoardfarmPlugin
+    from pytest_boardfarm3.lib.session_pool import DeviceSessionPool
+
 
 @pytest.fixture(scope="function")
 def bf_context() -> ContextStorage:
@@ -26,13 +39,18 @@ def bf_context() -> ContextStorage:
 
 
 @pytest.fixture(scope="session", autouse=True)
-def bf_logger() -> TestLogger:
+def bf_logger(pytestconfig: Config) -> TestLogger:
     """Fixture that return test step log wrapper instance.
 
+    The boardfarm plugin shares its test logger, which records the steps of
+    each test. Without the plugin the fixture returns a test logger of its own.
+
+    :param pytestconfig: pytest config
+    :type pytestconfig: Config
     :return: log wrapper instance
     :rtype: TestLogger
     """
-    return TestLogger()
+    return pytestconfig.stash.setdefault(TEST_LOGGER_KEY, TestLogger())
 
 
 def get_boardfarm_plugin(pytestconfig: Config) -> BoardfarmPlugin:
@@ -44,6 +62,9 @@ def get_boardfarm_plugin(pytestconfig: Config) -> BoardfarmPlugin:
     :return: boardfarm plugin instance
     :rtype: BoardfarmPlugin
     """
+    # pylint: disable-next=import-outside-toplevel
+    from pytest_boardfarm3.boardfarm_plugin import BOARDFARM_PLUGIN_NAME
+
     plugin = pytestconfig.pluginmanager.get_plugin(BOARDFARM_PLUGIN_NAME)
     if plugin is None:
         err_msg = "boardfarm plugin is not registered."
@@ -75,6 +96,21 @@ def device_manager(pytestconfig: Config) -> DeviceManager:
     return get_boardfarm_plugin(pytestconfig).device_manager
 
 
+@pytest.fixture(scope="session")
+def boardfarm_event_loop(pytestconfig: Config) -> asyncio.AbstractEventLoop:
+    """Fixture that return the event loop used to deploy the devices.
+
+    The event loop runs for the whole session, so the async device APIs used
+    by the tests reuse the connections opened during the deployment.
+
+    :param pytestconfig: pytest config
+    :type pytestconfig: Config
+    :return: boardfarm session event loop
+    :rtype: asyncio.AbstractEventLoop
+    """
+    return get_boardfarm_plugin(pytestconfig).event_loop
+
+
 @pytest.fixture(scope="session")
 def devices(
     device_manager: DeviceManager,  # pylint: disable=redefined-outer-name
@@ -86,4 +122,46 @@ def devices(
     :return: devices fixture
     :rtype: Any
     """
+    # pylint: disable-next=import-outside-toplevel
+    from boardfarm3.devices.base_devices import BoardfarmDevice
+
     return Namespace(**device_manager.get_devices_by_type(BoardfarmDevice))
+
+
+@pytest.fixture(scope="function")
+def device_sessions(
+    pytestconfig: Config,
+    request: FixtureRequest,
+) -> Generator[Callable[..., Any]]:
+    """Fixture that return a function getting a device session from its pool.
+
+    The function takes the pool name, registered with the
+    pytest_boardfarm_session_pools hook, and optionally the device name. The
+    sessions are given back to their pool after the test, or closed if the
+    test failed.
+
+    :param pytestconfig: pytest config
+    :type pytestconfig: Config
+    :param request: pytest fixture request
+    :type request: FixtureRequest
+    :yield: function returning a session of the given pool and device
+    :rtype: Generator[Callable[..., Any]]
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from pytest_boardfarm3.lib.session_pool import TEST_FAILED_KEY
+
+    session_pools = get_boardfarm_plugin(pytestconfig).session_pools
+    acquired_sessions: list[tuple[DeviceSessionPool, Any]] = []
+
+    def get_device_session(name: str, device_name: str | None = None) -> Any:  # noqa: ANN401
+        pool = session_pools.get_pool(name, device_name)
+        acquired_sessions.append((pool, pool.acquire()))
+        return acquired_sessions[-1][1]
+
+    yield get_device_session
+    test_failed = request.node.stash.get(TEST_FAILED_KEY, False)
+    for pool, session in acquired_sessions:
+        if test_failed:
+            pool.discard(session)
+        else:
+            pool.release(session)
@@ -1,13 +1,21 @@
 """pytest boardfarm plugin module."""
 
+# pylint: disable=too-many-lines
+
 from __future__ import annotations
 
-import asyncio
+import copy
+import functools
+import json
 import logging
+import time
+from contextlib import nullcontext
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
+from boardfarm3.devices.base_devices import BoardfarmDevice
 from boardfarm3.lib.boardfarm_config import (
     BoardfarmConfig,
     get_json,
@@ -18,21 +26,90 @@ from pytest import Config, Item, Parser, Session, TestReport  # noqa: PT013
 
 from pytest_boardfarm3.configs import LOGGING_CONFIG
 from pytest_boardfarm3.lib.argument_parser import ArgumentParser
-from pytest_boardfarm3.lib.html_report import get_boardfarm_html_table_report
-from pytest_boardfarm3.lib.utils import capture_boardfarm_logs, is_env_matching
+from pytest_boardfarm3.lib.circuit_breaker import DEVICE_ERRORS, CircuitBreaker
+from pytest_boardfarm3.lib.config_cache import BoardfarmConfigCache
+from pytest_boardfarm3.lib.contingency_cache import ContingencyCheckCache
+from pytest_boardfarm3.lib.deployment import (
+    is_setup_env_overridden,
+    measure_setup_env_stages,
+    setup_env_concurrently,
+)
+from pytest_boardfarm3.lib.deployment_profile import DeploymentProfile
+from pytest_boardfarm3.lib.device_metrics import (
+    DeviceIOMonitor,
+    get_total_metrics,
+    save_device_metrics,
+)
+from pytest_boardfarm3.lib.distributed import (
+    WORKER_OUTPUT_KEY,
+    get_env_req_group,
+    get_worker_board_name,
+    get_xdist_worker_id,
+    get_xdist_workers_count,
+    is_xdist_controller,
+)
+from pytest_boardfarm3.lib.event_loop import (
+    close_session_event_loop,
+    new_session_event_loop,
+)
+from pytest_boardfarm3.lib.html_report import (
+    get_boardfarm_html_table_report,
+    get_boardfarm_workers_html_table_report,
+    get_device_io_html_table_report,
+    get_screenshots_html_report,
+    get_test_steps_html_table_report,
+)
+from pytest_boardfarm3.lib.kept_deployment import (
+    clear_kept_deployment,
+    load_kept_deployment,
+    save_kept_deployment,
+)
+from pytest_boardfarm3.lib.log_queue import QueueLoggingPipeline
+from pytest_boardfarm3.lib.report_model import BoardfarmReport, ReportFile
+from pytest_boardfarm3.lib.retry import ReprovisionRetry, get_used_devices
+from pytest_boardfarm3.lib.run_record import RunRecorder
+from pytest_boardfarm3.lib.screenshots import ScreenshotStore, get_screenshot_base64
+from pytest_boardfarm3.lib.session_pool import TEST_FAILED_KEY, SessionPools
+from pytest_boardfarm3.lib.test_logger import TEST_LOGGER_KEY, TestLogger
+from pytest_boardfarm3.lib.test_timings import (
+    TIMING_COLUMNS,
+    TestTimingsRecorder,
+)
+from pytest_boardfarm3.lib.utils import (
+    EnvReqMatcher,
+    capture_boardfarm_logs,
+    get_env_affinity_order,
+)
 
 if TYPE_CHECKING:
+    import asyncio
+    from argparse import Namespace
     from collections.abc import Generator
 
     from _pytest.logging import LoggingPlugin
+    from _pytest.mark import Mark
+    from _pytest.runner import CallInfo
+    from _pytest.terminal import TerminalReporter
+    from xdist.workermanage import WorkerController
+
 
+_LOGGER = logging.getLogger(__name__)
 
 BOARDFARM_PLUGIN_NAME = "_boardfarm"
 
 THIS_TZ = datetime.now(timezone.utc).astimezone().tzinfo
 
+_ENV_MISMATCH_REASON = "Environment mismatch. Skipping"
+
+_NO_CONTINGENCY_CHECK_CACHE_MARKER = "no_contingency_check_cache"
+
+_NO_KEPT_DEVICES_ERROR = (
+    "No devices kept deployed for this board and configs, nothing to release"
+    " with --release-kept-devices."
+)
+
 
-class BoardfarmPlugin:
+class BoardfarmPlugin:  # pylint: disable=too-many-instance-attributes
     """Pytest boardfarm plugin."""
 
     # pylint: disable=no-member  # hook calls are not a member
@@ -46,6 +123,30 @@ class BoardfarmPlugin:
         self._plugin_manager = get_plugin_manager()
         self.device_manager: DeviceManager = None
         self.boardfarm_config: BoardfarmConfig = None
+        self.event_loop: asyncio.AbstractEventLoop = None
+        self._previous_event_loop: asyncio.AbstractEventLoop | None = None
+        self._test_logger = TestLogger()
+        self._env_req_matcher: EnvReqMatcher = None
+        self._deployment_profile = DeploymentProfile()
+        self._inventory_config: dict = None
+        self._kept_deployment: dict | None = None
+        self._kept_deployment_cmdline_args: Namespace | None = None
+        self._worker_summaries: list[dict] = []
+        self._contingency_check_cache = ContingencyCheckCache()
+        self._test_phase_timings: dict[str, float] = {}
+        self._test_timings = TestTimingsRecorder()
+        self._device_io_monitor: DeviceIOMonitor | None = None
+        self._device_io_metrics: dict[str, dict[str, dict[str, float]]] = {}
+        self._logging_pipeline: QueueLoggingPipeline | None = None
+        self._run_recorder = RunRecorder()
+        self._report = BoardfarmReport()
+        self._screenshot_store: ScreenshotStore | None = None
+        self._report_file = ReportFile()
+        self._circuit_breaker: CircuitBreaker | None = None
+        self.session_pools = SessionPools()
+        self._reprovision_retry: ReprovisionRetry | None = None
+        self._reprovisioned_test: str | None = None
+        self._boardfarm_option_names: list[str] = []
 
     def pytest_addoption(self, parser: Parser) -> None:
         """Add command line arguments to pytest.
@@ -53,28 +154,289 @@ class BoardfarmPlugin:
         :param parser: argument parser
         :type parser: Parser
         """
-        self._plugin_manager.hook.boardfarm_add_cmdline_args(
-            argparser=ArgumentParser(parser),
+        argparser = ArgumentParser(parser)
+        self._plugin_manager.hook.boardfarm_add_cmdline_args(argparser=argparser)
+        self._boardfarm_option_names = argparser.dests
+        group = parser.getgroup("boardfarm")
+        group.addoption(
+            "--env-req-filter",
+            choices=("setup", "skip", "deselect"),
+            default="setup",
+            help=(
+                "When to filter tests on env_req marker: 'setup' skips each test"
+                " during its setup, 'skip' and 'deselect' evaluate all markers"
+                " at collection and skip or deselect the mismatching tests"
+            ),
+        )
+        group.addoption(
+            "--env-req-order",
+            choices=("collection", "affinity"),
+            default="collection",
+            help=(
+                "Order of the tests: 'collection' keeps the collection (or"
+                " pytest-randomly) order, 'affinity' groups the tests with the"
+                " same env_req marker to limit board reconfigurations"
+            ),
+        )
+        group.addoption(
+            "--deploy-concurrency",
+            type=int,
+            default=1,
+            help=(
+                "Maximum number of devices booted and configured concurrently"
+                " during deployment (default: 1, i.e. boardfarm_setup_env hook)"
+            ),
+        )
+        group.addoption(
+            "--deployment-logs-dir",
+            default=None,
+            help=(
+                "Stream the boardfarm setup and teardown logs to files in the"
+                " given directory instead of keeping them in memory"
+            ),
+        )
+        group.addoption(
+            "--deployment-logs-tail",
+            type=int,
+            default=1000,
+            help=(
+                "Number of last deployment log lines shown in the html report"
+                " when --deployment-logs-dir is given (default: 1000)"
+            ),
+        )
+        group.addoption(
+            "--board-pool",
+            default="",
+            help=(
+                "Boards (names are comma separated) reserved by pytest-xdist"
+                " workers, the n-th worker reserves the n-th board"
+            ),
+        )
+        group.addoption(
+            "--cache-config",
+            action="store_true",
+            help=(
+                "Reuse the boardfarm config parsed by a previous session when the"
+                " board, inventory, env config and boardfarm options are unchanged"
+            ),
+        )
+        group.addoption(
+            "--cache-contingency-checks",
+            action="store_true",
+            help=(
+                "Skip the contingency check of a test requesting the same"
+                " environment as the previous test, unless a test failed since"
+            ),
+        )
+        group.addoption(
+            "--keep-devices",
+            action="store_true",
+            help=(
+                "Keep the devices deployed at the end of the session and reuse"
+                " them in the next sessions with the same board and configs"
+            ),
+        )
+        group.addoption(
+            "--release-kept-devices",
+            action="store_true",
+            help="Release the devices kept deployed by a previous session",
+        )
+        group.addoption(
+            "--report-sidecars",
+            choices=("none", "plain", "gzip"),
+            default="none",
+            help=(
+                "Save the boardfarm logs and configs of the html report in"
+                " sidecar files, optionally gzip compressed, loaded on click"
+                " (ignored with --self-contained-html)"
+            ),
+        )
+        group.addoption(
+            "--test-timings-file",
+            default=None,
+            help=(
+                "Save the timing breakdown (env matching, contingency check,"
+                " fixture setup, call and teardown) and the logged steps of each"
+                " test as a json lines file at the given path"
+            ),
+        )
+        group.addoption(
+            "--device-io-metrics",
+            action="store_true",
+            default=False,
+            help=(
+                "Measure the bytes sent and received, and the commands executed on"
+                " each device by each test, shown in the html report"
+            ),
+        )
+        group.addoption(
+            "--device-io-metrics-file",
+            default=None,
+            help=(
+                "Save the bytes sent and received, and the commands executed on"
+                " each device by each test as a json lines file at the given path,"
+                " implies --device-io-metrics"
+            ),
+        )
+        group.addoption(
+            "--run-record-file",
+            default=None,
+            help=(
+                "Save the boardfarm details of the session and the result of each"
+                " test as a json lines file at the given path"
+            ),
+        )
+        group.addoption(
+            "--screenshot-max-size",
+            type=int,
+            default=0,
+            help=(
+                "Downsize the screenshots attached to the tests to this width and"
+                " height in pixels, requires Pillow (default: 0, keep their size)"
+            ),
+        )
+        group.addoption(
+            "--screenshot-thumbnail-size",
+            type=int,
+            default=240,
+            help=(
+                "Width and height in pixels of the screenshot thumbnails shown in"
+                " the html report, requires Pillow (default: 240)"
+            ),
+        )
+        group.addoption(
+            "--async-logging",
+            action="store_true",
+            help=(
+                "Write the boardfarm and device logs from a background thread,"
+                " the logging threads only queue the log records"
+            ),
+        )
+        group.addoption(
+            "--async-logging-queue-size",
+            type=int,
+            default=100000,
+            help=(
+                "Number of log records queued by --async-logging, records are"
+                " dropped and counted when the queue is full (default: 100000)"
+            ),
+        )
+        group.addoption(
+            "--fail-fast",
+            action="store_true",
+            help=(
+                "Fail the remaining tests without running them once the devices"
+                " are unusable, i.e. after a failed deployment or"
+                " --fail-fast-device-errors consecutive tests failing with a"
+                " device error, and release the devices"
+            ),
+        )
+        group.addoption(
+            "--fail-fast-device-errors",
+            type=int,
+            default=3,
+            help=(
+                "Number of consecutive tests failing with a device error, e.g. a"
+                " console timeout or a failed contingency check, after which"
+                " --fail-fast fails the remaining tests (default: 3)"
+            ),
+        )
+        group.addoption(
+            "--reprovision-retries",
+            type=int,
+            default=0,
+            help=(
+                "Re-run up to N times a test with an env_req marker failing in"
+                " its call phase, after running the contingency check of the"
+                " devices it used (default: 0, no re-run)"
+            ),
+        )
+        group.addoption(
+            "--deployment-profile",
+            default=None,
+            help=(
+                "Save the timing profile of the boardfarm hooks as a json file at"
+                " the given path (default: in --save-console-logs directory)"
+            ),
         )
 
+    def _get_deployment_cmdline_args(self) -> Namespace:
+        if self._kept_deployment_cmdline_args is not None:
+            return self._kept_deployment_cmdline_args
+        return self._session_config.option
+
     def deploy_boardfarm_devices(self) -> None:
         """Deploy boardfarm devices to the environment."""
-        self.device_manager = self._plugin_manager.hook.boardfarm_register_devices(
-            config=self.boardfarm_config,
-            cmdline_args=self._session_config.option,
-            plugin_manager=self._plugin_manager,
-        )
-        asyncio.run(
-            self._plugin_manager.hook.boardfarm_setup_env(
+        cmdline_args = self._get_deployment_cmdline_args()
+        with self._deployment_profile.measure("boardfarm_register_devices", "setup"):
+            self.device_manager = self._plugin_manager.hook.boardfarm_register_devices(
                 config=self.boardfarm_config,
-                cmdline_args=self._session_config.option,
+                cmdline_args=cmdline_args,
                 plugin_manager=self._plugin_manager,
-                device_manager=self.device_manager,
-            ),
-        )
+            )
+        concurrency = self._session_config.option.deploy_concurrency
+        setup_env_overridden = is_setup_env_overridden(self._plugin_manager)
+        if concurrency > 1 and not setup_env_overridden:
+            self.event_loop.run_until_complete(
+                setup_env_concurrently(
+                    plugin_manager=self._plugin_manager,
+                    config=self.boardfarm_config,
+                    cmdline_args=cmdline_args,
+                    device_manager=self.device_manager,
+                    concurrency=concurrency,
+                    durations=self._deployment_setup_data.setdefault(
+                        "device_durations",
+                        {},
+                    ),
+                    profile=self._deployment_profile,
+                ),
+            )
+            return
+        if concurrency > 1:
+            _LOGGER.warning(
+                "boardfarm_setup_env hook is overridden by a plugin,"
+                " ignoring --deploy-concurrency.",
+            )
+        with (
+            self._deployment_profile.measure("boardfarm_setup_env", "setup")
+            if setup_env_overridden
+            else measure_setup_env_stages(
+                self._plugin_manager,
+                self._deployment_profile,
+            )
+        ):
+            self.event_loop.run_until_complete(
+                self._plugin_manager.hook.boardfarm_setup_env(
+                    config=self.boardfarm_config,
+                    cmdline_args=cmdline_args,
+                    plugin_manager=self._plugin_manager,
+                    device_manager=self.device_manager,
+                ),
+            )
 
     def release_boardfarm_devices(self) -> None:
-        """Release boardfarm devices after the test execution."""
+        """Release boardfarm devices after the test execution.
+
+        With --keep-devices the devices are only disconnected, and kept
+        deployed for the next sessions.
+        """
+        if (
+            self._session_config.option.keep_devices
+            and not self._session_config.option.release_kept_devices
+            and "exception" not in self._deployment_setup_data
+        ):
+            with self._deployment_profile.measure(
+                "boardfarm_shutdown_device",
+                "teardown",
+            ):
+                self._plugin_manager.hook.boardfarm_shutdown_device()
+            save_kept_deployment(
+                self._session_config,
+                self._inventory_config,
+                self.device_manager,
+            )
+            return
+        cmdline_args = self._get_deployment_cmdline_args()
         deployment_status = (
             {"status": "success"}
             if "exception" not in self._deployment_setup_data
@@ -83,12 +445,38 @@ class BoardfarmPlugin:
                 "exception": self._deployment_setup_data.get("exception")[1],
             }
         )
-        self._plugin_manager.hook.boardfarm_release_devices(
-            config=self.boardfarm_config,
-            cmdline_args=self._session_config.option,
-            plugin_manager=self._plugin_manager,
-            deployment_status=deployment_status,
-        )
+        with self._deployment_profile.measure("boardfarm_release_devices", "teardown"):
+            self._plugin_manager.hook.boardfarm_release_devices(
+                config=self.boardfarm_config,
+                cmdline_args=cmdline_args,
+                plugin_manager=self._plugin_manager,
+                deployment_status=deployment_status,
+            )
+        if self._kept_deployment is not None:
+            clear_kept_deployment(self._session_config)
+
+    def _get_artifact_name(self, name: str, suffix: str) -> str:
+        # xdist workers run in the same directory, their artifacts are suffixed
+        worker_id = get_xdist_worker_id(self._session_config)
+        return f"{name}_{worker_id}{suffix}" if worker_id else f"{name}{suffix}"
+
+    def _save_deployment_profile(self) -> None:
+        profile_path = self._session_config.option.deployment_profile
+        if profile_path is not None and get_xdist_worker_id(self._session_config):
+            path = Path(profile_path)
+            profile_path = str(
+                path.with_name(self._get_artifact_name(path.stem, path.suffix)),
+            )
+        if profile_path is None and self._session_config.option.save_console_logs:
+            profile_path = str(
+                Path(self._session_config.option.save_console_logs)
+                / self._get_artifact_name("deployment_profile", ".json"),
+            )
+        if profile_path:
+            self._deployment_profile.save(
+                profile_path,
+                self._deployment_setup_data.get("device_durations"),
+            )
 
     @pytest.hookimpl(hookwrapper=True)
     def pytest_sessionstart(self, session: Session) -> Generator[None]:
@@ -99,20 +487,90 @@ class BoardfarmPlugin:
         """
         yield
         self._session_config = session.config
-        self._plugin_manager.hook.boardfarm_configure(
-            cmdline_args=self._session_config.option,
-            plugin_manager=self._plugin_manager,
-        )
-        inventory_config = self._plugin_manager.hook.boardfarm_reserve_devices(
-            cmdline_args=self._session_config.option,
-            plugin_manager=self._plugin_manager,
+        if is_xdist_controller(self._session_config):
+            self._report.set_config(self._session_config, None)
+            self._save_report()
+            return
+        if self._session_config.option.board_pool and get_xdist_worker_id(
+            self._session_config,
+        ):
+            self._session_config.option.board_name = get_worker_board_name(
+                self._session_config,
+            )
+        with self._deployment_profile.measure("boardfarm_configure", "session"):
+            self._plugin_manager.hook.boardfarm_configure(
+                cmdline_args=self._session_config.option,
+                plugin_manager=self._plugin_manager,
+            )
+        with self._deployment_profile.measure("boardfarm_reserve_devices", "session"):
+            self._inventory_config = self._reserve_devices()
+
+        with self._deployment_profile.measure("boardfarm_parse_config", "session"):
+            self.boardfarm_config = self._parse_config()
+        self._env_req_matcher = EnvReqMatcher(self.boardfarm_config.env_config)
+        self._report.set_config(self._session_config, self.boardfarm_config)
+        self._save_report()
+
+    def _reserve_devices(self) -> dict:
+        option = self._session_config.option
+        if option.keep_devices or option.release_kept_devices:
+            self._kept_deployment = load_kept_deployment(self._session_config)
+        if self._kept_deployment is None and option.release_kept_devices:
+            # a release only session never deploys the devices
+            raise pytest.UsageError(_NO_KEPT_DEVICES_ERROR)
+        if self._kept_deployment is None:
+            return self._plugin_manager.hook.boardfarm_reserve_devices(
+                cmdline_args=option,
+                plugin_manager=self._plugin_manager,
+            )
+        _LOGGER.info(
+            "Reusing devices %s of board %r kept deployed since %s",
+            ", ".join(self._kept_deployment["devices"]),
+            self._kept_deployment["board_name"],
+            self._kept_deployment["kept_since"],
         )
+        # kept devices are already booted, only connect to them, the session
+        # options are left unchanged
+        self._kept_deployment_cmdline_args = copy.copy(option)
+        self._kept_deployment_cmdline_args.skip_boot = True
+        return self._kept_deployment["inventory_config"]
 
-        self.boardfarm_config = self._plugin_manager.hook.boardfarm_parse_config(
-            cmdline_args=self._session_config.option,
-            inventory_config=inventory_config,
-            env_config=get_json(self._session_config.option.env_config),
+    def _parse_config(self) -> BoardfarmConfig:
+        option = self._session_config.option
+        cache = getattr(self._session_config, "cache", None)
+        config_cache = (
+            BoardfarmConfigCache(cache) if option.cache_config and cache else None
+        )
+        cache_key = (
+            config_cache.get_key(
+                option.env_config,
+                self._inventory_config,
+                board_name=option.board_name,
+                # the boardfarm plugins may read their options while parsing
+                cmdline_args={
+                    name: getattr(option, name, None)
+                    for name in sorted(self._boardfarm_option_names)
+                },
+                # unnamed plugins are registered with their id, skip them
+                plugins=sorted(
+                    name
+                    for name, _ in self._plugin_manager.list_name_plugin()
+                    if not name.isdigit()
+                ),
+            )
+            if config_cache
+            else None
+        )
+        if cache_key and (boardfarm_config := config_cache.load(cache_key)):
+            return boardfarm_config
+        boardfarm_config = self._plugin_manager.hook.boardfarm_parse_config(
+            cmdline_args=option,
+            inventory_config=self._inventory_config,
+            env_config=get_json(option.env_config),
         )
+        if cache_key:
+            config_cache.save(cache_key, boardfarm_config)
+        return boardfarm_config
 
     @staticmethod
     def _get_device_manager() -> DeviceManager | None:
@@ -121,45 +579,164 @@ class BoardfarmPlugin:
         except ValueError:
             return None
 
+    def _get_deployment_log_file(self, stage: str) -> Path | None:
+        logs_dir = self._session_config.option.deployment_logs_dir
+        if not logs_dir:
+            return None
+        return Path(logs_dir, self._get_artifact_name(f"boardfarm_{stage}", ".log"))
+
     @pytest.hookimpl(hookwrapper=True)
     def pytest_runtestloop(self, session: Session) -> Generator[None]:
         """Deploy devices to environment and them release after use.
 
         :param session: pytest session instance
         :type session: Session
+        :raises Exception: when the deployment fails, unless --fail-fast fails
+            the tests with its root cause
+        :yield: to the test loop, once the devices are deployed
         """
+        if is_xdist_controller(session.config):
+            # devices are deployed by the xdist workers
+            self._run_recorder.write_session(self._report.as_dict())
+            yield
+            return
         logging_plugin: LoggingPlugin = session.config.pluginmanager.get_plugin(
             "logging-plugin",
         )
         device_manager = self._get_device_manager()
+        self.event_loop, self._previous_event_loop = new_session_event_loop()
         try:
-            if device_manager is None:
-                logging_plugin.log_cli_handler.set_when("boardfarm setup")
-                capture_boardfarm_logs(
-                    logging_plugin,
-                    self.deploy_boardfarm_devices,
-                    capture_to=self._deployment_setup_data,
+            try:
+                if device_manager is None:
+                    logging_plugin.log_cli_handler.set_when("boardfarm setup")
+                    capture_boardfarm_logs(
+                        logging_plugin,
+                        self.deploy_boardfarm_devices,
+                        capture_to=self._deployment_setup_data,
+                        log_file=self._get_deployment_log_file("setup"),
+                        tail_lines=session.config.option.deployment_logs_tail,
+                    )
+                else:
+                    self.device_manager = device_manager
+                session.config.hook.pytest_boardfarm_session_pools(
+                    pools=self.session_pools,
                 )
-            else:
-                self.device_manager = device_manager
-            yield
+                # the sessions are opened while the tests start
+                self.session_pools.warm_up(self.device_manager)
+            except Exception as exception:  # pylint: disable=broad-except  # noqa: BLE001
+                if self._circuit_breaker is None:
+                    raise
+                # the tests are failed with the root cause, the devices released
+                self._circuit_breaker.trip(f"boardfarm setup failed - {exception!r}")
+            finally:
+                self._report.set_setup(self._deployment_setup_data, self.device_manager)
+                self._update_report()
+                self._save_report()
+                self._run_recorder.write_session(self._report.as_dict())
+            # a test may reboot the devices checked for the previous test
+            with (
+                self._contingency_check_cache.invalidate_on_boot(self._plugin_manager)
+                if session.config.option.cache_contingency_checks
+                else nullcontext()
+            ):
+                yield
         finally:
-            if device_manager is None:
-                logging_plugin.log_cli_handler.set_when("boardfarm teardown")
-                capture_boardfarm_logs(
-                    logging_plugin,
-                    self.release_boardfarm_devices,
-                    capture_to=self._deployment_teardown_data,
+            try:
+                self.session_pools.close()
+                if device_manager is None:
+                    logging_plugin.log_cli_handler.set_when("boardfarm teardown")
+                    capture_boardfarm_logs(
+                        logging_plugin,
+                        self.release_boardfarm_devices,
+                        capture_to=self._deployment_teardown_data,
+                        log_file=self._get_deployment_log_file("teardown"),
+                        tail_lines=session.config.option.deployment_logs_tail,
+                    )
+            finally:
+                close_session_event_loop(self.event_loop, self._previous_event_loop)
+                self._report.set_teardown(
+                    self._deployment_teardown_data,
+                    self._deployment_profile.as_dict(
+                        self._deployment_setup_data.get("device_durations"),
+                    ),
                 )
+                self._save_report()
+                self._save_deployment_profile()
 
-    @staticmethod
-    def pytest_configure(config: Config) -> None:
-        """Initialize env_req marker.
+    def _configure_html_artifacts(self, config: Config, directory: Path) -> None:
+        if not get_xdist_worker_id(config):
+            # the controller gets the reports of all workers
+            self._report_file.open(directory / "report.json")
+        # a self-contained html report embeds the screenshots instead
+        if not getattr(config.option, "self_contained_html", False):
+            self._screenshot_store = ScreenshotStore(
+                directory / "screenshots",
+                max_size=config.option.screenshot_max_size,
+                thumbnail_size=config.option.screenshot_thumbnail_size,
+            )
+
+    def pytest_configure(self, config: Config) -> None:
+        """Initialize logging and env_req marker.
 
         :param config: pytest config
         :type config: Config
+        :raises UsageError: when --deployment-logs-tail is negative, when
+            several xdist workers would deploy the same --board-name, or when
+            --release-kept-devices has no kept devices to release
         """
+        if config.option.deployment_logs_tail < 0:
+            err_msg = "--deployment-logs-tail must be a positive number or 0."
+            raise pytest.UsageError(err_msg)
+        if get_xdist_workers_count(config) > 1 and not config.option.board_pool:
+            err_msg = (
+                "Each pytest-xdist worker needs its own board, give the boards"
+                " of the workers with --board-pool."
+            )
+            raise pytest.UsageError(err_msg)
+        if (
+            config.option.release_kept_devices
+            # the xdist workers check the kept devices of their own board
+            and not get_xdist_workers_count(config)
+            and not get_xdist_worker_id(config)
+            and load_kept_deployment(config) is None
+        ):
+            raise pytest.UsageError(_NO_KEPT_DEVICES_ERROR)
         logging.config.dictConfig(LOGGING_CONFIG)
+        config.stash[TEST_LOGGER_KEY] = self._test_logger
+        if (
+            config.option.device_io_metrics
+            or config.option.device_io_metrics_file
+            # the devices used by a failed test are reprovisioned for its re-run
+            or config.option.reprovision_retries > 0
+        ):
+            self._device_io_monitor = DeviceIOMonitor()
+        if config.option.reprovision_retries > 0:
+            self._reprovision_retry = ReprovisionRetry(
+                config.option.reprovision_retries,
+                self._reprovision_devices,
+            )
+            config.pluginmanager.register(
+                self._reprovision_retry,
+                "boardfarm_reprovision_retry",
+            )
+        if config.option.fail_fast:
+            self._circuit_breaker = CircuitBreaker(
+                config.option.fail_fast_device_errors,
+            )
+        if config.option.run_record_file and not get_xdist_worker_id(config):
+            # the controller gets the reports of all workers
+            self._run_recorder.open(config.option.run_record_file)
+        html_path = getattr(config.option, "htmlpath", None)
+        if html_path:
+            self._configure_html_artifacts(config, Path(html_path).parent / "boardfarm")
+        if config.option.async_logging:
+            self._logging_pipeline = QueueLoggingPipeline(
+                config.option.async_logging_queue_size,
+            )
+            self._logging_pipeline.start(
+                [logging.getLogger()]
+                + [logging.getLogger(name) for name in LOGGING_CONFIG["loggers"]],
+            )
         config.addinivalue_line(
             "markers",
             "env_req(env_req: Dict): mark test with environment request. Skip"
@@ -167,60 +744,451 @@ class BoardfarmPlugin:
             'Example: @pytest.mark.env_req({"environment_def":{"board":'
             '{"eRouter_Provisioning_mode":["dual"]}}})',
         )
+        config.addinivalue_line(
+            "markers",
+            f"{_NO_CONTINGENCY_CHECK_CACHE_MARKER}: always run the contingency"
+            " check of the test and invalidate the cached check after it, e.g."
+            " for tests rebooting a device.",
+        )
+
+    def pytest_unconfigure(self) -> None:
+        """Write the queued log records and stop the logging pipeline."""
+        if self._logging_pipeline is None:
+            return
+        self._logging_pipeline.stop()
+        for handler_name, count in self._logging_pipeline.get_dropped_records().items():
+            _LOGGER.warning(
+                "%s log records of the %s handler were dropped, the logging queue"
+                " was full.",
+                count,
+                handler_name,
+            )
+
+    def pytest_terminal_summary(self, terminalreporter: TerminalReporter) -> None:
+        """Show why the tests failed fast and the dropped log records count.
+
+        :param terminalreporter: pytest terminal reporter
+        :type terminalreporter: TerminalReporter
+        """
+        if self._circuit_breaker is not None and self._circuit_breaker.reason:
+            terminalreporter.section("boardfarm fail fast", red=True)
+            terminalreporter.write_line(
+                f"The remaining tests were not run: {self._circuit_breaker.reason}",
+            )
+        if self._logging_pipeline is None:
+            return
+        dropped_records = self._logging_pipeline.get_dropped_records()
+        if dropped_records:
+            terminalreporter.section("boardfarm logging")
+            for handler_name, count in dropped_records.items():
+                terminalreporter.write_line(
+                    f"{count} log records of the {handler_name} handler were"
+                    " dropped, increase --async-logging-queue-size",
+                )
+
+    @staticmethod
+    def _get_env_req_marker(item: Item) -> Mark | None:
+        env_req_marker = item.get_closest_marker("env_req")
+        return env_req_marker if env_req_marker and env_req_marker.args else None
+
+    def _filter_tests_by_env_req(self, config: Config, items: list[Item]) -> None:
+        env_req_filter = config.option.env_req_filter
+        if env_req_filter == "setup" or self._env_req_matcher is None:
+            return
+        selected_tests = []
+        deselected_tests = []
+        for item in items:
+            env_req_marker = self._get_env_req_marker(item)
+            if env_req_marker is None or self._env_req_matcher.is_matching(
+                env_req_marker.args[0],
+            ):
+                selected_tests.append(item)
+            elif env_req_filter == "deselect":
+                deselected_tests.append(item)
+            else:
+                item.add_marker(pytest.mark.skip(reason=_ENV_MISMATCH_REASON))
+                selected_tests.append(item)
+        items[:] = selected_tests
+        if deselected_tests:
+            config.hook.pytest_deselected(items=deselected_tests)
+
+    def _group_tests_by_env_req(self, items: list[Item]) -> None:
+        for item in items:
+            env_req_marker = self._get_env_req_marker(item)
+            if env_req_marker and item.get_closest_marker("xdist_group") is None:
+                item.add_marker(
+                    pytest.mark.xdist_group(get_env_req_group(env_req_marker.args[0])),
+                )
+
+    def _order_tests_by_env_req(self, items: list[Item]) -> None:
+        env_requests = []
+        for item in items:
+            env_req_marker = self._get_env_req_marker(item)
+            env_requests.append(env_req_marker.args[0] if env_req_marker else None)
+        items[:] = [items[index] for index in get_env_affinity_order(env_requests)]
+
+    @pytest.hookimpl(hookwrapper=True, tryfirst=True)
+    def pytest_collection_modifyitems(
+        self,
+        config: Config,
+        items: list[Item],
+    ) -> Generator[None]:
+        """Filter and order the tests on their env_req marker.
+
+        Mismatching tests are skipped or deselected in one pass. With the
+        affinity order, tests requesting the same environment are grouped once
+        every other plugin modified the tests, so that the pytest-randomly
+        shuffling is only kept within a group. With the affinity order and
+        the loadgroup distribution of pytest-xdist, the tests requesting the
+        same environment are also run by the same worker. With
+        --release-kept-devices every test is deselected, the session only
+        releases the kept devices.
+
+        :param config: pytest config
+        :type config: Config
+        :param items: list of collected tests function
+        :type items: list[Item]
+        :yield: to the other plugins modifying the tests
+        """
+        if config.option.env_req_order == "affinity" and getattr(
+            config.option,
+            "loadgroup",
+            False,
+        ):
+            # the xdist worker names the test ids after their group
+            self._group_tests_by_env_req(items)
+        yield
+        if config.option.release_kept_devices:
+            config.hook.pytest_deselected(items=items[:])
+            items[:] = []
+            return
+        self._filter_tests_by_env_req(config, items)
+        if config.option.env_req_order == "affinity":
+            self._order_tests_by_env_req(items)
 
     @pytest.hookimpl(hookwrapper=True)
     def pytest_runtest_setup(self, item: Item) -> Generator[None]:
         """Pytest run test setup hook wrapper to validate env_req marker.
 
+        The failure of a previous attempt of a re-run test is forgotten, so
+        that the sessions of a passing attempt are reused.
+
         :param item: test item
         :type item: Item
         """
-        env_req_marker = item.get_closest_marker("env_req")
-        if (
-            env_req_marker
-            and env_req_marker.args
-            and not is_env_matching(
-                env_req_marker.args[0],
-                self.boardfarm_config.env_config,
+        item.stash[TEST_FAILED_KEY] = False
+        if self._circuit_breaker is not None and self._circuit_breaker.reason:
+            # the fixtures are not set up, they would use the unusable devices
+            pytest.fail(self._get_fail_fast_message(), pytrace=False)
+        env_req_marker = self._get_env_req_marker(item)
+        if env_req_marker:
+            start_time = time.monotonic()
+            is_matching = self._env_req_matcher.is_matching(env_req_marker.args[0])
+            self._test_phase_timings["env_req_matching"] = time.monotonic() - start_time
+            if not is_matching:
+                pytest.skip(_ENV_MISMATCH_REASON)
+            start_time = time.monotonic()
+            try:
+                self._run_contingency_check(item, env_req_marker.args[0])
+            finally:
+                self._test_phase_timings["contingency_check"] = (
+                    time.monotonic() - start_time
+                )
+
+        yield
+
+    def _run_contingency_check(self, item: Item, env_req: dict) -> None:
+        if self._reprovisioned_test == item.nodeid:
+            self._reprovisioned_test = None
+            _LOGGER.debug(
+                "Contingency check of %s skipped, reprovisioned.", item.nodeid
             )
-        ):
-            pytest.skip("Environment mismatch. Skipping")
-        elif env_req_marker and env_req_marker.args:
-            self._plugin_manager.hook.contingency_check(
-                env_req=env_req_marker.args[0],
-                device_manager=self.device_manager,
+            return
+        use_cache = self._session_config.option.cache_contingency_checks and (
+            item.get_closest_marker(_NO_CONTINGENCY_CHECK_CACHE_MARKER) is None
+        )
+        if use_cache and self._contingency_check_cache.is_verified(env_req):
+            _LOGGER.debug("Contingency check of %s skipped, cached.", item.nodeid)
+            return
+        self._plugin_manager.hook.contingency_check(
+            env_req=env_req,
+            device_manager=self.device_manager,
+        )
+        if use_cache:
+            self._contingency_check_cache.set_verified(env_req)
+
+    def _reprovision_devices(
+        self,
+        env_req: dict,
+        reports: list[TestReport],
+    ) -> list[str]:
+        """Run the contingency check of the devices used by a failed test.
+
+        The contingency check of all the devices is run when the devices used
+        by the test are unknown, e.g. with asynchronous device APIs. The setup
+        of the re-run does not run the contingency check again.
+
+        :param env_req: environment request of the test
+        :type env_req: dict
+        :param reports: reports of the failed test phases
+        :type reports: list[TestReport]
+        :return: names of the reprovisioned devices
+        :rtype: list[str]
+        """
+        device_names = get_used_devices(reports[-1])
+        all_device_names = list(
+            self.device_manager.get_devices_by_type(BoardfarmDevice),
+        )
+        if not device_names:
+            _LOGGER.info(
+                "No device I/O measured for %s, reprovisioning all the devices.",
+                reports[0].nodeid,
             )
+            device_names = all_device_names
+        _LOGGER.info("Reprovisioning %s for the test re-run.", device_names)
+        self._plugin_manager.subset_hook_caller(
+            "contingency_check",
+            remove_plugins=[
+                self._plugin_manager.get_plugin(device_name)
+                for device_name in all_device_names
+                if device_name not in device_names
+            ],
+        )(env_req=env_req, device_manager=self.device_manager)
+        # the next test checks the devices again, whatever its request
+        self._contingency_check_cache.invalidate(
+            f"{device_names} reprovisioned for {reports[0].nodeid}",
+        )
+        if self._device_io_monitor is not None:
+            # the device I/O of the test is the I/O of its last attempt
+            self._device_io_monitor.reset()
+        self._reprovisioned_test = reports[0].nodeid
+        return device_names
 
-        yield
+    def _get_fail_fast_message(self) -> str:
+        reason = self._circuit_breaker.reason if self._circuit_breaker else None
+        return f"Not run, the devices are unusable: {reason}"
+
+    def _fail_remaining_tests(self, session: Session, nextitem: Item) -> None:
+        # the fixtures kept for the next test are torn down before the release
+        try:
+            setup_state = session._setupstate  # pylint: disable=protected-access  # noqa: SLF001
+            setup_state.teardown_exact(None)
+        except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+            _LOGGER.warning("Failed to tear down the test fixtures.", exc_info=True)
+        message = self._get_fail_fast_message()
+        for item in session.items[session.items.index(nextitem) :]:
+            item.ihook.pytest_runtest_logstart(
+                nodeid=item.nodeid, location=item.location
+            )
+            self._test_start_time = datetime.now(tz=THIS_TZ)
+            self._test_phase_timings = {}
+            for when, func in (
+                ("setup", functools.partial(pytest.fail, message, pytrace=False)),
+                ("teardown", lambda: None),
+            ):
+                call = pytest.CallInfo.from_call(func, when=when)  # type: ignore[arg-type]
+                report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+                item.ihook.pytest_runtest_logreport(report=report)
+            item.ihook.pytest_runtest_logfinish(
+                nodeid=item.nodeid,
+                location=item.location,
+            )
+        self._test_start_time = None
+        # stops the pytest test loop, the devices are then released
+        session.shouldfail = message
 
     @pytest.hookimpl(hookwrapper=True)
-    def pytest_runtest_protocol(self) -> Generator[None]:
-        """Capture test start and end time for the html report."""
+    def pytest_runtest_protocol(
+        self,
+        item: Item,
+        nextitem: Item | None,
+    ) -> Generator[None]:
+        """Capture test start and end time for the html report.
+
+        The step timeline of the test logger is started for each test. Once
+        the fail fast circuit breaker is tripped, the remaining tests are
+        failed at once, without running their protocol. The xdist workers do
+        not know their remaining tests, they fail each test in its setup.
+
+        :param item: test item
+        :type item: Item
+        :param nextitem: next test item, None for the last test
+        :type nextitem: Item | None
+        :yield: to the test protocol
+        """
         self._test_start_time = datetime.now(tz=THIS_TZ)
+        self._test_phase_timings = {}
+        self._test_logger.start_test(item.nodeid)
+        if self._device_io_monitor is not None:
+            if self.device_manager is not None:
+                self._device_io_monitor.instrument(self.device_manager)
+            self._device_io_monitor.reset()
         yield
         self._test_start_time = None
+        self._test_logger.stop_test()
+        if (
+            nextitem is not None
+            and self._circuit_breaker is not None
+            and self._circuit_breaker.reason
+            and not get_xdist_worker_id(item.config)
+        ):
+            self._fail_remaining_tests(item.session, nextitem)
+
+    def _get_phase_timings(self, report: TestReport) -> dict[str, float]:
+        if report.when != "setup":
+            return {report.when: report.duration}
+        timings = dict(self._test_phase_timings)
+        # the remaining time of the setup phase is spent in the fixtures
+        timings["fixture_setup"] = max(report.duration - sum(timings.values()), 0)
+        return timings
+
+    def _add_screenshots(self, item: Item, report: TestReport) -> None:
+        pytest_html = item.config.pluginmanager.getplugin("html")
+        if pytest_html is None or not getattr(item.config.option, "htmlpath", None):
+            return
+        screenshots = []
+        extras = [*getattr(report, "extras", [])]
+        for name, value in report.user_properties:
+            if not isinstance(value, str) or ".png" not in value:
+                continue
+            if Path(value).suffix != ".png" or not Path(value).is_file():
+                # e.g. the URL of a screenshot, linked as is
+                extras.append(pytest_html.extras.image(value, name))
+            elif self._screenshot_store is None:
+                # no screenshot store with --self-contained-html
+                extras.append(
+                    pytest_html.extras.image(
+                        get_screenshot_base64(
+                            value,
+                            item.config.option.screenshot_max_size,
+                        ),
+                        name,
+                    ),
+                )
+            else:
+                screenshots.append((name, *self._screenshot_store.add(value)))
+        if screenshots:
+            extras.append(
+                pytest_html.extras.html(
+                    get_screenshots_html_report(item.config, screenshots),
+                ),
+            )
+        report.extras = extras  # type: ignore[attr-defined]
 
     @pytest.hookimpl(hookwrapper=True)
-    def pytest_runtest_makereport(self, item: Item) -> Generator[None]:
-        """Save test start time to put in html execution report."""
+    def pytest_runtest_makereport(
+        self,
+        item: Item,
+        call: CallInfo[None],
+    ) -> Generator[None]:
+        """Save test start time, timings and steps to put in html execution report.
+
+        The steps logged in each test phase are saved on its report. The
+        device errors of the tests are counted by the fail fast circuit
+        breaker.
+
+        :param item: test item
+        :type item: Item
+        :param call: test phase call information
+        :type call: CallInfo[None]
+        """
         outcome = yield
         report: TestReport = outcome.get_result()  # type: ignore[attr-defined]
+        if self._circuit_breaker is not None:
+            if call.excinfo is not None and call.excinfo.errisinstance(DEVICE_ERRORS):
+                self._circuit_breaker.add_device_error(item.nodeid, call.excinfo.value)
+            if report.when == "teardown":
+                self._circuit_breaker.end_test()
         report.test_start_time = self._test_start_time  # type: ignore[attr-defined]
-        if report.when != "call":
-            return
-        pytest_html = item.config.pluginmanager.getplugin("html")
-        if pytest_html is None:
-            return
-        report.extra = [  # type: ignore[attr-defined]
-            pytest_html.extras.image(image[1], image[0])
-            for image in report.user_properties
-            if ".png" in list(image)[1]  # type: ignore[operator]
-        ]
+        report.boardfarm_timings = self._get_phase_timings(report)  # type: ignore[attr-defined]
+        report.boardfarm_steps = self._test_logger.pop_new_steps()  # type: ignore[attr-defined]
+        if report.when == "teardown" and self._device_io_monitor is not None:
+            report.boardfarm_device_io = self._device_io_monitor.get_metrics()  # type: ignore[attr-defined]
+        if report.failed:
+            item.stash[TEST_FAILED_KEY] = True
+            self._contingency_check_cache.invalidate(f"{item.nodeid} failed")
+        elif report.when == "teardown" and item.get_closest_marker(
+            _NO_CONTINGENCY_CHECK_CACHE_MARKER,
+        ):
+            self._contingency_check_cache.invalidate(
+                f"{item.nodeid} is marked {_NO_CONTINGENCY_CHECK_CACHE_MARKER}",
+            )
+        if report.when == "call":
+            self._add_screenshots(item, report)
+
+    @staticmethod
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_report_to_serializable(report: TestReport) -> Generator[None]:
+        """Serialize test start time sent by xdist workers to the controller.
+
+        :param report: test execution report
+        :type report: TestReport
+        :yield: to the other plugins serializing the report
+        """
+        outcome = yield
+        data: dict | None = outcome.get_result()  # type: ignore[attr-defined]
+        if data is not None and data.get("test_start_time") is not None:
+            data["test_start_time"] = report.test_start_time.isoformat()  # type: ignore[attr-defined]
 
     @staticmethod
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_report_from_serializable(data: dict) -> Generator[None]:
+        """Deserialize test start time received from the xdist workers.
+
+        :param data: serialized test execution report
+        :type data: dict
+        :yield: to the other plugins deserializing the report
+        """
+        outcome = yield
+        report: TestReport | None = outcome.get_result()  # type: ignore[attr-defined]
+        if report is not None and isinstance(data.get("test_start_time"), str):
+            report.test_start_time = datetime.fromisoformat(  # type: ignore[attr-defined]
+                data["test_start_time"],
+            )
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_logreport(self, report: TestReport) -> Generator[None]:
+        """Gather the timing breakdown, steps and device I/O of the test phases.
+
+        The step timeline of a test is added to the html report with its
+        teardown report, once the steps of all phases are known. The timings
+        of a test are only kept until it is in the html report, unless they
+        are saved with --test-timings-file. The boardfarm report saved next to
+        the html report is updated with each report.
+
+        :param report: test execution report
+        :type report: TestReport
+        :yield: to the other plugins, e.g. pytest-html, logging the report
+        """
+        # the controller gets the reports, with their timings, of all workers
+        save_timings = bool(self._session_config.option.test_timings_file) and (
+            not get_xdist_worker_id(self._session_config)
+        )
+        pytest_html = self._session_config.pluginmanager.getplugin("html")
+        if save_timings or pytest_html is not None:
+            self._test_timings.add_report(report)
+        self._run_recorder.add_report(report)
+        self._report.add_test_report(report)
+        self._save_report()
+        device_io = getattr(report, "boardfarm_device_io", None)
+        if device_io is not None:
+            self._device_io_metrics[report.nodeid] = device_io
+        if (
+            report.when == "teardown"
+            and pytest_html is not None
+            and (steps := self._test_timings.get_steps(report.nodeid))
+        ):
+            report.extras = [  # type: ignore[attr-defined]
+                *getattr(report, "extras", []),
+                pytest_html.extras.html(get_test_steps_html_table_report(steps)),
+            ]
+        yield
+        if report.when == "teardown" and not save_timings:
+            self._test_timings.discard(report.nodeid)
+
     @pytest.hookimpl(optionalhook=True)
-    def pytest_html_results_table_header(cells: list[str]) -> None:
-        """Add test start time custom header in html report.
+    def pytest_html_results_table_header(self, cells: list[str]) -> None:
+        """Add test start time and timings custom headers in html report.
 
         :param cells: html table header list
         :type cells: list[str]
@@ -231,11 +1199,22 @@ class BoardfarmPlugin:
             '<th class="sortable" data-column-type="time" style="display: none;">'
             "Hidden Time</th>",
         )
+        cells.extend(
+            f'<th class="sortable" data-column-type="{name}">{title}</th>'
+            for name, title in TIMING_COLUMNS.items()
+        )
+        if self._device_io_monitor is not None:
+            cells.append(
+                '<th class="sortable" data-column-type="device_io">Device I/O</th>',
+            )
 
-    @staticmethod
     @pytest.hookimpl(optionalhook=True)
-    def pytest_html_results_table_row(report: TestReport, cells: list[str]) -> None:
-        """Add test test start time in the html report.
+    def pytest_html_results_table_row(
+        self,
+        report: TestReport,
+        cells: list[str],
+    ) -> None:
+        """Add test test start time and timings in the html report.
 
         :param report: test execution report
         :type report: TestReport
@@ -254,6 +1233,98 @@ class BoardfarmPlugin:
             f'<td class="col-time" style="display: none;">{epoch_time}</td>',
         )
         cells.insert(1, f'<td class="col-time">{start_time_test}</td>')
+        timings = self._test_timings.get_timings(report.nodeid)
+        # padded to the same width, so that sorting the text sorts the durations
+        cells.extend(
+            f'<td class="col-{name}">'
+            + ("" if name not in timings else f"{timings[name]:10.3f}s")
+            + "</td>"
+            for name in TIMING_COLUMNS
+        )
+        if self._device_io_monitor is None:
+            return
+        device_io = self._device_io_metrics.get(report.nodeid, {}).values()
+        io_bytes = sum(io["bytes_sent"] + io["bytes_received"] for io in device_io)
+        commands = sum(io["commands"] for io in device_io)
+        cells.append(
+            '<td class="col-device_io">'
+            + (f"{io_bytes:10d} bytes, {commands} commands" if device_io else "")
+            + "</td>",
+        )
+
+    def _get_contingency_checks(self) -> dict | None:
+        if not self._session_config.option.cache_contingency_checks:
+            return None
+        return self._contingency_check_cache.as_dict()
+
+    def _update_report(self) -> None:
+        # the counters change with each test, they are read when reported
+        self._report.contingency_checks = self._get_contingency_checks()
+        if self._circuit_breaker is not None:
+            self._report.fail_fast_reason = self._circuit_breaker.reason
+        if self._reprovision_retry is not None:
+            self._report.reruns = self._reprovision_retry.as_dict()
+
+    def _save_report(self) -> None:
+        # saved after each stage, a killed session leaves a partial report
+        if self._report_file.is_open:
+            self._update_report()
+            self._report_file.save(self._report)
+
+    def pytest_sessionfinish(self, session: Session) -> None:
+        """Save the test timings, or send the boardfarm summary of a xdist worker.
+
+        :param session: pytest session instance
+        :type session: Session
+        """
+        timings_path = session.config.option.test_timings_file
+        metrics_path = session.config.option.device_io_metrics_file
+        self._update_report()
+        if not get_xdist_worker_id(session.config):
+            # the controller gets the reports, with their metrics, of all workers
+            if timings_path:
+                self._test_timings.save(timings_path)
+            if metrics_path:
+                save_device_metrics(metrics_path, self._device_io_metrics)
+            if is_xdist_controller(session.config):
+                # the devices are deployed by the workers
+                self._report.workers = self._worker_summaries
+            self._run_recorder.write_session(self._report.as_dict())
+            self._run_recorder.close()
+            self._report.complete = True
+            self._save_report()
+            self._report_file.close()
+        worker_output = getattr(session.config, "workeroutput", None)
+        if worker_output is None:
+            return
+        worker_output[WORKER_OUTPUT_KEY] = json.dumps(
+            {
+                "worker": get_xdist_worker_id(session.config),
+                "board_name": session.config.option.board_name,
+                "setup": self._report.setup.status,
+                "teardown": self._report.teardown.status,
+                "devices": self._report.devices or {},
+                "deployment_profile": self._report.deployment_profile or {},
+            },
+            default=repr,
+        )
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node: WorkerController, error: object) -> None:
+        """Collect the boardfarm summary of a finished xdist worker.
+
+        :param node: xdist worker
+        :type node: WorkerController
+        :param error: worker error, if it crashed
+        :type error: object
+        """
+        worker_output = getattr(node, "workeroutput", {})
+        if WORKER_OUTPUT_KEY in worker_output:
+            self._worker_summaries.append(json.loads(worker_output[WORKER_OUTPUT_KEY]))
+        elif error:
+            self._worker_summaries.append(
+                {"worker": node.gateway.id, "setup": f"worker crashed - {error}"},
+            )
 
     @pytest.hookimpl(optionalhook=True)
     def pytest_html_results_summary(self, postfix: list[str]) -> None:
@@ -262,16 +1333,28 @@ class BoardfarmPlugin:
         :param postfix: html report postfix content list
         :type postfix: list[str]
         """
+        self._update_report()
         postfix.extend(
             [
                 "<h3>Boardfarm</h3>",
-                get_boardfarm_html_table_report(
-                    self._session_config,
-                    self.device_manager,
-                    self.boardfarm_config,
-                    self._deployment_setup_data,
-                    self._deployment_teardown_data,
+                (
+                    get_boardfarm_workers_html_table_report(self._worker_summaries)
+                    if is_xdist_controller(self._session_config)
+                    else get_boardfarm_html_table_report(
+                        self._session_config,
+                        self._report,
+                    )
                 ),
                 "<br>",
             ],
         )
+        if self._device_io_metrics:
+            postfix.extend(
+                [
+                    "<h3>Device I/O</h3>",
+                    get_device_io_html_table_report(
+                        get_total_metrics(self._device_io_metrics),
+                    ),
+                    "<br>",
+                ],
+            )
@@ -0,0 +1,23 @@
+"""pytest boardfarm hook specifications."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pytest_boardfarm3.lib.session_pool import SessionPools
+
+# pylint: disable=unused-argument  # the hooks are implemented by the plugins
+
+
+def pytest_boardfarm_session_pools(pools: SessionPools) -> None:  # noqa: ARG001
+    """Register the pools of device sessions handed out to the tests.
+
+    Called once the devices are deployed, or reattached to, before the
+    tests run. The sessions of the pools are then opened in background
+    threads, alongside the first tests using the same devices, and the tests
+    get them with the device_sessions fixture.
+
+    :param pools: session pools of the deployed devices
+    :type pools: SessionPools
+    """
@@ -9,13 +9,16 @@ from _pytest.config.argparsing import OptionGroup, Parser
 class _OptionGroup:
     """Argument parser option group."""
 
-    def __init__(self, group: OptionGroup):
+    def __init__(self, group: OptionGroup, dests: list[str]):
         """Initialize option group.
 
         :param group: argument group
         :type group: OptionGroup
+        :param dests: names of the options added by boardfarm, updated
+        :type dests: List[str]
         """
         self._group = group
+        self._dests = dests
 
     def add_argument(self, *args: tuple, **kwargs: dict[str, Any]) -> None:
         """Add argument to option group.
@@ -26,6 +29,7 @@ class _OptionGroup:
         :type kwargs: Dict[str, Any]
         """
         self._group.addoption(*args, **kwargs)  # type: ignore[arg-type]
+        self._dests.append(self._group.options[-1].dest)
 
 
 class ArgumentParser:
@@ -33,7 +37,8 @@ class ArgumentParser:
 
     Pytest is using a different method to add command line arguments.
     Boardfarm is using the standard argparser library. This wrapper
-    converts boardfarm add arguments to pytest add argument way.
+    converts boardfarm add arguments to pytest add argument way, and keeps
+    the names of the added options.
     """
 
     def __init__(self, parser: Parser) -> None:
@@ -44,6 +49,7 @@ class ArgumentParser:
         """
         self._parser = parser
         self._group = parser.getgroup("boardfarm", "boardfarm")
+        self.dests: list[str] = []
 
     def add_argument_group(  # pylint: disable-next=unused-argument
         self,
@@ -64,7 +70,7 @@ class ArgumentParser:
         """
         group_name = f"boardfarm-{name}"
         group = self._parser.getgroup(group_name, group_name)
-        return _OptionGroup(group)
+        return _OptionGroup(group, self.dests)
 
     def add_argument(self, *args: tuple, **kwargs: dict[str, Any]) -> None:
         """Add argument to argument parser.
@@ -75,3 +81,4 @@ class ArgumentParser:
         :type kwargs: Dict[str, Any]
         """
         self._group.addoption(*args, **kwargs)  # type: ignore[arg-type]
+        self.dests.append(self._group.options[-1].dest)
@@ -0,0 +1,83 @@
+"""Circuit breaker failing the remaining tests once the testbed is broken."""
+
+from __future__ import annotations
+
+import logging
+
+import pexpect
+from boardfarm3.exceptions import (
+    ContingencyCheckError,
+    DeviceBootFailure,
+    DeviceConnectionError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# errors of the devices rather than of the tests, e.g. a dead console
+DEVICE_ERRORS = (
+    ContingencyCheckError,
+    DeviceBootFailure,
+    DeviceConnectionError,
+    pexpect.EOF,
+    pexpect.TIMEOUT,
+)
+
+
+class CircuitBreaker:
+    """Circuit breaker of a session, tripped when the devices are unusable.
+
+    The breaker is tripped by a failed deployment, or by a number of
+    consecutive tests failing with a device error. Once tripped, the
+    remaining tests are failed right away with the root cause, instead of
+    each waiting for its own timeouts against the dead devices.
+    """
+
+    def __init__(self, max_device_errors: int) -> None:
+        """Initialize circuit breaker.
+
+        :param max_device_errors: number of consecutive tests failing with a
+            device error tripping the breaker
+        :type max_device_errors: int
+        """
+        self._max_device_errors = max_device_errors
+        self._device_errors: list[str] = []
+        self._test_device_error: str | None = None
+        self.reason: str | None = None
+
+    def trip(self, reason: str) -> None:
+        """Trip the breaker, unless it is already tripped.
+
+        :param reason: root cause, reported by the remaining tests
+        :type reason: str
+        """
+        if self.reason is not None:
+            return
+        _LOGGER.error("Failing the remaining tests: %s", reason)
+        self.reason = reason
+
+    def add_device_error(self, nodeid: str, error: BaseException) -> None:
+        """Add the device error of a test phase, only the first one is kept.
+
+        :param nodeid: test node id
+        :type nodeid: str
+        :param error: device error raised by the test phase
+        :type error: BaseException
+        """
+        if self._test_device_error is None:
+            # the pexpect errors repeat the whole session state
+            self._test_device_error = f"{nodeid} - {type(error).__name__}"
+            if not isinstance(error, (pexpect.EOF, pexpect.TIMEOUT)):
+                self._test_device_error += f"({str(error)!r})"
+
+    def end_test(self) -> None:
+        """Count the test if it had a device error, and trip the breaker."""
+        if self._test_device_error is None:
+            self._device_errors = []
+            return
+        self._device_errors.append(self._test_device_error)
+        self._test_device_error = None
+        if len(self._device_errors) >= self._max_device_errors:
+            self.trip(
+                f"{len(self._device_errors)} consecutive tests failed with a"
+                f" device error: {'; '.join(self._device_errors)}",
+            )
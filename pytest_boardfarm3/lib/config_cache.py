@@ -0,0 +1,123 @@
+"""Cache of the boardfarm config parsed in previous sessions."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import pickle
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from _pytest.cacheprovider import Cache
+    from boardfarm3.lib.boardfarm_config import BoardfarmConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+_FILE_HASHES_CACHE_KEY = "boardfarm/config_file_hashes"
+_MAX_CACHED_CONFIGS = 8
+
+
+class BoardfarmConfigCache:
+    """Cache of the boardfarm config parsed from the inventory and env configs.
+
+    The parsed configs are saved in the pytest cache directory, keyed by a
+    hash of everything given to boardfarm_parse_config hook. The env config
+    file is hashed again only when its size or modification time changed.
+    """
+
+    def __init__(self, cache: Cache) -> None:
+        """Initialize boardfarm config cache.
+
+        :param cache: pytest cache
+        :type cache: Cache
+        """
+        self._cache = cache
+        self._cache_dir = cache.mkdir("boardfarm_config")
+
+    def _get_file_hash(self, file_path: str) -> str:
+        path = Path(file_path).resolve()
+        stat = path.stat()
+        file_hashes: dict[str, dict] = self._cache.get(_FILE_HASHES_CACHE_KEY, {})
+        file_hash = file_hashes.get(str(path), {})
+        if file_hash.get("size") != stat.st_size or (
+            file_hash.get("mtime_ns") != stat.st_mtime_ns
+        ):
+            file_hash = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+            }
+            file_hashes[str(path)] = file_hash
+            self._cache.set(_FILE_HASHES_CACHE_KEY, file_hashes)
+        return file_hash["sha256"]
+
+    def get_key(
+        self,
+        env_config_path: str,
+        inventory_config: dict[str, Any],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> str | None:
+        """Get cache key of a parsed config.
+
+        :param env_config_path: environment config file path
+        :type env_config_path: str
+        :param inventory_config: reserved inventory config
+        :type inventory_config: dict[str, Any]
+        :param kwargs: other inputs of the config parsing
+        :type kwargs: Any
+        :return: cache key, None when the env config is not a local file
+        :rtype: str | None
+        """
+        if env_config_path.startswith(("http://", "https://")):
+            return None
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "env_config": self._get_file_hash(env_config_path),
+                    "inventory_config": inventory_config,
+                    **kwargs,
+                },
+                sort_keys=True,
+                default=repr,
+            ).encode("utf-8"),
+        ).hexdigest()
+
+    def load(self, key: str) -> BoardfarmConfig | None:
+        """Load a parsed config from the cache.
+
+        :param key: cache key
+        :type key: str
+        :return: parsed boardfarm config, None if not in cache
+        :rtype: BoardfarmConfig | None
+        """
+        config_path = self._cache_dir / f"{key}.pickle"
+        if not config_path.is_file():
+            return None
+        try:
+            # the cache directory is only written by this plugin
+            config: BoardfarmConfig = pickle.loads(config_path.read_bytes())  # noqa: S301
+        except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+            _LOGGER.warning("Ignoring unreadable cached config %s", config_path)
+            return None
+        config_path.touch()
+        _LOGGER.debug("Boardfarm config loaded from %s", config_path)
+        return config
+
+    def save(self, key: str, config: BoardfarmConfig) -> None:
+        """Save a parsed config in the cache, pruning the least recently used.
+
+        :param key: cache key
+        :type key: str
+        :param config: parsed boardfarm config
+        :type config: BoardfarmConfig
+        """
+        (self._cache_dir / f"{key}.pickle").write_bytes(pickle.dumps(config))
+        cached_configs = sorted(
+            self._cache_dir.glob("*.pickle"),
+            key=lambda path: path.stat().st_mtime_ns,
+            reverse=True,
+        )
+        for config_path in cached_configs[_MAX_CACHED_CONFIGS:]:
+            config_path.unlink(missing_ok=True)
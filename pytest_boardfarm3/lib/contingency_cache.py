@@ -0,0 +1,116 @@
+"""Cache of the contingency checks passed by the devices."""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from pytest_boardfarm3.lib.utils import get_env_req_key
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Sequence
+
+    from pluggy import HookImpl, PluginManager
+
+_LOGGER = logging.getLogger(__name__)
+
+# hooks (re)booting the devices, their state is unknown afterwards
+DEVICE_BOOT_HOOKS = (
+    "boardfarm_server_boot",
+    "boardfarm_device_boot",
+    "boardfarm_attached_device_boot",
+)
+
+
+class ContingencyCheckCache:
+    """Cache of the last environment request verified by contingency_check hook.
+
+    A contingency check may reconfigure the devices for the requested
+    environment, hence only the last verified request is known to be still
+    met. It is forgotten whenever the state of the devices is uncertain,
+    e.g. after a failed test or a test rebooting a device.
+    """
+
+    def __init__(self) -> None:
+        """Initialize contingency check cache."""
+        self._verified_key: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def is_verified(self, env_req: dict[str, Any]) -> bool:
+        """Check whether the environment request was the last one verified.
+
+        :param env_req: test environment request
+        :type env_req: dict[str, Any]
+        :return: True if the contingency check can be skipped, otherwise False
+        :rtype: bool
+        """
+        if self._verified_key is not None and (
+            self._verified_key == get_env_req_key(env_req)
+        ):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def set_verified(self, env_req: dict[str, Any]) -> None:
+        """Save the environment request verified by the contingency check.
+
+        :param env_req: test environment request
+        :type env_req: dict[str, Any]
+        """
+        self._verified_key = get_env_req_key(env_req)
+
+    def invalidate(self, reason: str) -> None:
+        """Forget the last verified environment request.
+
+        :param reason: reason of the invalidation, for debugging
+        :type reason: str
+        """
+        if self._verified_key is None:
+            return
+        _LOGGER.debug("Contingency check cache invalidated: %s", reason)
+        self._verified_key = None
+        self.invalidations += 1
+
+    @contextmanager
+    def invalidate_on_boot(self, plugin_manager: PluginManager) -> Generator[None]:
+        """Invalidate the cache whenever a boot hook of a device is called.
+
+        A single request is cached for all the devices, hence the boot of any
+        device invalidates it.
+
+        :param plugin_manager: boardfarm plugin manager
+        :type plugin_manager: PluginManager
+        :yield: None
+        """
+
+        def _invalidate(
+            hook_name: str, hook_impls: Sequence[HookImpl], *_: object
+        ) -> None:
+            if hook_name.removesuffix("_async") in DEVICE_BOOT_HOOKS:
+                device_names = [hook_impl.plugin_name for hook_impl in hook_impls]
+                self.invalidate(f"{hook_name} called for {device_names}")
+
+        undo_monitoring = plugin_manager.add_hookcall_monitoring(
+            _invalidate,
+            lambda *_: None,
+        )
+        try:
+            yield
+        finally:
+            undo_monitoring()
+
+    def as_dict(self) -> dict[str, int]:
+        """Get contingency check cache counters as dictionary.
+
+        :return: number of cache hits, misses and invalidations
+        :rtype: dict[str, int]
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
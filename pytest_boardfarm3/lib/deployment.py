@@ -0,0 +1,231 @@
+"""Concurrent boardfarm environment setup."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import TYPE_CHECKING, Any
+
+from boardfarm3.plugins.setup_environment import boardfarm_setup_env
+from pluggy import HookCallError
+
+if TYPE_CHECKING:
+    from argparse import Namespace
+    from collections.abc import Generator
+
+    from boardfarm3.lib.boardfarm_config import BoardfarmConfig
+    from boardfarm3.lib.device_manager import DeviceManager
+    from pluggy import HookImpl, PluginManager
+
+    from pytest_boardfarm3.lib.deployment_profile import DeploymentProfile
+
+_LOGGER = logging.getLogger(__name__)
+
+# same order as the boardfarm_setup_env hook of boardfarm
+SETUP_ENV_HOOKS = (
+    "validate_device_requirements",
+    "boardfarm_server_boot",
+    "boardfarm_server_configure",
+    "boardfarm_device_boot",
+    "boardfarm_device_configure",
+    "boardfarm_attached_device_boot",
+    "boardfarm_attached_device_configure",
+)
+SKIP_BOOT_HOOKS = ("boardfarm_skip_boot",)
+
+
+def is_setup_env_overridden(plugin_manager: PluginManager) -> bool:
+    """Check if a plugin implements or wraps the boardfarm_setup_env hook.
+
+    The stages of the deployment are only run by the plugin when the
+    boardfarm implementation is the only one.
+
+    :param plugin_manager: plugin manager
+    :type plugin_manager: PluginManager
+    :return: True when another implementation of the hook is registered
+    :rtype: bool
+    """
+    return any(
+        hook_impl.function is not boardfarm_setup_env
+        for hook_impl in plugin_manager.hook.boardfarm_setup_env.get_hookimpls()
+    )
+
+
+@contextmanager
+def measure_setup_env_stages(
+    plugin_manager: PluginManager,
+    profile: DeploymentProfile,
+) -> Generator[None]:
+    """Measure the stages of a boardfarm_setup_env hook call.
+
+    The stages run one after the other, so a stage lasts until the hooks of
+    the next one are called, or until the end of boardfarm_setup_env.
+
+    :param plugin_manager: plugin manager
+    :type plugin_manager: PluginManager
+    :param profile: deployment profile the stages are added to
+    :type profile: DeploymentProfile
+    :yield: None
+    """
+    stages = ExitStack()
+    started_stages: list[str] = []
+
+    def _start_stage(hook_name: str, *_: object) -> None:
+        stage_name = hook_name.removesuffix("_async")
+        if stage_name in SETUP_ENV_HOOKS + SKIP_BOOT_HOOKS and (
+            stage_name not in started_stages
+        ):
+            stages.close()
+            started_stages.append(stage_name)
+            stages.enter_context(profile.measure(stage_name, "setup"))
+
+    undo_monitoring = plugin_manager.add_hookcall_monitoring(
+        _start_stage,
+        lambda *_: None,
+    )
+    try:
+        with stages:
+            yield
+    finally:
+        undo_monitoring()
+
+
+def _get_hook_impls(plugin_manager: PluginManager, hook_name: str) -> list[HookImpl]:
+    hook_caller = getattr(plugin_manager.hook, hook_name, None)
+    # pluggy calls the last registered implementations first
+    return [] if hook_caller is None else hook_caller.get_hookimpls()[::-1]
+
+
+def _get_hook_args(hook_impl: HookImpl, hook_kwargs: dict[str, Any]) -> list[Any]:
+    try:
+        return [hook_kwargs[arg_name] for arg_name in hook_impl.argnames]
+    except KeyError as exception:
+        err_msg = f"hook call must provide argument {exception.args[0]!r}"
+        raise HookCallError(err_msg) from exception
+
+
+def _get_hook_impls_tiers(
+    plugin_manager: PluginManager,
+    hook_name: str,
+) -> list[list[HookImpl]]:
+    hook_impls = {
+        hook_impl.plugin_name: hook_impl
+        for hook_impl in _get_hook_impls(plugin_manager, hook_name)
+    }
+    # prefer the non-blocking implementation of a plugin when available
+    hook_impls.update(
+        {
+            hook_impl.plugin_name: hook_impl
+            for hook_impl in _get_hook_impls(plugin_manager, f"{hook_name}_async")
+        },
+    )
+    # the tryfirst implementations are done before the others start, and the
+    # trylast ones start once the others are done, as called by pluggy
+    tiers: dict[int, list[HookImpl]] = {0: [], 1: [], 2: []}
+    for hook_impl in hook_impls.values():
+        tiers[0 if hook_impl.tryfirst else 2 if hook_impl.trylast else 1].append(
+            hook_impl,
+        )
+    return [tier for tier in tiers.values() if tier]
+
+
+async def _run_hook_impl(
+    hook_name: str,
+    hook_impl: HookImpl,
+    hook_kwargs: dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    durations: dict[str, dict[str, float]],
+) -> None:
+    args = _get_hook_args(hook_impl, hook_kwargs)
+    async with semaphore:
+        start_time = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(hook_impl.function):
+                await hook_impl.function(*args)
+            else:
+                await asyncio.to_thread(hook_impl.function, *args)
+        finally:
+            elapsed = time.monotonic() - start_time
+            durations.setdefault(hook_impl.plugin_name, {})[hook_name] = elapsed
+            _LOGGER.debug(
+                "%s of %s ran for %ss.",
+                hook_name,
+                hook_impl.plugin_name,
+                elapsed,
+            )
+
+
+async def _run_hook_concurrently(
+    hook_name: str,
+    plugin_manager: PluginManager,
+    hook_kwargs: dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    durations: dict[str, dict[str, float]],
+) -> None:
+    tiers = _get_hook_impls_tiers(plugin_manager, hook_name)
+    if any(impl.hookwrapper or impl.wrapper for tier in tiers for impl in tier):
+        _LOGGER.debug("%s has hook wrappers, running it sequentially.", hook_name)
+        getattr(plugin_manager.hook, hook_name)(**hook_kwargs)
+        return
+    for tier in tiers:
+        results = await asyncio.gather(
+            *(
+                _run_hook_impl(hook_name, hook_impl, hook_kwargs, semaphore, durations)
+                for hook_impl in tier
+            ),
+            return_exceptions=True,
+        )
+        # wait for all the devices of a tier, then report the first failure
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+
+async def setup_env_concurrently(  # noqa: PLR0913
+    *,
+    plugin_manager: PluginManager,
+    config: BoardfarmConfig,
+    cmdline_args: Namespace,
+    device_manager: DeviceManager,
+    concurrency: int,
+    durations: dict[str, dict[str, float]],
+    profile: DeploymentProfile | None = None,
+) -> DeviceManager:
+    """Boot and configure the registered devices concurrently.
+
+    The devices are deployed in the same stages as boardfarm_setup_env hook,
+    but within a stage every device hook implementation runs concurrently,
+    except the tryfirst and trylast ones which run before and after the
+    others. Asynchronous implementations are awaited, blocking ones are run
+    in a thread. At most ``concurrency`` device hooks are running at any time.
+    Only used when boardfarm_setup_env is not overridden by another plugin.
+
+    :param plugin_manager: plugin manager
+    :param config: boardfarm config
+    :param cmdline_args: command line arguments
+    :param device_manager: device manager with all registered devices
+    :param concurrency: maximum number of device hooks running concurrently
+    :param durations: dictionary to save the duration of each hook per device
+    :param profile: deployment profile to measure each stage, defaults to None
+    :return: device manager with all devices environment setup
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    hook_kwargs = {
+        "config": config,
+        "cmdline_args": cmdline_args,
+        "device_manager": device_manager,
+    }
+    for hook_name in SKIP_BOOT_HOOKS if cmdline_args.skip_boot else SETUP_ENV_HOOKS:
+        start_time = time.monotonic()
+        with profile.measure(hook_name, "setup") if profile else nullcontext():
+            await _run_hook_concurrently(
+                hook_name,
+                plugin_manager,
+                hook_kwargs,
+                semaphore,
+                durations,
+            )
+        _LOGGER.debug("%s ran for %ss.", hook_name, time.monotonic() - start_time)
+    return device_manager
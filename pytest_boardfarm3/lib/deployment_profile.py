@@ -0,0 +1,97 @@
+"""Boardfarm deployment timing profile."""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+
+class DeploymentProfile:
+    """Timing profile of the boardfarm hooks invoked by the plugin.
+
+    The hooks of a session run one after the other, except the device hooks
+    of a deployment stage which may run concurrently. Hence the critical path
+    of a deployment is made of every hook, with the slowest device of each
+    concurrent stage.
+    """
+
+    def __init__(self) -> None:
+        """Initialize deployment profile."""
+        self._start_time = time.monotonic()
+        self._phases: list[dict[str, Any]] = []
+
+    @contextmanager
+    def measure(self, name: str, stage: str) -> Generator[None]:
+        """Measure the duration of a boardfarm hook call.
+
+        :param name: boardfarm hook name
+        :param stage: plugin stage invoking the hook, e.g. setup or teardown
+        :yield: None
+        """
+        phase: dict[str, Any] = {
+            "name": name,
+            "stage": stage,
+            "start": time.monotonic() - self._start_time,
+            "duration": None,
+            "status": "failed",
+        }
+        self._phases.append(phase)
+        try:
+            yield
+            phase["status"] = "success"
+        finally:
+            phase["duration"] = time.monotonic() - self._start_time - phase["start"]
+
+    def as_dict(
+        self,
+        device_durations: dict[str, dict[str, float]] | None = None,
+    ) -> dict[str, Any]:
+        """Get deployment profile as dictionary.
+
+        :param device_durations: deployment hook durations in seconds per device
+        :return: deployment profile with its critical path
+        """
+        critical_path = []
+        for phase in self._phases:
+            critical_phase = {"name": phase["name"], "duration": phase["duration"]}
+            slowest_devices = sorted(
+                (
+                    (durations[phase["name"]], device_name)
+                    for device_name, durations in (device_durations or {}).items()
+                    if phase["name"] in durations
+                ),
+                reverse=True,
+            )
+            if slowest_devices:
+                critical_phase["device"] = slowest_devices[0][1]
+                critical_phase["device_duration"] = slowest_devices[0][0]
+            critical_path.append(critical_phase)
+        return {
+            "total_duration": sum(phase["duration"] or 0 for phase in self._phases),
+            "phases": self._phases,
+            "critical_path": critical_path,
+            "device_durations": device_durations or {},
+        }
+
+    def save(
+        self,
+        path: str,
+        device_durations: dict[str, dict[str, float]] | None = None,
+    ) -> None:
+        """Save deployment profile as json file.
+
+        :param path: json file path
+        :param device_durations: deployment hook durations in seconds per device
+        """
+        profile_path = Path(path)
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profile_path.write_text(
+            json.dumps(self.as_dict(device_durations), indent=4),
+            encoding="utf-8",
+        )
@@ -0,0 +1,191 @@
+"""Console and SSH I/O metrics of the boardfarm devices."""
+
+from __future__ import annotations
+
+import functools
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from boardfarm3.devices.base_devices import BoardfarmDevice
+from boardfarm3.lib.boardfarm_pexpect import BoardfarmPexpect
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from boardfarm3.lib.device_manager import DeviceManager
+
+# attribute set on the instrumented connections, with their device name
+_DEVICE_NAME_ATTRIBUTE = "_boardfarm_io_device_name"
+# connections are searched in the device attributes, and in their attributes
+_CONNECTION_SEARCH_DEPTH = 2
+
+
+def _get_connections(obj: Any, depth: int) -> Iterator[BoardfarmPexpect]:  # noqa: ANN401
+    for value in list(getattr(obj, "__dict__", {}).values()):
+        if isinstance(value, BoardfarmPexpect):
+            yield value
+        elif depth > 1 and not isinstance(value, (type, BoardfarmDevice)):
+            yield from _get_connections(value, depth - 1)
+
+
+def _get_size(data: str | bytes) -> int:
+    return len(data.encode("utf-8", "ignore") if isinstance(data, str) else data)
+
+
+class DeviceIOMonitor:
+    """Monitor of the I/O of the device connections, e.g. console or SSH.
+
+    The pexpect sessions found in the devices (and their direct components)
+    are instrumented in place to count the bytes sent and received, and the
+    number and round-trip time of the executed commands. The counters are
+    reset before each test, so that they show the I/O driven by that test.
+    """
+
+    def __init__(self) -> None:
+        """Initialize device I/O monitor."""
+        self._metrics: dict[str, dict[str, float]] = {}
+
+    def _get_device_metrics(self, device_name: str) -> dict[str, float]:
+        return self._metrics.setdefault(
+            device_name,
+            {
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "commands": 0,
+                "command_time": 0.0,
+                "max_command_time": 0.0,
+            },
+        )
+
+    def _add_command(self, device_name: str, start_time: float) -> None:
+        elapsed = time.monotonic() - start_time
+        metrics = self._get_device_metrics(device_name)
+        metrics["commands"] += 1
+        metrics["command_time"] += elapsed
+        metrics["max_command_time"] = max(metrics["max_command_time"], elapsed)
+
+    def _wrap_log(self, device_name: str, log: Callable) -> Callable:
+        @functools.wraps(log)
+        def wrapper(data: str | bytes, direction: str) -> None:
+            field = "bytes_sent" if direction == "send" else "bytes_received"
+            self._get_device_metrics(device_name)[field] += _get_size(data)
+            log(data, direction)
+
+        return wrapper
+
+    def _wrap_execute_command(self, device_name: str, execute: Callable) -> Callable:
+        @functools.wraps(execute)
+        def wrapper(*args: Any, **kwargs: Any) -> str:  # noqa: ANN401
+            start_time = time.monotonic()
+            try:
+                return execute(*args, **kwargs)
+            finally:
+                self._add_command(device_name, start_time)
+
+        return wrapper
+
+    def _wrap_execute_command_async(
+        self,
+        device_name: str,
+        execute: Callable,
+    ) -> Callable:
+        @functools.wraps(execute)
+        async def wrapper(*args: Any, **kwargs: Any) -> str:  # noqa: ANN401
+            start_time = time.monotonic()
+            try:
+                return await execute(*args, **kwargs)
+            finally:
+                self._add_command(device_name, start_time)
+
+        return wrapper
+
+    def _instrument_connection(
+        self,
+        device_name: str,
+        connection: BoardfarmPexpect,
+    ) -> None:
+        # pexpect logs everything sent and read, in the sync and async APIs
+        connection._log = self._wrap_log(device_name, connection._log)  # type: ignore[method-assign]  # noqa: SLF001  # pylint: disable=protected-access
+        connection.execute_command = self._wrap_execute_command(  # type: ignore[method-assign]
+            device_name,
+            connection.execute_command,
+        )
+        if hasattr(connection, "execute_command_async"):
+            connection.execute_command_async = self._wrap_execute_command_async(
+                device_name,
+                connection.execute_command_async,
+            )
+        setattr(connection, _DEVICE_NAME_ATTRIBUTE, device_name)
+
+    def instrument(self, device_manager: DeviceManager) -> None:
+        """Instrument the connections of the devices not instrumented yet.
+
+        Devices may open new connections at any time, e.g. on reconnection,
+        hence this is called before each test.
+
+        :param device_manager: device manager with the deployed devices
+        :type device_manager: DeviceManager
+        """
+        for device_name, device in device_manager.get_devices_by_type(
+            BoardfarmDevice,
+        ).items():
+            for connection in _get_connections(device, _CONNECTION_SEARCH_DEPTH):
+                if not hasattr(connection, _DEVICE_NAME_ATTRIBUTE):
+                    self._instrument_connection(device_name, connection)
+
+    def reset(self) -> None:
+        """Reset the I/O counters of all devices."""
+        self._metrics = {}
+
+    def get_metrics(self) -> dict[str, dict[str, float]]:
+        """Get the I/O counters of the devices used since the last reset.
+
+        :return: I/O counters per device name
+        :rtype: dict[str, dict[str, float]]
+        """
+        return {name: dict(metrics) for name, metrics in self._metrics.items()}
+
+
+def get_total_metrics(
+    tests_metrics: dict[str, dict[str, dict[str, float]]],
+) -> dict[str, dict[str, float]]:
+    """Get the I/O counters of each device summed over all tests.
+
+    :param tests_metrics: I/O counters per device name of each test
+    :type tests_metrics: dict[str, dict[str, dict[str, float]]]
+    :return: I/O counters per device name
+    :rtype: dict[str, dict[str, float]]
+    """
+    totals: dict[str, dict[str, float]] = {}
+    for devices_metrics in tests_metrics.values():
+        for device_name, metrics in devices_metrics.items():
+            total = totals.setdefault(device_name, dict.fromkeys(metrics, 0))
+            for field, value in metrics.items():
+                total[field] = (
+                    max(total[field], value)
+                    if field.startswith("max_")
+                    else total[field] + value
+                )
+    return totals
+
+
+def save_device_metrics(
+    path: str,
+    tests_metrics: dict[str, dict[str, dict[str, float]]],
+) -> None:
+    """Save the device I/O counters of the tests as a json lines file.
+
+    :param path: json lines file path
+    :type path: str
+    :param tests_metrics: I/O counters per device name of each test
+    :type tests_metrics: dict[str, dict[str, dict[str, float]]]
+    """
+    metrics_path = Path(path)
+    metrics_path.parent.mkdir(parents=True, exist_ok=True)
+    with metrics_path.open("w", encoding="utf-8") as metrics_file:
+        for nodeid, devices_metrics in tests_metrics.items():
+            metrics_file.write(
+                json.dumps({"nodeid": nodeid, "devices": devices_metrics}) + "\n",
+            )
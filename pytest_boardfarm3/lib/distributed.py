@@ -0,0 +1,98 @@
+"""Boardfarm support of pytest-xdist distributed test execution."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING, Any
+
+from pytest_boardfarm3.exceptions import BoardfarmPluginError
+from pytest_boardfarm3.lib.utils import get_env_req_key
+
+if TYPE_CHECKING:
+    from pytest import Config  # noqa: PT013
+
+WORKER_OUTPUT_KEY = "boardfarm"
+
+
+def is_xdist_controller(session_config: Config) -> bool:
+    """Check whether this process distributes the tests to xdist workers.
+
+    The controller does not run any test, hence it does not reserve a board.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :return: True if this process is the xdist controller, otherwise False
+    :rtype: bool
+    """
+    return session_config.pluginmanager.has_plugin("dsession")
+
+
+def get_xdist_worker_id(session_config: Config) -> str | None:
+    """Get xdist worker id of this process.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :return: worker id, e.g. gw0, None when not running as a xdist worker
+    :rtype: str | None
+    """
+    worker_input = getattr(session_config, "workerinput", None)
+    return None if worker_input is None else worker_input["workerid"]
+
+
+def get_xdist_workers_count(session_config: Config) -> int:
+    """Get the number of xdist workers started by this process.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :return: number of workers, 0 when the tests are not distributed
+    :rtype: int
+    """
+    if getattr(session_config.option, "dist", "no") == "no" or (
+        get_xdist_worker_id(session_config)
+    ):
+        return 0
+    workers_count = 0
+    # same as the --tx specifications of xdist, e.g. 4*popen
+    for tx_spec in getattr(session_config.option, "tx", None) or []:
+        count, _, spec = tx_spec.partition("*")
+        workers_count += int(count) if spec and count.isdigit() else 1
+    return workers_count
+
+
+def get_env_req_group(env_req: Any) -> str:  # noqa: ANN401
+    """Get the xdist group of the tests requesting an environment.
+
+    With --dist loadgroup, xdist runs the tests of a group on the same worker.
+
+    :param env_req: test environment request
+    :type env_req: Any
+    :return: xdist group name
+    :rtype: str
+    """
+    env_req_hash = hashlib.sha256(get_env_req_key(env_req).encode("utf-8"))
+    return f"env_req-{env_req_hash.hexdigest()[:12]}"
+
+
+def get_worker_board_name(session_config: Config) -> str:
+    """Get the board of the board pool assigned to this xdist worker.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :raises BoardfarmPluginError: when there are more workers than boards
+    :return: board name of this worker
+    :rtype: str
+    """
+    board_pool = [
+        board_name.strip()
+        for board_name in session_config.option.board_pool.split(",")
+        if board_name.strip()
+    ]
+    worker_id = get_xdist_worker_id(session_config)
+    worker_index = int(worker_id.removeprefix("gw"))
+    if worker_index >= len(board_pool):
+        err_msg = (
+            f"No board available in --board-pool for xdist worker {worker_id},"
+            f" run at most {len(board_pool)} workers"
+        )
+        raise BoardfarmPluginError(err_msg)
+    return board_pool[worker_index]
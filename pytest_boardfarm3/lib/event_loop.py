@@ -0,0 +1,82 @@
+"""Event loop shared by the boardfarm deployment, tests and release."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import warnings
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _get_set_event_loop() -> asyncio.AbstractEventLoop | None:
+    # the event loop set for the thread, None when none is set; without a
+    # set loop, the main thread of older Python versions gets a new one, as
+    # any other caller of asyncio.get_event_loop() would get
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            return asyncio.get_event_loop()
+        except RuntimeError:
+            return None
+
+
+def new_session_event_loop() -> (
+    tuple[
+        asyncio.AbstractEventLoop,
+        asyncio.AbstractEventLoop | None,
+    ]
+):
+    """Create the event loop of a pytest session and make it the current one.
+
+    Async resources created by the devices during deployment, e.g. device
+    connections, are bound to this loop, hence they can be reused by the tests
+    and the release of the devices as long as they run on the same loop.
+
+    :return: session event loop, and the event loop which was the current one
+        before it, to be given to close_session_event_loop
+    :rtype: tuple[asyncio.AbstractEventLoop, asyncio.AbstractEventLoop | None]
+    """
+    previous_event_loop = _get_set_event_loop()
+    event_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(event_loop)
+    return event_loop, previous_event_loop
+
+
+def close_session_event_loop(
+    event_loop: asyncio.AbstractEventLoop,
+    previous_event_loop: asyncio.AbstractEventLoop | None,
+) -> None:
+    """Cancel the remaining tasks of the session event loop and close it.
+
+    The event loop which was the current one before the session event loop,
+    e.g. the one of another plugin, is the current one again.
+
+    :param event_loop: session event loop
+    :type event_loop: asyncio.AbstractEventLoop
+    :param previous_event_loop: event loop which was the current one before
+        the session event loop, as returned by new_session_event_loop
+    :type previous_event_loop: asyncio.AbstractEventLoop | None
+    """
+    if event_loop.is_closed():
+        return
+    try:
+        pending_tasks = asyncio.all_tasks(event_loop)
+        for task in pending_tasks:
+            task.cancel()
+        if pending_tasks:
+            _LOGGER.debug("Cancelling %s pending tasks.", len(pending_tasks))
+            event_loop.run_until_complete(
+                asyncio.gather(*pending_tasks, return_exceptions=True),
+            )
+        event_loop.run_until_complete(event_loop.shutdown_asyncgens())
+        event_loop.run_until_complete(event_loop.shutdown_default_executor())
+    finally:
+        # the loop set by another plugin in the meantime is left as is
+        if _get_set_event_loop() is event_loop:
+            asyncio.set_event_loop(
+                None
+                if previous_event_loop is None or previous_event_loop.is_closed()
+                else previous_event_loop,
+            )
+        event_loop.close()
@@ -1,47 +1,128 @@
 """Pytest execution html report."""
 
+from __future__ import annotations
+
+import gzip
+import html
 import json
-import traceback
+import os
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pytest import Config  # noqa: PT013
 
-from boardfarm3.devices.base_devices import BoardfarmDevice
-from boardfarm3.lib.boardfarm_config import BoardfarmConfig
-from boardfarm3.lib.device_manager import DeviceManager
-from boardfarm3.lib.utils import get_value_from_dict
-from pytest import Config  # noqa: PT013
+    from pytest_boardfarm3.lib.report_model import BoardfarmReport, StageReport
 
 _TD_CSS_STYLE = "border: 1px solid #E6E6E6; padding: 3px;"
 _BUTTON_CSS_STYLE = (
     "font-style: oblique; padding-left: 5px; color: #1A237E; cursor: pointer;"
 )
+# load the sidecar file of a log element on first display, in an iframe as
+# file:// reports cannot fetch files, gzip files are decompressed with fetch
+# when the report is served over HTTP, and linked otherwise
+_LAZY_LOAD_JAVASCRIPT = (
+    "var log = el.querySelector('.log'); "
+    "if (log && log.dataset.src) { "
+    "  var src = log.dataset.src; delete log.dataset.src; "
+    "  var link = document.createElement('a'); link.href = src; "
+    "  link.textContent = src; "
+    "  if (!src.endsWith('.gz')) { "
+    "    var frame = document.createElement('iframe'); frame.src = src; "
+    "    frame.style = 'width: 100%; height: 60vh; border: none;'; "
+    "    log.replaceChildren(frame); "
+    "  } else if (location.protocol == 'file:') { "
+    "    log.replaceChildren(link); "
+    "  } else { "
+    "    log.textContent = 'loading ' + src; "
+    "    fetch(src).then(function (r) { "
+    "      if (!r.ok) { throw new Error(r.statusText); } "
+    "      return new Response("
+    "        r.body.pipeThrough(new DecompressionStream('gzip'))).text(); "
+    "    }).then(function (text) { log.textContent = text; "
+    "    }).catch(function () { log.replaceChildren(link); }); "
+    "  } "
+    "} "
+)
 
 
-def _get_boardfarm_environment_details(
-    session_config: Config,
-    boardfarm_config: BoardfarmConfig,
-) -> dict[str, str]:
+def _get_boardfarm_environment_details(report: BoardfarmReport) -> dict[str, str]:
     """Get boardfarm environment details for html report.
 
-    :param session_config: pytest session config
-    :type session_config: Config
-    :param boardfarm_config: boardfarm config
-    :type boardfarm_config: BoardfarmConfig
+    :param report: boardfarm report of the session
+    :type report: BoardfarmReport
     :return: boardfarm environment details dictionary
     :rtype: dict[str, str]
     """
     return {
-        "Board name": session_config.option.board_name,
-        "Image name": get_value_from_dict("image_uri", boardfarm_config.env_config),
-        "Provision mode": get_value_from_dict(
-            "eRouter_Provisioning_mode",
-            boardfarm_config.env_config,
-        ),
+        "Board name": report.board_name,
+        "Image name": report.image,
+        "Provision mode": report.provisioning_mode,
     }
 
 
+def get_artifact_href(session_config: Config, artifact_path: str) -> str:
+    """Get link to a file saved along with the html report.
+
+    The link is relative to the html report directory, so the report and its
+    artifacts can be moved together.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :param artifact_path: path of the artifact file
+    :type artifact_path: str
+    :return: link to the artifact file
+    :rtype: str
+    """
+    html_path = getattr(session_config.option, "htmlpath", None)
+    if not html_path:
+        return Path(artifact_path).resolve().as_uri()
+    return Path(
+        os.path.relpath(
+            Path(artifact_path).resolve(),
+            Path(html_path).resolve().parent,
+        ),
+    ).as_posix()
+
+
+def _get_log_content(
+    session_config: Config,
+    name: str,
+    content: str,
+) -> tuple[str, str]:
+    """Get log element attributes and content, saving it in a sidecar if enabled.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :param name: sidecar file name, without extension
+    :type name: str
+    :param content: log element content
+    :type content: str
+    :return: log element extra attributes and its inline content
+    :rtype: tuple[str, str]
+    """
+    report_sidecars = getattr(session_config.option, "report_sidecars", "none")
+    html_path = getattr(session_config.option, "htmlpath", None)
+    # a self-contained report is a single file, without sidecars
+    self_contained = getattr(session_config.option, "self_contained_html", False)
+    if report_sidecars == "none" or not html_path or self_contained:
+        return "", content
+    sidecar_path = Path(html_path).parent / "boardfarm" / f"{name}.txt"
+    sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+    if report_sidecars == "gzip":
+        sidecar_path = sidecar_path.with_suffix(".txt.gz")
+        with gzip.open(sidecar_path, "wt", encoding="utf-8") as sidecar:
+            sidecar.write(content)
+    else:
+        sidecar_path.write_text(content, encoding="utf-8")
+    return f' data-src="{get_artifact_href(session_config, str(sidecar_path))}"', ""
+
+
 def _get_onclick_javascript(button_id: str, content_id: str, content_type: str) -> str:
     """Get onclick javascript to show and hide deployment logs.
 
+    Logs saved in a sidecar file are loaded the first time they are shown.
+
     :param button_id: html button element id
     :type button_id: str
     :param content_id: html content element id
@@ -53,6 +134,7 @@ def _get_onclick_javascript(button_id: str, content_id: str, content_type: str)
     """
     return (
         f"var el = getElementById({content_id!r}); "
+        f"{_LAZY_LOAD_JAVASCRIPT}"
         "if (el.style.display=='none') { "
         "  el.style.display=''; "
         f"  getElementById({button_id!r}).innerHTML='hide {content_type}'"
@@ -63,22 +145,38 @@ def _get_onclick_javascript(button_id: str, content_id: str, content_type: str)
     )
 
 
-def _get_boardfarm_deployment_status(stage: str, stage_logs: dict) -> list[str]:
+def _get_boardfarm_deployment_status(
+    session_config: Config,
+    stage: str,
+    stage_report: StageReport,
+    log_file_href: str | None = None,
+) -> list[str]:
     """Get boardfarm deployment status html table content.
 
+    The logs of a failed stage are always inlined, as they are shown right away.
+
+    :param session_config: pytest session config
+    :type session_config: Config
     :param stage: deployment stage name
     :type stage: str
-    :param stage_logs: captured deployment logs
-    :type stage_logs: dict
+    :param stage_report: deployment stage report
+    :type stage_report: StageReport
+    :param log_file_href: link to the complete logs file, defaults to None
+    :type log_file_href: str | None
     :return: html table row's with given deployment stage status
     :rtype: list[str]
     """
-    console_logs = stage_logs.get("logs", "")
-    if "exception" in stage_logs:
+    console_logs = stage_report.logs
+    if stage_report.dropped_lines:
+        console_logs = (
+            f"... {stage_report.dropped_lines} lines truncated, see full logs ...\n"
+            f"{console_logs}"
+        )
+    if stage_report.failed:
         logs_toggle_button = "hide logs"
         deployment_stage_css_style = "color: red;"
-        deployment_stage_status = f"Failed - {stage_logs['exception'][1]!r}"
-        console_logs += "".join(traceback.format_tb(stage_logs["exception"][2]))
+        deployment_stage_status = f"F{stage_report.status[1:]}"
+        console_logs += stage_report.traceback
     else:
         logs_toggle_button = "view logs"
         deployment_stage_status = "Success"
@@ -92,7 +190,20 @@ def _get_boardfarm_deployment_status(stage: str, stage_logs: dict) -> list[str]:
         f'<span style="{_BUTTON_CSS_STYLE}" id="boardfarm-{stage}-button"'
         f' onclick="{span_onclick}" >{logs_toggle_button}</span>'
     )
-    logs_style = "" if "exception" in stage_logs else "display: none;"
+    if log_file_href:
+        span += (
+            f' <a style="{_BUTTON_CSS_STYLE}" href="{log_file_href}"'
+            ' target="_blank">full logs</a>'
+        )
+    if stage_report.failed:
+        logs_attributes, logs_content, logs_style = "", console_logs, ""
+    else:
+        logs_attributes, logs_content = _get_log_content(
+            session_config,
+            f"{stage}_logs",
+            console_logs,
+        )
+        logs_style = "display: none;"
     return [
         (
             f'<tr><td style="{_TD_CSS_STYLE}">Boardfarm {stage}</td><td'
@@ -102,19 +213,107 @@ def _get_boardfarm_deployment_status(stage: str, stage_logs: dict) -> list[str]:
         (
             f'<tr id="boardfarm-{stage}-logs" style="{logs_style}"><td colspan="2"><div'
             ' class="logwrapper" style="max-height: none"><div class="log"'
-            ' style="word-break: break-all; top: 0px;"'
-            f">{console_logs}</div></div></td></tr>"
+            f' style="word-break: break-all; top: 0px;"{logs_attributes}'
+            f">{logs_content}</div></div></td></tr>"
+        ),
+    ]
+
+
+def _get_device_durations_table_data(device_durations: dict) -> list[str]:
+    """Get per device deployment durations html table content.
+
+    :param device_durations: deployment hook durations in seconds per device
+    :type device_durations: dict
+    :return: html table row with deployment durations of each device
+    :rtype: list[str]
+    """
+    device_rows = "".join(
+        f'<tr><td style="{_TD_CSS_STYLE}">{device_name}</td><td'
+        f' style="{_TD_CSS_STYLE}">{sum(durations.values()):.2f}s</td><td'
+        f' style="{_TD_CSS_STYLE}">'
+        + ", ".join(
+            f"{hook_name} {duration:.2f}s" for hook_name, duration in durations.items()
+        )
+        + "</td></tr>"
+        for device_name, durations in sorted(
+            device_durations.items(),
+            key=lambda item: sum(item[1].values()),
+            reverse=True,
+        )
+    )
+    return [
+        f'<tr><td style="{_TD_CSS_STYLE}">Device deployment durations</td><td'
+        f' style="{_TD_CSS_STYLE}"><table><tbody>{device_rows}</tbody></table>'
+        "</td></tr>",
+    ]
+
+
+def _get_deployment_profile_table_data(deployment_profile: dict) -> list[str]:
+    """Get boardfarm hooks timing waterfall html table content.
+
+    :param deployment_profile: deployment profile with its critical path
+    :type deployment_profile: dict
+    :return: html table row's with the duration of each boardfarm hook
+    :rtype: list[str]
+    """
+    phases = deployment_profile["phases"]
+    end_time = max(phase["start"] + (phase["duration"] or 0) for phase in phases)
+    phase_rows = []
+    for phase, critical_phase in zip(phases, deployment_profile["critical_path"]):
+        duration = phase["duration"] or 0
+        bar_color = "#E57373" if phase["status"] == "failed" else "#7986CB"
+        bar_style = (
+            f"margin-left: {phase['start'] * 100 / (end_time or 1):.2f}%;"
+            f" width: {max(duration * 100 / (end_time or 1), 0.5):.2f}%;"
+            f" background: {bar_color}; height: 12px;"
+        )
+        critical_device = (
+            f" (slowest: {critical_phase['device']}"
+            f" {critical_phase['device_duration']:.2f}s)"
+            if "device" in critical_phase
+            else ""
+        )
+        phase_rows.append(
+            f'<tr><td style="{_TD_CSS_STYLE}">{phase["stage"]}</td><td'
+            f' style="{_TD_CSS_STYLE}">{phase["name"]}{critical_device}</td><td'
+            f' style="{_TD_CSS_STYLE}">+{phase["start"]:.2f}s</td><td'
+            f' style="{_TD_CSS_STYLE}">{duration:.2f}s</td><td'
+            f' style="{_TD_CSS_STYLE} width: 40%;"><div style="{bar_style}"></div>'
+            "</td></tr>",
+        )
+    span_onclick = _get_onclick_javascript(
+        "boardfarm-profile-button",
+        "boardfarm-profile",
+        "profile",
+    )
+    span = (
+        f'<span style="{_BUTTON_CSS_STYLE}" id="boardfarm-profile-button"'
+        f' onclick="{span_onclick}">view profile</span>'
+    )
+    return [
+        (
+            f'<tr><td style="{_TD_CSS_STYLE}">Boardfarm timing</td><td'
+            f' style="{_TD_CSS_STYLE}">'
+            f"{deployment_profile['total_duration']:.2f}s {span}</td></tr>"
+        ),
+        (
+            '<tr id="boardfarm-profile" style="display: none;"><td colspan="2">'
+            f'<table style="width: 100%;"><tbody>{"".join(phase_rows)}</tbody>'
+            "</table></td></tr>"
         ),
     ]
 
 
 def _get_boardfarm_config_table_data(
+    session_config: Config,
     config_name: str,
     config_path: str,
     json_config: str,
 ) -> list[str]:
     """Get boardfarm config details to put in pytest html report.
 
+    :param session_config: pytest session config
+    :type session_config: Config
     :param config_name: config name
     :type config_name: str
     :param config_path: config file path
@@ -133,6 +332,11 @@ def _get_boardfarm_config_table_data(
         f'<span style="{_BUTTON_CSS_STYLE}" id="boardfarm-{config_name}-button"'
         f' onclick="{span_onclick}">view config</span>'
     )
+    config_attributes, config_content = _get_log_content(
+        session_config,
+        f"{config_name}_config",
+        json_config,
+    )
     return [
         (
             f'<r><td style="{_TD_CSS_STYLE}">{config_name.capitalize()} config</td><td'
@@ -142,94 +346,253 @@ def _get_boardfarm_config_table_data(
             f'<tr id="boardfarm-{config_name}-config" style="display: none;"><td'
             ' colspan="2"><div class="logwrapper" style="max-height: none"><div'
             ' class="log"style="word-break: break-all; top: 0px;"'
-            f">{json_config}</div></div></td></tr>"
+            f"{config_attributes}>{config_content}</div></div></td></tr>"
         ),
     ]
 
 
 def _get_boardfarm_configs_details(
     session_config: Config,
-    boardfarm_config: BoardfarmConfig,
+    report: BoardfarmReport,
 ) -> list[str]:
     """Get boardfarm config details as html table rows.
 
     :param session_config: pytest session config
     :type session_config: Config
-    :param boardfarm_config: boardfarm config
-    :type boardfarm_config: BoardfarmConfig
+    :param report: boardfarm report of the session
+    :type report: BoardfarmReport
     :return: html table rows with boardfarm config details
     :rtype: list[str]
     """
-    environment_config_path = Path(session_config.option.env_config)
-    if session_config.option.inventory_config:
-        inventory_config_path = str(Path(session_config.option.inventory_config))
+    if report.inventory_config_path:
+        inventory_config_path = str(Path(report.inventory_config_path))
     else:
         inventory_config_path = ""
     config_details = _get_boardfarm_config_table_data(
+        session_config,
         "inventory",
         inventory_config_path,
-        json.dumps(boardfarm_config.inventory_config, indent=4),
+        report.formatted_inventory_config,
     )
     config_details.extend(
         _get_boardfarm_config_table_data(
+            session_config,
             "environment",
-            str(environment_config_path),
-            json.dumps(boardfarm_config.env_config, indent=2),
+            str(Path(report.env_config_path or "")),
+            report.formatted_env_config,
         ),
     )
     return config_details
 
 
+def _get_log_file_href(
+    session_config: Config,
+    stage_report: StageReport,
+) -> str | None:
+    if stage_report.log_file is None:
+        return None
+    return get_artifact_href(session_config, stage_report.log_file)
+
+
 def get_boardfarm_html_table_report(
     session_config: Config,
-    device_manager: DeviceManager,
-    boardfarm_config: BoardfarmConfig,
-    deployment_setup_data: dict,
-    deployment_teardown_data: dict,
+    report: BoardfarmReport,
 ) -> str:
     """Get boardfarm html table report.
 
+    The report only renders the boardfarm report of the session, which is
+    updated as the phases of the session complete.
+
     :param session_config: pytest session config
     :type session_config: Config
-    :param device_manager: boardfarm device manager
-    :type device_manager: DeviceManager
-    :param boardfarm_config: boardfarm config
-    :type boardfarm_config: BoardfarmConfig
-    :param deployment_setup_data: boardfarm deployment status data
-    :type deployment_setup_data: dict
-    :param deployment_teardown_data: boardfarm deployment teardown data
-    :type deployment_teardown_data: dict
+    :param report: boardfarm report of the session
+    :type report: BoardfarmReport
     :return: boardfarm html table report
     :rtype: str
     """
     table_contents = [
         f'<tr><td style="{_TD_CSS_STYLE}">{title}</td><td'
         f' style="{_TD_CSS_STYLE}">{content}</td></tr>'
-        for title, content in _get_boardfarm_environment_details(
-            session_config,
-            boardfarm_config,
-        ).items()
+        for title, content in _get_boardfarm_environment_details(report).items()
     ]
-    table_contents.extend(
-        _get_boardfarm_configs_details(session_config, boardfarm_config),
-    )
-    if deployment_setup_data:
+    table_contents.extend(_get_boardfarm_configs_details(session_config, report))
+    for stage, stage_report in (("setup", report.setup), ("teardown", report.teardown)):
+        if stage_report.status == "not run":
+            continue
         table_contents.extend(
-            _get_boardfarm_deployment_status("setup", deployment_setup_data),
+            _get_boardfarm_deployment_status(
+                session_config,
+                stage,
+                stage_report,
+                _get_log_file_href(session_config, stage_report),
+            ),
         )
-    if deployment_teardown_data:
+        if stage == "setup" and report.device_durations:
+            table_contents.extend(
+                _get_device_durations_table_data(report.device_durations),
+            )
+    if report.deployment_profile and report.deployment_profile["phases"]:
         table_contents.extend(
-            _get_boardfarm_deployment_status("teardown", deployment_teardown_data),
-        )
-    if device_manager is not None:
-        deployed_devices = {
-            name: device.device_type
-            for name, device in device_manager.get_devices_by_type(
-                BoardfarmDevice,
-            ).items()
-        }
+            _get_deployment_profile_table_data(report.deployment_profile),
+        )
+    if report.contingency_checks is not None:
+        contingency_checks = report.contingency_checks
+        table_contents.append(
+            f'<tr><td style="{_TD_CSS_STYLE}">Contingency checks</td><td'
+            f' style="{_TD_CSS_STYLE}">{contingency_checks["hits"]} cache hits,'
+            f" {contingency_checks['misses']} cache misses,"
+            f" {contingency_checks['invalidations']} cache invalidations</td></tr>",
+        )
+    if report.reruns is not None:
+        reruns = report.reruns
+        table_contents.append(
+            f'<tr><td style="{_TD_CSS_STYLE}">Re-runs</td><td'
+            f' style="{_TD_CSS_STYLE}">{reruns["rerun_tests"]} tests re-run'
+            f" {reruns['reruns']} times, {reruns['recovered_tests']} passed after"
+            " a re-run, reprovisioned devices:"
+            f" {json.dumps(reruns['reprovisioned_devices'])}</td></tr>",
+        )
+    if report.fail_fast_reason is not None:
+        table_contents.append(
+            f'<tr><td style="{_TD_CSS_STYLE}">Fail fast</td><td'
+            f' style="{_TD_CSS_STYLE} color: red;">Remaining tests not run -'
+            f" {html.escape(report.fail_fast_reason)}</td></tr>",
+        )
+    if report.devices is not None:
         table_contents.append(
             f'<tr><td style="{_TD_CSS_STYLE}">Deployed devices</td><td'
-            f' style="{_TD_CSS_STYLE}">{json.dumps(deployed_devices)}</td></tr>',
+            f' style="{_TD_CSS_STYLE}">{json.dumps(report.devices)}</td></tr>',
+        )
+    return f"<table><tbody>{''.join(table_contents)}</tbody></table>"
+
+
+def get_boardfarm_workers_html_table_report(worker_summaries: list[dict]) -> str:
+    """Get boardfarm html table report of the pytest-xdist workers.
+
+    :param worker_summaries: boardfarm summary of each xdist worker
+    :type worker_summaries: list[dict]
+    :return: boardfarm html table report with a row per worker
+    :rtype: str
+    """
+    headers = ("Worker", "Board name", "Setup", "Teardown", "Duration", "Devices")
+    table_contents = [
+        "<tr>"
+        + "".join(f'<th style="{_TD_CSS_STYLE}">{header}</th>' for header in headers)
+        + "</tr>",
+    ]
+    for summary in sorted(worker_summaries, key=lambda summary: summary["worker"]):
+        total_duration = summary.get("deployment_profile", {}).get("total_duration")
+        cells = (
+            summary["worker"],
+            summary.get("board_name", ""),
+            summary.get("setup", ""),
+            summary.get("teardown", ""),
+            "" if total_duration is None else f"{total_duration:.2f}s",
+            json.dumps(summary.get("devices", {})),
+        )
+        table_contents.append(
+            "<tr>"
+            + "".join(f'<td style="{_TD_CSS_STYLE}">{cell}</td>' for cell in cells)
+            + "</tr>",
         )
     return f"<table><tbody>{''.join(table_contents)}</tbody></table>"
+
+
+def get_device_io_html_table_report(device_metrics: dict[str, dict]) -> str:
+    """Get device I/O html table report.
+
+    :param device_metrics: I/O counters of each device summed over all tests
+    :type device_metrics: dict[str, dict]
+    :return: device I/O html table report with a row per device
+    :rtype: str
+    """
+    headers = (
+        "Device",
+        "Bytes sent",
+        "Bytes received",
+        "Commands",
+        "Mean command time",
+        "Max command time",
+    )
+    table_contents = [
+        "<tr>"
+        + "".join(f'<th style="{_TD_CSS_STYLE}">{header}</th>' for header in headers)
+        + "</tr>",
+    ]
+    for device_name, metrics in sorted(device_metrics.items()):
+        mean_command_time = (
+            f"{metrics['command_time'] / metrics['commands']:.3f}s"
+            if metrics["commands"]
+            else ""
+        )
+        cells = (
+            device_name,
+            metrics["bytes_sent"],
+            metrics["bytes_received"],
+            metrics["commands"],
+            mean_command_time,
+            f"{metrics['max_command_time']:.3f}s" if metrics["commands"] else "",
+        )
+        table_contents.append(
+            "<tr>"
+            + "".join(f'<td style="{_TD_CSS_STYLE}">{cell}</td>' for cell in cells)
+            + "</tr>",
+        )
+    return f"<table><tbody>{''.join(table_contents)}</tbody></table>"
+
+
+def get_test_steps_html_table_report(steps: list[dict]) -> str:
+    """Get html table report of the steps logged by a test.
+
+    :param steps: steps logged by the test, in the order they were logged
+    :type steps: list[dict]
+    :return: test steps html table report with a row per step
+    :rtype: str
+    """
+    table_contents = [
+        "<tr>"
+        + "".join(
+            f'<th style="{_TD_CSS_STYLE}">{header}</th>'
+            for header in ("Step", "Message", "Elapsed", "Since test start")
+        )
+        + "</tr>",
+    ]
+    since_test_start = 0.0
+    for step in steps:
+        since_test_start += step["elapsed"]
+        cells = (
+            step["index"],
+            html.escape(step["message"]),
+            f"{step['elapsed']:.3f}s",
+            f"{since_test_start:.3f}s",
+        )
+        table_contents.append(
+            "<tr>"
+            + "".join(f'<td style="{_TD_CSS_STYLE}">{cell}</td>' for cell in cells)
+            + "</tr>",
+        )
+    return f"<table><tbody>{''.join(table_contents)}</tbody></table>"
+
+
+def get_screenshots_html_report(
+    session_config: Config,
+    screenshots: list[tuple[str, Path, Path]],
+) -> str:
+    """Get html thumbnails of the screenshots of a test, linked to the screenshots.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :param screenshots: name, path and thumbnail path of each screenshot
+    :type screenshots: list[tuple[str, Path, Path]]
+    :return: screenshots html report with a thumbnail per screenshot
+    :rtype: str
+    """
+    thumbnails = "".join(
+        f'<a href="{get_artifact_href(session_config, str(path))}" target="_blank"'
+        f' title="{html.escape(name)}"><img'
+        f' src="{get_artifact_href(session_config, str(thumbnail_path))}"'
+        f' alt="{html.escape(name)}" style="{_TD_CSS_STYLE} margin: 3px;'
+        ' max-width: 320px;"></a>'
+        for name, path, thumbnail_path in screenshots
+    )
+    return f"<div>{thumbnails}</div>"
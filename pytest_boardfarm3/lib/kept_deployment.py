@@ -0,0 +1,138 @@
+"""Boardfarm deployment kept across pytest sessions."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from boardfarm3.devices.base_devices import BoardfarmDevice
+from boardfarm3.lib.boardfarm_config import get_json
+
+if TYPE_CHECKING:
+    from _pytest.cacheprovider import Cache
+    from boardfarm3.lib.device_manager import DeviceManager
+    from pytest import Config  # noqa: PT013
+
+_LOGGER = logging.getLogger(__name__)
+
+KEPT_DEPLOYMENT_CACHE_KEY = "boardfarm/kept_deployment/{board_name}"
+
+
+def _get_cache(session_config: Config) -> Cache | None:
+    # cache attribute is not set when cacheprovider plugin is disabled
+    return getattr(session_config, "cache", None)
+
+
+def _read_config(config_path: str | None) -> Any:  # noqa: ANN401
+    if not config_path or (
+        not config_path.startswith(("http://", "https://"))
+        and not Path(config_path).is_file()
+    ):
+        return config_path
+    # the config behind a URL may change, as well as the one of a file
+    return get_json(config_path)
+
+
+def get_deployment_fingerprint(session_config: Config) -> str:
+    """Get fingerprint of the deployment requested by the command line arguments.
+
+    Two sessions with the same board, inventory and environment configs
+    deploy the same devices, hence they have the same fingerprint.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :return: deployment fingerprint
+    :rtype: str
+    """
+    option = session_config.option
+    deployment = {
+        "board_name": option.board_name,
+        "inventory_config": _read_config(option.inventory_config),
+        "env_config": _read_config(option.env_config),
+        "ignore_devices": option.ignore_devices,
+    }
+    return hashlib.sha256(
+        json.dumps(deployment, sort_keys=True).encode("utf-8"),
+    ).hexdigest()
+
+
+def load_kept_deployment(session_config: Config) -> dict[str, Any] | None:
+    """Load the deployment kept by a previous session with the same fingerprint.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :return: kept deployment details, None if there is none to reuse
+    :rtype: dict[str, Any] | None
+    """
+    cache = _get_cache(session_config)
+    if cache is None:
+        _LOGGER.warning("Pytest cache is disabled, cannot reuse kept devices.")
+        return None
+    kept_deployment = cache.get(
+        KEPT_DEPLOYMENT_CACHE_KEY.format(board_name=session_config.option.board_name),
+        None,
+    )
+    fingerprint = get_deployment_fingerprint(session_config)
+    if kept_deployment and kept_deployment["fingerprint"] != fingerprint:
+        _LOGGER.warning(
+            "Devices of board %r kept since %s do not match the requested"
+            " deployment, they are still deployed.",
+            kept_deployment["board_name"],
+            kept_deployment["kept_since"],
+        )
+        return None
+    return kept_deployment
+
+
+def save_kept_deployment(
+    session_config: Config,
+    inventory_config: dict[str, Any],
+    device_manager: DeviceManager,
+) -> None:
+    """Save the deployment kept at the end of the session.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :param inventory_config: reserved inventory config
+    :type inventory_config: dict[str, Any]
+    :param device_manager: device manager with the deployed devices
+    :type device_manager: DeviceManager
+    """
+    cache = _get_cache(session_config)
+    if cache is None:
+        _LOGGER.warning("Pytest cache is disabled, cannot keep devices.")
+        return
+    cache.set(
+        KEPT_DEPLOYMENT_CACHE_KEY.format(board_name=session_config.option.board_name),
+        {
+            "fingerprint": get_deployment_fingerprint(session_config),
+            "board_name": session_config.option.board_name,
+            "kept_since": datetime.now(tz=timezone.utc).isoformat(),
+            "inventory_config": inventory_config,
+            "devices": {
+                name: device.device_type
+                for name, device in device_manager.get_devices_by_type(
+                    BoardfarmDevice,
+                ).items()
+            },
+        },
+    )
+
+
+def clear_kept_deployment(session_config: Config) -> None:
+    """Forget the kept deployment once its devices are released.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    """
+    if (cache := _get_cache(session_config)) is not None:
+        cache.set(
+            KEPT_DEPLOYMENT_CACHE_KEY.format(
+                board_name=session_config.option.board_name,
+            ),
+            None,
+        )
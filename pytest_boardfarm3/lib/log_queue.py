@@ -0,0 +1,174 @@
+"""Queue based logging pipeline writing the log records from a background thread."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# queued log record with the handler it is meant for, None stops the listener
+_QueueEntry = Optional[tuple[logging.Handler, logging.LogRecord]]
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler forwarding the records of a handler, without blocking.
+
+    The records are dropped, and counted, when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, target: logging.Handler) -> None:
+        """Initialize bounded queue handler.
+
+        :param log_queue: queue of the records to write
+        :param target: handler the queued records are written with
+        """
+        super().__init__(log_queue)
+        self.target = target
+        self.dropped_records = 0
+        self.setLevel(target.level)
+        self.filters = list(target.filters)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Get the record to queue, as is.
+
+        The record is formatted by the target handler in the listener thread,
+        hence neither formatted nor copied by the logging thread.
+
+        :param record: log record
+        :return: the same log record
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue the log record, or drop it when the queue is full.
+
+        :param record: log record
+        """
+        try:
+            self.queue.put_nowait((self.target, record))
+        except queue.Full:
+            # the handler lock is held, the counter is not updated concurrently
+            self.dropped_records += 1
+
+
+class QueueLoggingPipeline:
+    """Logging pipeline writing the log records of some loggers from a thread.
+
+    The handlers of the loggers are replaced by queue handlers, so that the
+    threads logging, e.g. reading a device console, only queue the records.
+    A listener thread writes them with the original handlers, in batches of
+    one write and one flush per stream. The queue is bounded, records are
+    dropped and counted per handler when the handlers cannot keep up.
+    """
+
+    def __init__(self, queue_size: int, batch_size: int = 1000) -> None:
+        """Initialize queue logging pipeline.
+
+        :param queue_size: maximum number of queued log records
+        :type queue_size: int
+        :param batch_size: maximum number of log records written at once
+        :type batch_size: int
+        """
+        self._queue: queue.Queue[_QueueEntry] = queue.Queue(queue_size)
+        self._batch_size = batch_size
+        self._loggers_handlers: list[tuple[logging.Logger, list[logging.Handler]]] = []
+        self._queue_handlers: list[_BoundedQueueHandler] = []
+        self._listener: threading.Thread | None = None
+
+    def start(self, loggers: Iterable[logging.Logger]) -> None:
+        """Replace the handlers of the loggers and start the listener thread.
+
+        :param loggers: loggers whose records are written by the listener
+        :type loggers: Iterable[logging.Logger]
+        """
+        queue_handlers: dict[logging.Handler, _BoundedQueueHandler] = {}
+        for logger in loggers:
+            handlers = list(logger.handlers)
+            self._loggers_handlers.append((logger, handlers))
+            for handler in handlers:
+                if handler not in queue_handlers:
+                    queue_handlers[handler] = _BoundedQueueHandler(
+                        self._queue,
+                        handler,
+                    )
+                logger.removeHandler(handler)
+                logger.addHandler(queue_handlers[handler])
+        self._queue_handlers = list(queue_handlers.values())
+        self._listener = threading.Thread(
+            target=self._write_queued_records,
+            name="boardfarm-logging",
+            daemon=True,
+        )
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Write the queued records and restore the handlers of the loggers."""
+        if self._listener is None:
+            return
+        for logger, handlers in self._loggers_handlers:
+            for queue_handler in self._queue_handlers:
+                logger.removeHandler(queue_handler)
+            for handler in handlers:
+                logger.addHandler(handler)
+        self._loggers_handlers = []
+        self._queue.put(None)
+        self._listener.join()
+        self._listener = None
+
+    def get_dropped_records(self) -> dict[str, int]:
+        """Get the number of log records dropped because the queue was full.
+
+        :return: number of dropped records per handler name
+        :rtype: dict[str, int]
+        """
+        return {
+            queue_handler.target.get_name() or repr(queue_handler.target): (
+                queue_handler.dropped_records
+            )
+            for queue_handler in self._queue_handlers
+            if queue_handler.dropped_records
+        }
+
+    def _get_batch(self) -> list[_QueueEntry]:
+        batch = [self._queue.get()]
+        with contextlib.suppress(queue.Empty):
+            while len(batch) < self._batch_size and batch[-1] is not None:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    def _write_queued_records(self) -> None:
+        while True:
+            batch = self._get_batch()
+            self._write_batch([entry for entry in batch if entry is not None])
+            if batch[-1] is None:
+                return
+
+    @staticmethod
+    def _write_batch(
+        batch: list[tuple[logging.Handler, logging.LogRecord]],
+    ) -> None:
+        # the lines of each stream are written at once, in their logging order
+        streams: dict[int, tuple[logging.StreamHandler, list[str]]] = {}
+        for handler, record in batch:
+            if not isinstance(handler, logging.StreamHandler):
+                handler.handle(record)
+                continue
+            try:
+                line = handler.format(record) + handler.terminator
+            except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+                handler.handleError(record)
+                continue
+            streams.setdefault(id(handler.stream), (handler, []))[1].append(line)
+        for handler, lines in streams.values():
+            with handler.lock:  # type: ignore[union-attr]
+                try:
+                    handler.stream.write("".join(lines))
+                    handler.flush()
+                except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+                    handler.handleError(batch[-1][1])
@@ -0,0 +1,279 @@
+"""Boardfarm report model, updated as the session progresses."""
+
+from __future__ import annotations
+
+import json
+import traceback
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from pytest_boardfarm3.lib.run_record import (
+    get_boardfarm_environment,
+    get_deployed_devices,
+    get_stage_status,
+)
+from pytest_boardfarm3.lib.test_timings import get_test_outcome
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from boardfarm3.lib.boardfarm_config import BoardfarmConfig
+    from boardfarm3.lib.device_manager import DeviceManager
+    from pytest import Config, TestReport  # noqa: PT013
+
+
+@dataclass
+class StageReport:
+    """Status and captured logs of a boardfarm deployment stage."""
+
+    status: str = "not run"
+    logs: str = ""
+    dropped_lines: int = 0
+    log_file: str | None = None
+    traceback: str = ""
+
+    @property
+    def failed(self) -> bool:
+        """Whether the stage failed.
+
+        :return: True when the stage raised an exception
+        :rtype: bool
+        """
+        return self.status.startswith("failed")
+
+
+def get_stage_report(stage_data: dict) -> StageReport:
+    """Get the report of a stage from the data captured during the stage.
+
+    :param stage_data: captured deployment stage data
+    :type stage_data: dict
+    :return: deployment stage report
+    :rtype: StageReport
+    """
+    exception = stage_data.get("exception")
+    return StageReport(
+        status=get_stage_status(stage_data),
+        logs=stage_data.get("logs", ""),
+        dropped_lines=stage_data.get("dropped_lines", 0),
+        log_file=stage_data.get("log_file"),
+        traceback="".join(traceback.format_tb(exception[2])) if exception else "",
+    )
+
+
+@dataclass
+class BoardfarmReport:  # pylint: disable=too-many-instance-attributes
+    """Boardfarm details of a session, shown in the html report.
+
+    The report is updated once each phase of the session completes, i.e. the
+    config parsing, the deployment and the release of the devices, and with
+    the report of each test phase, so that it can be saved before the session
+    ends and rendered cheaply at any time. The configs are formatted once,
+    when they are parsed.
+    """
+
+    board_name: str | None = None
+    image: str | None = None
+    provisioning_mode: str | None = None
+    env_config_path: str | None = None
+    inventory_config_path: str | None = None
+    env_config: dict | None = None
+    inventory_config: dict | None = None
+    formatted_env_config: str = ""
+    formatted_inventory_config: str = ""
+    setup: StageReport = field(default_factory=StageReport)
+    device_durations: dict[str, dict[str, float]] = field(default_factory=dict)
+    devices: dict[str, str] | None = None
+    teardown: StageReport = field(default_factory=StageReport)
+    deployment_profile: dict | None = None
+    contingency_checks: dict | None = None
+    fail_fast_reason: str | None = None
+    reruns: dict | None = None
+    workers: list[dict] | None = None
+    outcomes: dict[str, int] = field(default_factory=dict)
+    current_test: str | None = None
+    complete: bool = False
+    # outcome of the tests still running, given by their completed phases
+    _running_tests: dict[str, str | None] = field(default_factory=dict, repr=False)
+
+    def set_config(
+        self,
+        session_config: Config,
+        boardfarm_config: BoardfarmConfig | None,
+    ) -> None:
+        """Set the board, the environment and the configs of the session.
+
+        :param session_config: pytest session config
+        :type session_config: Config
+        :param boardfarm_config: boardfarm config, None when not parsed
+        :type boardfarm_config: BoardfarmConfig | None
+        """
+        environment = get_boardfarm_environment(session_config, boardfarm_config)
+        self.board_name = environment["board_name"]
+        self.image = environment["image"]
+        self.provisioning_mode = environment["provisioning_mode"]
+        self.env_config_path = session_config.option.env_config
+        self.inventory_config_path = session_config.option.inventory_config
+        if boardfarm_config is not None:
+            self.env_config = boardfarm_config.env_config
+            self.inventory_config = boardfarm_config.inventory_config
+            self.formatted_env_config = json.dumps(self.env_config, indent=2)
+            self.formatted_inventory_config = json.dumps(
+                self.inventory_config,
+                indent=4,
+            )
+
+    def set_setup(
+        self,
+        stage_data: dict,
+        device_manager: DeviceManager | None,
+    ) -> None:
+        """Set the status of the deployment and the deployed devices.
+
+        :param stage_data: captured deployment setup data
+        :type stage_data: dict
+        :param device_manager: boardfarm device manager, None when not deployed
+        :type device_manager: DeviceManager | None
+        """
+        self.setup = get_stage_report(stage_data)
+        self.device_durations = stage_data.get("device_durations", {})
+        if device_manager is not None:
+            self.devices = get_deployed_devices(device_manager)
+
+    def set_teardown(self, stage_data: dict, deployment_profile: dict) -> None:
+        """Set the status of the release of the devices and the hooks profile.
+
+        :param stage_data: captured deployment teardown data
+        :type stage_data: dict
+        :param deployment_profile: boardfarm hooks timing profile
+        :type deployment_profile: dict
+        """
+        self.teardown = get_stage_report(stage_data)
+        self.deployment_profile = deployment_profile
+
+    def add_test_report(self, report: TestReport) -> None:
+        """Count the test of the report once its teardown is reported.
+
+        :param report: test execution report
+        :type report: TestReport
+        """
+        outcome = get_test_outcome(self._running_tests.pop(report.nodeid, None), report)
+        if report.when != "teardown":
+            self._running_tests[report.nodeid] = outcome
+            self.current_test = report.nodeid
+            return
+        self.current_test = None
+        if outcome is not None:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the report as a json serializable dictionary.
+
+        :return: boardfarm session details
+        :rtype: dict[str, Any]
+        """
+        session: dict[str, Any] = {
+            "board_name": self.board_name,
+            "image": self.image,
+            "provisioning_mode": self.provisioning_mode,
+            "env_config_path": self.env_config_path,
+            "inventory_config_path": self.inventory_config_path,
+            "env_config": self.env_config,
+            "inventory_config": self.inventory_config,
+            "setup": self.setup.status,
+            "setup_log_file": self.setup.log_file,
+            "device_durations": self.device_durations,
+            "teardown": self.teardown.status,
+            "teardown_log_file": self.teardown.log_file,
+            "deployment_profile": self.deployment_profile,
+            "contingency_checks": self.contingency_checks,
+            "fail_fast_reason": self.fail_fast_reason,
+            "reruns": self.reruns,
+            "devices": self.devices or {},
+        }
+        if self.workers is not None:
+            session["workers"] = self.workers
+        return session
+
+
+# details of the report updated with each test, the others with each phase
+_PROGRESS_KEYS = (
+    "contingency_checks",
+    "fail_fast_reason",
+    "reruns",
+    "outcomes",
+    "current_test",
+    "complete",
+)
+
+
+class ReportFile:
+    """Json file of the boardfarm report, saved again after each update.
+
+    The file is kept open and rewritten from its start with a single write,
+    padded with whitespace to the length of the previous report instead of
+    being truncated, so that a session killed at any time leaves a readable
+    report of its last saved state. The session details, e.g. the configs,
+    are only encoded again when they change, i.e. once per session phase.
+    """
+
+    def __init__(self) -> None:
+        """Initialize report file."""
+        self._file: BinaryIO | None = None
+        self._size = 0
+        self._session: dict[str, Any] | None = None
+        self._encoded_session = b""
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the report is saved.
+
+        :return: True once the json file is opened, until it is closed
+        :rtype: bool
+        """
+        return self._file is not None
+
+    def open(self, path: Path) -> None:
+        """Open the json file the report is saved in.
+
+        :param path: json file path
+        :type path: Path
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # closed by close(), the report is saved as the session progresses
+        self._file = path.open("wb", buffering=0)  # pylint: disable=consider-using-with
+        self._size = 0
+
+    def close(self) -> None:
+        """Close the json file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def save(self, report: BoardfarmReport) -> None:
+        """Save the report, with the progress of the tests.
+
+        :param report: boardfarm report
+        :type report: BoardfarmReport
+        """
+        if self._file is None:
+            return
+        session = {
+            **report.as_dict(),
+            "outcomes": report.outcomes,
+            "current_test": report.current_test,
+            "complete": report.complete,
+        }
+        progress = {key: session.pop(key) for key in _PROGRESS_KEYS}
+        if session != self._session:
+            self._session = session
+            # without the closing brace, followed by the progress
+            self._encoded_session = json.dumps(session, default=repr)[:-1].encode()
+        content = b", ".join(
+            (
+                self._encoded_session,
+                json.dumps(progress, default=repr)[1:].encode("utf-8"),
+            ),
+        ).ljust(self._size)
+        self._file.seek(0)
+        self._file.write(content)
+        self._size = len(content)
@@ -0,0 +1,145 @@
+"""Re-run of the tests failing on devices reprovisioned for their environment."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+if TYPE_CHECKING:
+    from pytest import Item, TestReport  # noqa: PT013
+
+_LOGGER = logging.getLogger(__name__)
+
+RERUN_OUTCOME = "rerun"
+
+
+def get_used_devices(report: TestReport) -> list[str]:
+    """Get the devices a test exchanged data with, from its teardown report.
+
+    :param report: teardown report of the test
+    :type report: TestReport
+    :return: names of the devices used by the test
+    :rtype: list[str]
+    """
+    device_io = getattr(report, "boardfarm_device_io", None) or {}
+    return sorted(
+        device_name
+        for device_name, metrics in device_io.items()
+        if metrics["bytes_sent"] or metrics["bytes_received"]
+    )
+
+
+class ReprovisionRetry:
+    """Re-run of the tests with an env_req marker failing in their call phase.
+
+    Before each re-run, the devices the test depends on are reprovisioned for
+    its environment request, instead of redeploying the whole environment.
+    The reports of the failed attempts have the 'rerun' outcome.
+    """
+
+    def __init__(
+        self,
+        retries: int,
+        reprovision: Callable[[dict, list[TestReport]], list[str]],
+    ) -> None:
+        """Initialize reprovision retry.
+
+        :param retries: maximum number of re-runs of a test
+        :type retries: int
+        :param reprovision: reprovision the devices for an environment request,
+            given the reports of the failed attempt, return the devices names
+        :type reprovision: Callable[[dict, list[TestReport]], list[str]]
+        """
+        self._retries = retries
+        self._reprovision = reprovision
+        self._reruns: dict[str, int] = {}
+        self._recovered_tests = 0
+        self._reprovisioned_devices: dict[str, int] = {}
+
+    def _reprovision_for_rerun(self, env_req: dict, reports: list[TestReport]) -> bool:
+        if any(report.failed for report in reports if report.when == "setup") or not (
+            any(report.failed for report in reports if report.when == "call")
+        ):
+            return False
+        try:
+            device_names = self._reprovision(env_req, reports)
+        except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+            _LOGGER.warning(
+                "Failed to reprovision the devices of %s, not re-running it.",
+                reports[0].nodeid,
+                exc_info=True,
+            )
+            return False
+        for device_name in device_names:
+            self._reprovisioned_devices[device_name] = (
+                self._reprovisioned_devices.get(device_name, 0) + 1
+            )
+        return True
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item: Item, nextitem: Item | None) -> bool | None:
+        """Run a test with an env_req marker, re-running it when it fails.
+
+        :param item: test item
+        :type item: Item
+        :param nextitem: next test item, None for the last test
+        :type nextitem: Item | None
+        :return: True when the test is run, None to run it as usual
+        :rtype: bool | None
+        """
+        env_req_marker = item.get_closest_marker("env_req")
+        if env_req_marker is None:
+            return None
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        for attempt in range(self._retries + 1):
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            rerun = attempt < self._retries and self._reprovision_for_rerun(
+                env_req_marker.args[0],
+                reports,
+            )
+            for report in reports:
+                if rerun and report.when == "call":
+                    # the teardown of the failed attempt is not reported
+                    report.outcome = RERUN_OUTCOME  # type: ignore[assignment]
+                    item.ihook.pytest_runtest_logreport(report=report)
+                    break
+                item.ihook.pytest_runtest_logreport(report=report)
+            if not rerun:
+                break
+            self._reruns[item.nodeid] = attempt + 1
+        if item.nodeid in self._reruns and not any(report.failed for report in reports):
+            self._recovered_tests += 1
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    @staticmethod
+    def pytest_report_teststatus(
+        report: TestReport,
+    ) -> tuple[str, str, tuple[str, dict[str, bool]]] | None:
+        """Show the failed attempts of the re-run tests.
+
+        :param report: test execution report
+        :type report: TestReport
+        :return: status of the re-run reports, None for the other reports
+        :rtype: tuple[str, str, tuple[str, dict[str, bool]]] | None
+        """
+        if report.outcome != RERUN_OUTCOME:
+            return None
+        return RERUN_OUTCOME, "R", ("RERUN", {"yellow": True})
+
+    def as_dict(self) -> dict[str, int | dict[str, int]]:
+        """Get the re-run statistics as dictionary.
+
+        :return: number of re-run tests, of re-runs, of tests passing after a
+            re-run and of reprovisions of each device
+        :rtype: dict[str, int | dict[str, int]]
+        """
+        return {
+            "rerun_tests": len(self._reruns),
+            "reruns": sum(self._reruns.values()),
+            "recovered_tests": self._recovered_tests,
+            "reprovisioned_devices": dict(self._reprovisioned_devices),
+        }
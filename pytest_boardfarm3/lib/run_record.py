@@ -0,0 +1,191 @@
+"""Machine readable record of a boardfarm run, alongside the html report."""
+
+from __future__ import annotations
+
+import json
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+from boardfarm3.devices.base_devices import BoardfarmDevice
+from boardfarm3.lib.utils import get_value_from_dict
+
+from pytest_boardfarm3 import __version__
+from pytest_boardfarm3.lib.retry import RERUN_OUTCOME
+from pytest_boardfarm3.lib.test_timings import (
+    get_report_steps,
+    get_report_timings,
+    get_test_outcome,
+)
+
+if TYPE_CHECKING:
+    from boardfarm3.lib.boardfarm_config import BoardfarmConfig
+    from boardfarm3.lib.device_manager import DeviceManager
+    from pytest import Config, TestReport  # noqa: PT013
+
+
+def _get_report_message(report: TestReport) -> str | None:
+    if report.skipped and isinstance(report.longrepr, tuple):
+        return report.longrepr[2]
+    crash = getattr(report.longrepr, "reprcrash", None)
+    return crash.message if crash is not None else report.longreprtext or None
+
+
+def get_boardfarm_environment(
+    session_config: Config,
+    boardfarm_config: BoardfarmConfig | None,
+) -> dict[str, Any]:
+    """Get the board name and the environment deployed on it.
+
+    :param session_config: pytest session config
+    :type session_config: Config
+    :param boardfarm_config: boardfarm config, None when not parsed
+    :type boardfarm_config: BoardfarmConfig | None
+    :return: board name, image name and provisioning mode
+    :rtype: dict[str, Any]
+    """
+    env_config = boardfarm_config.env_config if boardfarm_config else {}
+    return {
+        "board_name": session_config.option.board_name,
+        "image": get_value_from_dict("image_uri", env_config),
+        "provisioning_mode": get_value_from_dict(
+            "eRouter_Provisioning_mode",
+            env_config,
+        ),
+    }
+
+
+def get_deployed_devices(device_manager: DeviceManager | None) -> dict[str, str]:
+    """Get the type of each deployed device.
+
+    :param device_manager: boardfarm device manager, None when not deployed
+    :type device_manager: DeviceManager | None
+    :return: device type per device name
+    :rtype: dict[str, str]
+    """
+    if device_manager is None:
+        return {}
+    return {
+        name: device.device_type
+        for name, device in device_manager.get_devices_by_type(
+            BoardfarmDevice,
+        ).items()
+    }
+
+
+def get_stage_status(stage_data: dict) -> str:
+    """Get the status of a boardfarm deployment stage.
+
+    :param stage_data: captured deployment stage data
+    :type stage_data: dict
+    :return: 'not run', 'success' or 'failed - <exception>'
+    :rtype: str
+    """
+    if not stage_data:
+        return "not run"
+    if "exception" in stage_data:
+        return f"failed - {stage_data['exception'][1]!r}"
+    return "success"
+
+
+class RunRecorder:
+    """Record of the tests of a run, written as json lines as the run progresses.
+
+    A test record is written once each test completes, and a session record
+    with the boardfarm details of the html report and the number of tests per
+    outcome is written once the devices are deployed, and again at the end of
+    the session. The records are flushed as they are written, so that the
+    record of a crashed session ends with its last completed test. All records
+    carry the same run id, so that the records of many runs can be ingested in
+    the same tables.
+    """
+
+    def __init__(self) -> None:
+        """Initialize run recorder."""
+        self.run_id = uuid.uuid4().hex
+        self._tests: dict[str, dict[str, Any]] = {}
+        self._outcomes: dict[str, int] = {}
+        self._record_file: TextIO | None = None
+
+    def open(self, path: str) -> None:
+        """Open the json lines file the records are written to.
+
+        :param path: json lines file path
+        :type path: str
+        """
+        record_path = Path(path)
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        # closed by close(), the records are written as the run progresses
+        self._record_file = record_path.open(  # pylint: disable=consider-using-with
+            "w",
+            encoding="utf-8",
+        )
+
+    def close(self) -> None:
+        """Close the json lines file."""
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._record_file.write(json.dumps(record, default=repr) + "\n")
+        self._record_file.flush()
+
+    def add_report(self, report: TestReport) -> None:
+        """Add a test phase report, and write the test record after its teardown.
+
+        :param report: test execution report
+        :type report: TestReport
+        """
+        if self._record_file is None:
+            return
+        test = self._tests.setdefault(
+            report.nodeid,
+            {
+                "record": "test",
+                "run_id": self.run_id,
+                "nodeid": report.nodeid,
+                "outcome": None,
+                "start_time": None,
+                "duration": 0.0,
+                "reruns": 0,
+                "message": None,
+                "timings": {},
+                "steps": [],
+                "device_io": {},
+            },
+        )
+        test_start_time = getattr(report, "test_start_time", None)
+        if test["start_time"] is None and test_start_time is not None:
+            test["start_time"] = test_start_time.isoformat()
+        test["duration"] += report.duration
+        test["timings"].update(get_report_timings(report))
+        test["steps"].extend(get_report_steps(report))
+        test["device_io"].update(getattr(report, "boardfarm_device_io", None) or {})
+        test["outcome"] = get_test_outcome(test["outcome"], report)
+        if report.outcome == RERUN_OUTCOME:
+            test["reruns"] += 1
+        if test["message"] is None and not report.passed:
+            test["message"] = _get_report_message(report)
+        if report.when == "teardown":
+            del self._tests[report.nodeid]
+            self._outcomes[test["outcome"]] = self._outcomes.get(test["outcome"], 0) + 1
+            self._write(test)
+
+    def write_session(self, session: dict[str, Any]) -> None:
+        """Write the session record, with the number of tests per outcome.
+
+        :param session: boardfarm session details
+        :type session: dict[str, Any]
+        """
+        if self._record_file is None:
+            return
+        self._write(
+            {
+                "record": "session",
+                "run_id": self.run_id,
+                "plugin_version": __version__,
+                **session,
+                "outcomes": dict(self._outcomes),
+            },
+        )
@@ -0,0 +1,132 @@
+"""Screenshots attached to the tests, saved as files linked by the html report."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, screenshots are then saved as is
+    Image = None  # type: ignore[assignment]
+
+# length of the content hash naming the saved screenshots
+_HASH_LENGTH = 32
+
+
+def _write_atomically(path: Path, content: bytes) -> None:
+    # xdist workers may save the same screenshot concurrently
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as temp_file:
+        temp_file.write(content)
+    temp_path = Path(temp_file.name)
+    # temporary files are only readable by their owner
+    temp_path.chmod(0o644)
+    temp_path.replace(path)
+
+
+def _get_png(image: Image.Image, max_size: int) -> bytes:
+    if max_size:
+        image.thumbnail((max_size, max_size))
+    content = io.BytesIO()
+    image.save(content, format="PNG", optimize=True)
+    return content.getvalue()
+
+
+def get_screenshot_base64(screenshot_path: str, max_size: int = 0) -> str:
+    """Get the base64 content of a screenshot, to embed it in the html report.
+
+    With Pillow, the screenshot is recompressed and downsized to a maximum
+    size as in the screenshot store, otherwise it is embedded as is.
+
+    :param screenshot_path: path of the screenshot file
+    :type screenshot_path: str
+    :param max_size: maximum width and height of the screenshot in pixels,
+        0 keeps its size
+    :type max_size: int
+    :return: base64 content of the screenshot
+    :rtype: str
+    """
+    content = Path(screenshot_path).read_bytes()
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                content = _get_png(image, max_size)
+        except OSError:  # not an image Pillow can read, embedded as is
+            pass
+    return base64.b64encode(content).decode("ascii")
+
+
+class ScreenshotStore:  # pylint: disable=too-few-public-methods
+    """Content addressed store of the screenshots attached to the tests.
+
+    A screenshot is saved once per content, in a file named after its hash,
+    so that the identical screenshots of many tests share the same file. When
+    Pillow is installed, the screenshots are downsized to a maximum size,
+    recompressed, and a thumbnail is saved for the html report. The sizes are
+    then part of the file names, a session with other sizes saves new files.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: int = 0,
+        thumbnail_size: int = 240,
+    ) -> None:
+        """Initialize screenshot store.
+
+        :param directory: directory the screenshots are saved in
+        :type directory: Path
+        :param max_size: maximum width and height of the screenshots in pixels,
+            0 keeps their size
+        :type max_size: int
+        :param thumbnail_size: maximum width and height of the thumbnails
+        :type thumbnail_size: int
+        """
+        self._directory = directory
+        self._max_size = max_size
+        self._thumbnail_size = thumbnail_size
+        self._screenshots: dict[str, tuple[Path, Path]] = {}
+
+    def _save(self, content: bytes, path: Path, thumbnail_path: Path) -> None:
+        if Image is None:
+            _write_atomically(path, content)
+            return
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                _write_atomically(path, _get_png(image.copy(), self._max_size))
+                _write_atomically(
+                    thumbnail_path,
+                    _get_png(image, self._thumbnail_size),
+                )
+        except OSError:  # not an image Pillow can read, saved as is
+            _write_atomically(path, content)
+            _write_atomically(thumbnail_path, content)
+
+    def add(self, screenshot_path: str) -> tuple[Path, Path]:
+        """Save a screenshot, unless a screenshot with the same content is saved.
+
+        :param screenshot_path: path of the screenshot file
+        :type screenshot_path: str
+        :return: path of the saved screenshot and of its thumbnail, which is the
+            screenshot itself without Pillow
+        :rtype: tuple[Path, Path]
+        """
+        content = Path(screenshot_path).read_bytes()
+        digest = hashlib.sha256(content).hexdigest()[:_HASH_LENGTH]
+        if digest not in self._screenshots:
+            if Image is None:
+                path = thumbnail_path = self._directory / f"{digest}.png"
+            else:
+                path = self._directory / f"{digest}_{self._max_size}.png"
+                thumbnail_path = (
+                    self._directory / f"{digest}_thumbnail_{self._thumbnail_size}.png"
+                )
+            # saved by another xdist worker or a previous session
+            if not (path.exists() and thumbnail_path.exists()):
+                self._directory.mkdir(parents=True, exist_ok=True)
+                self._save(content, path, thumbnail_path)
+            self._screenshots[digest] = (path, thumbnail_path)
+        return self._screenshots[digest]
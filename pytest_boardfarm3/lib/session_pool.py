@@ -0,0 +1,360 @@
+"""Pools of device sessions, opened while the tests start and reused by them."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+import pytest
+
+from pytest_boardfarm3.exceptions import BoardfarmPluginError
+
+if TYPE_CHECKING:
+    from boardfarm3.devices.base_devices import BoardfarmDevice
+    from boardfarm3.lib.device_manager import DeviceManager
+
+_LOGGER = logging.getLogger(__name__)
+
+# maximum number of sessions opened or closed at the same time
+_MAX_WORKERS = 32
+# maximum time in seconds waited for the sessions before the devices release
+_CLOSE_TIMEOUT = 120
+
+# set on the tests with a failed phase, their sessions are not reused
+TEST_FAILED_KEY = pytest.StashKey[bool]()
+
+
+class _DaemonThreadPool:
+    """Pool of daemon threads running functions, like a ThreadPoolExecutor.
+
+    The threads of a ThreadPoolExecutor are joined when the interpreter
+    exits, hence a session hung while being opened or closed would block the
+    end of pytest. The daemon threads of this pool are abandoned instead.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str) -> None:
+        """Initialize daemon thread pool and start its threads.
+
+        :param max_workers: number of threads
+        :type max_workers: int
+        :param thread_name_prefix: prefix of the thread names
+        :type thread_name_prefix: str
+        """
+        self._tasks: queue.SimpleQueue[
+            tuple[Future, Callable[..., Any], tuple[Any, ...]] | None
+        ] = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(
+                target=self._run_tasks,
+                name=f"{thread_name_prefix}_{index}",
+                daemon=True,
+            )
+            for index in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run_tasks(self) -> None:
+        while (task := self._tasks.get()) is not None:
+            future, function, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except BaseException as exception:  # pylint: disable=broad-except  # noqa: BLE001
+                future.set_exception(exception)
+
+    def submit(self, function: Callable[..., Any], *args: Any) -> Future:  # noqa: ANN401
+        """Run a function in a thread of the pool.
+
+        :param function: function to run
+        :type function: Callable[..., Any]
+        :param args: arguments of the function
+        :type args: Any
+        :return: future of the result of the function
+        :rtype: Future
+        """
+        future: Future = Future()
+        self._tasks.put((future, function, args))
+        return future
+
+    def shutdown(self) -> None:
+        """Cancel the functions not started yet and stop the threads.
+
+        The threads stop once their running function returns, they are not
+        waited for.
+        """
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                task[0].cancel()
+        for _ in self._threads:
+            self._tasks.put(None)
+
+
+@dataclass
+class _SessionPoolSpec:
+    device_type: type[BoardfarmDevice]
+    open_session: Callable[[Any], Any]
+    close_session: Callable[[Any], None] | None
+    size: int
+
+
+class DeviceSessionPool:
+    """Pool of the sessions of a device, e.g. logged in shells.
+
+    The sessions are opened in the background, a test waits for a pending
+    session rather than opening its own one, unless no session is left.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        device: BoardfarmDevice,
+        spec: _SessionPoolSpec,
+    ) -> None:
+        """Initialize device session pool.
+
+        :param name: pool name
+        :type name: str
+        :param device: device the sessions are opened on
+        :type device: BoardfarmDevice
+        :param spec: pool specification
+        :type spec: _SessionPoolSpec
+        """
+        self.name = name
+        self.device = device
+        self._spec = spec
+        self._lock = threading.Lock()
+        self._idle: list[Any] = []
+        self._pending: list[Future] = []
+
+    def _open(self) -> Any:  # noqa: ANN401
+        return self._spec.open_session(self.device)
+
+    def warm_up(self, executor: _DaemonThreadPool) -> None:
+        """Open the sessions of the pool in the background.
+
+        :param executor: thread pool the sessions are opened with
+        :type executor: _DaemonThreadPool
+        """
+        with self._lock:
+            self._pending.extend(
+                executor.submit(self._open) for _ in range(self._spec.size)
+            )
+
+    def acquire(self) -> Any:  # noqa: ANN401
+        """Get an idle session, or open a new one when none is left.
+
+        :return: device session
+        :rtype: Any
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            pending = next(
+                (future for future in self._pending if future.done()),
+                self._pending[0] if self._pending else None,
+            )
+            if pending is not None:
+                self._pending.remove(pending)
+        if pending is not None:
+            try:
+                return pending.result()
+            except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+                _LOGGER.warning(
+                    "Failed to warm up a %s session of %s, opening a new one.",
+                    self.name,
+                    self.device.device_name,
+                    exc_info=True,
+                )
+        return self._open()
+
+    def release(self, session: Any) -> None:  # noqa: ANN401
+        """Give a session back to the pool, for the next tests.
+
+        :param session: device session
+        :type session: Any
+        """
+        with self._lock:
+            self._idle.append(session)
+
+    def discard(self, session: Any) -> None:  # noqa: ANN401
+        """Close a session which may be unusable, e.g. used by a failed test.
+
+        :param session: device session
+        :type session: Any
+        """
+        if self._spec.close_session is not None:
+            self._spec.close_session(session)
+
+    def pop_sessions(self, timeout: float | None = None) -> list[Any]:
+        """Remove the idle sessions from the pool, waiting for the pending ones.
+
+        The sessions still being opened after the timeout are abandoned.
+
+        :param timeout: maximum time in seconds to wait for the pending
+            sessions, None waits until they are all opened
+        :type timeout: float | None
+        :return: sessions of the pool
+        :rtype: list[Any]
+        """
+        with self._lock:
+            sessions, self._idle = self._idle, []
+            pending, self._pending = self._pending, []
+        done, not_done = wait(pending, timeout=timeout)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            _LOGGER.warning(
+                "Abandoning %s %s sessions of %s still being opened.",
+                len(not_done),
+                self.name,
+                self.device.device_name,
+            )
+        return sessions + [
+            future.result() for future in done if future.exception() is None
+        ]
+
+
+class SessionPools:
+    """Pools of device sessions, registered with pytest_boardfarm_session_pools.
+
+    A pool of each registered name is created for every deployed device of
+    the registered type. The sessions are opened concurrently, in threads,
+    once the devices are deployed, while the first tests already run on the
+    same devices. They are closed concurrently before the devices are
+    released, waiting at most a couple of minutes for the slow ones.
+    """
+
+    def __init__(self) -> None:
+        """Initialize session pools."""
+        self._specs: dict[str, _SessionPoolSpec] = {}
+        self._pools: dict[str, dict[str, DeviceSessionPool]] = {}
+        self._executor: _DaemonThreadPool | None = None
+
+    def register(  # noqa: PLR0913
+        self,
+        name: str,
+        device_type: type[BoardfarmDevice],
+        open_session: Callable[[Any], Any],
+        close_session: Callable[[Any], None] | None = None,
+        *,
+        size: int = 1,
+    ) -> None:
+        """Register a pool of sessions opened on the devices of a type.
+
+        :param name: pool name, used by the tests to get a session
+        :type name: str
+        :param device_type: type of the devices the sessions are opened on
+        :type device_type: type[BoardfarmDevice]
+        :param open_session: open a session on the given device
+        :type open_session: Callable[[Any], Any]
+        :param close_session: close the given session, defaults to None
+        :type close_session: Callable[[Any], None] | None
+        :param size: number of sessions opened on each device, defaults to 1
+        :type size: int
+        """
+        self._specs[name] = _SessionPoolSpec(
+            device_type,
+            open_session,
+            close_session,
+            size,
+        )
+
+    def warm_up(self, device_manager: DeviceManager) -> None:
+        """Create the pools of the deployed devices and open their sessions.
+
+        :param device_manager: boardfarm device manager
+        :type device_manager: DeviceManager
+        """
+        self._pools = {
+            name: {
+                device_name: DeviceSessionPool(name, device, spec)
+                for device_name, device in device_manager.get_devices_by_type(
+                    spec.device_type,
+                ).items()
+            }
+            for name, spec in self._specs.items()
+        }
+        sessions_count = sum(
+            self._specs[name].size * len(pools) for name, pools in self._pools.items()
+        )
+        if not sessions_count:
+            return
+        self._executor = _DaemonThreadPool(
+            max_workers=min(sessions_count, _MAX_WORKERS),
+            thread_name_prefix="boardfarm-session-pool",
+        )
+        for pools in self._pools.values():
+            for pool in pools.values():
+                pool.warm_up(self._executor)
+
+    def get_pool(self, name: str, device_name: str | None = None) -> DeviceSessionPool:
+        """Get the session pool of a device.
+
+        :param name: pool name
+        :type name: str
+        :param device_name: device name, defaults to the first device of the pool
+        :type device_name: str | None
+        :raises BoardfarmPluginError: when the pool or the device is unknown
+        :return: session pool of the device
+        :rtype: DeviceSessionPool
+        """
+        pools = self._pools.get(name)
+        if not pools:
+            err_msg = f"No {name!r} session pool, or no device of its type."
+            raise BoardfarmPluginError(err_msg)
+        if device_name is None:
+            device_name = sorted(pools)[0]
+        if device_name not in pools:
+            err_msg = f"No {name!r} session pool for device {device_name!r}."
+            raise BoardfarmPluginError(err_msg)
+        return pools[device_name]
+
+    def close(self, timeout: float = _CLOSE_TIMEOUT) -> None:
+        """Close the sessions of all the pools concurrently.
+
+        The sessions still being opened or closed after the timeout are
+        abandoned, so that a hung session does not block the devices release.
+
+        :param timeout: maximum time in seconds to wait for the sessions
+        :type timeout: float
+        """
+        deadline = time.monotonic() + timeout
+        closing_sessions = [
+            (pool, session)
+            for pools in self._pools.values()
+            for pool in pools.values()
+            for session in pool.pop_sessions(max(deadline - time.monotonic(), 0))
+        ]
+        self._pools = {}
+        if self._executor is None:
+            return
+        futures = [
+            self._executor.submit(pool.discard, session)
+            for pool, session in closing_sessions
+        ]
+        done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        for future in done:
+            if future.exception() is not None:
+                _LOGGER.warning(
+                    "Failed to close a device session.",
+                    exc_info=future.exception(),
+                )
+        if not_done:
+            _LOGGER.warning(
+                "Abandoning %s device sessions still being closed.",
+                len(not_done),
+            )
+        # the hung sessions do not block the interpreter exit
+        self._executor.shutdown()
+        self._executor = None
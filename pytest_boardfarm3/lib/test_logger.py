@@ -1,26 +1,100 @@
 """Log wrapper module."""
 
+from __future__ import annotations
+
 import logging
 import os
+import time
+from typing import Any
+
+import pytest
+
+
+def _get_test_name(nodeid: str) -> str:
+    return nodeid.split("::")[1].replace(" ", "_")
+
 
+class TestLogger:
+    """Log wrapper to log test steps from tests.
 
-class TestLogger:  # pylint: disable=too-few-public-methods
-    """Log wrapper to log test steps from tests."""
+    The steps of a test are recorded in a timeline, with their index and
+    monotonic timestamp, which the pytest plugin attaches to the reports of the
+    test. The test is resolved once, when the plugin starts its timeline.
+    """
 
     __test__ = False  # Fix PytestCollectionWarning
 
     def __init__(self) -> None:
         """Initialize log wrapper."""
         self._logger = logging.getLogger("test-logger")
+        self._nodeid: str | None = None
+        self._test_name: str | None = None
+        self._steps: list[dict[str, Any]] = []
+        self._reported_steps = 0
+        self._last_step_time = time.monotonic()
+
+    def start_test(self, nodeid: str) -> None:
+        """Start the step timeline of a test.
+
+        :param nodeid: test node id
+        :type nodeid: str
+        """
+        self._nodeid = nodeid
+        self._test_name = _get_test_name(nodeid)
+        self._steps = []
+        self._reported_steps = 0
+        self._last_step_time = time.monotonic()
+
+    def stop_test(self) -> None:
+        """Stop the step timeline of the current test."""
+        self._nodeid = self._test_name = None
+
+    def get_steps(self) -> list[dict[str, Any]]:
+        """Get the steps logged by the current test.
+
+        :return: steps of the test, in the order they were logged
+        :rtype: list[dict[str, Any]]
+        """
+        return list(self._steps)
+
+    def pop_new_steps(self) -> list[dict[str, Any]]:
+        """Get the steps logged since the last call, e.g. in a test phase.
+
+        :return: new steps of the test, in the order they were logged
+        :rtype: list[dict[str, Any]]
+        """
+        new_steps = self._steps[self._reported_steps :]
+        self._reported_steps = len(self._steps)
+        return new_steps
 
     def log_step(self, message: str) -> None:
         """Log test step.
 
         :param message: Log message
         """
-        testname = (
-            (os.environ.get("PYTEST_CURRENT_TEST").split(" (setup)")[0])
-            .split("::")[1]
-            .replace(" ", "_")
+        timestamp = time.monotonic()
+        nodeid, test_name = self._nodeid, self._test_name
+        if nodeid is None:
+            # not started by the plugin, e.g. a logger created by the test
+            nodeid = os.environ["PYTEST_CURRENT_TEST"].rsplit(" (", 1)[0]
+            test_name = _get_test_name(nodeid)
+        step = {
+            "test": nodeid,
+            "index": len(self._steps) + 1,
+            "message": message,
+            "timestamp": timestamp,
+            "elapsed": timestamp - self._last_step_time,
+        }
+        self._last_step_time = timestamp
+        if self._nodeid is not None:
+            self._steps.append(step)
+        self._logger.info(
+            "[*****LOGGING-STEP*****][%s][%s]",
+            test_name,
+            message,
+            extra={"boardfarm_step": step},
         )
-        self._logger.info("[*****LOGGING-STEP*****][%s][%s]", testname, message)
+
+
+# test logger of the session, shared by the bf_logger fixture and the plugin
+TEST_LOGGER_KEY = pytest.StashKey[TestLogger]()
@@ -0,0 +1,126 @@
+"""Per test timing breakdown of the boardfarm plugin hot path."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pytest import TestReport  # noqa: PT013
+
+# timing fields shown in the html report, with their column title
+TIMING_COLUMNS = {
+    "env_req_matching": "Env matching",
+    "contingency_check": "Contingency check",
+    "fixture_setup": "Fixture setup",
+    "teardown": "Teardown",
+}
+
+
+def get_report_timings(report: TestReport) -> dict[str, float]:
+    """Get timing breakdown saved on a test report by the boardfarm plugin.
+
+    :param report: test execution report
+    :type report: TestReport
+    :return: durations in seconds of the test phase of the report
+    :rtype: dict[str, float]
+    """
+    return getattr(report, "boardfarm_timings", None) or {}
+
+
+def get_report_steps(report: TestReport) -> list[dict[str, Any]]:
+    """Get test steps saved on a test report by the boardfarm plugin.
+
+    :param report: test execution report
+    :type report: TestReport
+    :return: steps logged with the test logger in the test phase of the report
+    :rtype: list[dict[str, Any]]
+    """
+    return getattr(report, "boardfarm_steps", None) or []
+
+
+def get_test_outcome(outcome: str | None, report: TestReport) -> str | None:
+    """Get the outcome of a test, updated with the report of one of its phases.
+
+    :param outcome: outcome of the test given by its previous phases
+    :type outcome: str | None
+    :param report: test execution report
+    :type report: TestReport
+    :return: outcome of the call phase, or 'error' when setup or teardown failed
+    :rtype: str | None
+    """
+    if report.when != "call" and report.passed:
+        return outcome
+    return "error" if report.failed and report.when != "call" else report.outcome
+
+
+class TestTimingsRecorder:
+    """Timing breakdown of the tests, gathered from their reports.
+
+    The reports of each phase (setup, call and teardown) of a test carry
+    the durations and logged steps of that phase only, they are merged per
+    test.
+    """
+
+    __test__ = False  # Fix PytestCollectionWarning
+
+    def __init__(self) -> None:
+        """Initialize test timings recorder."""
+        self._records: dict[str, dict[str, Any]] = {}
+
+    def add_report(self, report: TestReport) -> None:
+        """Add the timing breakdown of a test phase report.
+
+        :param report: test execution report
+        :type report: TestReport
+        """
+        record = self._records.setdefault(
+            report.nodeid,
+            {"nodeid": report.nodeid, "outcome": None, "timings": {}},
+        )
+        record["timings"].update(get_report_timings(report))
+        if steps := get_report_steps(report):
+            record.setdefault("steps", []).extend(steps)
+        record["outcome"] = get_test_outcome(record["outcome"], report)
+
+    def get_timings(self, nodeid: str) -> dict[str, float]:
+        """Get timing breakdown of a test.
+
+        :param nodeid: test node id
+        :type nodeid: str
+        :return: durations in seconds of the test phases
+        :rtype: dict[str, float]
+        """
+        record = self._records.get(nodeid)
+        return {} if record is None else record["timings"]
+
+    def get_steps(self, nodeid: str) -> list[dict[str, Any]]:
+        """Get step timeline of a test.
+
+        :param nodeid: test node id
+        :type nodeid: str
+        :return: steps logged in the test phases, in the order they were logged
+        :rtype: list[dict[str, Any]]
+        """
+        return self._records.get(nodeid, {}).get("steps", [])
+
+    def discard(self, nodeid: str) -> None:
+        """Forget the timing breakdown and steps of a test.
+
+        :param nodeid: test node id
+        :type nodeid: str
+        """
+        self._records.pop(nodeid, None)
+
+    def save(self, path: str) -> None:
+        """Save the timing breakdown of the tests as a json lines file.
+
+        :param path: json lines file path
+        :type path: str
+        """
+        timings_path = Path(path)
+        timings_path.parent.mkdir(parents=True, exist_ok=True)
+        with timings_path.open("w", encoding="utf-8") as timings_file:
+            for record in self._records.values():
+                timings_file.write(json.dumps(record) + "\n")
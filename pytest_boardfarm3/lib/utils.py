@@ -1,37 +1,161 @@
 """Pytest boardfarm utils."""
 
+from __future__ import annotations
+
+import json
+import logging
 import re
 import sys
-from typing import Any, Callable
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
 
 from _pytest.logging import LoggingPlugin, _remove_ansi_escape_sequences, catching_logs
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from pathlib import Path
+
+_CONTAINS_CHECKS = (
+    "contains_exact",
+    "not_contains_exact",
+    "contains_regex",
+    "not_contains_regex",
+)
+
 
-def _perform_contains_check(
+def _compile_contains_check(check: str, value: str) -> Callable[[str], bool]:
+    negate = check.startswith("not_")
+    if check.endswith("_regex"):
+        search = re.compile(value).search
+        return lambda boardfarm_env: (search(boardfarm_env) is None) is negate
+    return lambda boardfarm_env: (value not in boardfarm_env) is negate
+
+
+def _compile_contains_checks(
     test_env_request: list[dict[str, str]],
-    boardfarm_env: str,
-) -> bool:
-    checks_dict: dict[str, Any] = {
-        "contains_exact": lambda value, env_req: value in env_req,
-        "not_contains_exact": lambda value, env_req: value not in env_req,
-        "contains_regex": re.search,
-        "not_contains_regex": lambda value, env_req: not re.search(value, env_req),
-    }
+) -> list[Callable[[str], bool]]:
     if invalid_checks := {
         next(iter(item.keys()))
         for item in test_env_request
-        if next(iter(item.keys())) not in checks_dict
+        if next(iter(item.keys())) not in _CONTAINS_CHECKS
     }:
         err_msg = (
             f"Invalid contains checks: {invalid_checks}, please check "
             "your env_req marker"
         )
         raise ValueError(err_msg)
-    for contains_check in test_env_request:
-        check, value = next(iter(contains_check.items()))
-        if not checks_dict[check](value, boardfarm_env):
-            return False
-    return True
+    return [
+        _compile_contains_check(*next(iter(contains_check.items())))
+        for contains_check in test_env_request
+    ]
+
+
+class _CompiledEnvRequest:  # pylint: disable=too-few-public-methods
+    """Test environment request compiled into a tree of matchers.
+
+    The request side of the comparison is resolved once, so only the
+    boardfarm environment side is inspected while matching.
+    """
+
+    __slots__ = ("_children", "_contains_checks", "_items", "_request")
+
+    def __init__(self, test_env_request: Any) -> None:  # noqa: ANN401
+        """Compile the given test environment request.
+
+        :param test_env_request: test environment request
+        """
+        self._request = test_env_request
+        self._children: dict[str, _CompiledEnvRequest] = (
+            {k: _CompiledEnvRequest(v) for k, v in test_env_request.items()}
+            if isinstance(test_env_request, dict)
+            else {}
+        )
+        self._items: list[_CompiledEnvRequest] = (
+            [_CompiledEnvRequest(item) for item in test_env_request]
+            if isinstance(test_env_request, list)
+            else []
+        )
+        # contains checks are compiled on first use, as the same request
+        # might never be compared with a string in the boardfarm environment
+        self._contains_checks: list[Callable[[str], bool]] | None = None
+
+    def _is_contains_request(self) -> bool:
+        return isinstance(self._request, list) and all(
+            isinstance(contains_check_dict, dict) and len(contains_check_dict) == 1
+            for contains_check_dict in self._request
+        )
+
+    def _perform_contains_check(self, boardfarm_env: str) -> bool:
+        if self._contains_checks is None:
+            self._contains_checks = _compile_contains_checks(self._request)
+        return all(check(boardfarm_env) for check in self._contains_checks)
+
+    def is_matching(self, boardfarm_env: Any) -> bool:  # noqa: ANN401
+        """Check the compiled request is a subset of boardfarm environment.
+
+        :param boardfarm_env: boardfarm environment data
+        :return: True if test environment requirements are met, otherwise False
+        """
+        request = self._request
+        is_matching = False
+        if request is None:
+            is_matching = True
+        elif (
+            isinstance(request, dict)
+            and isinstance(boardfarm_env, dict)
+            and all(
+                child.is_matching(boardfarm_env.get(k))
+                for k, child in self._children.items()
+            )
+        ):
+            is_matching = True
+        elif (
+            isinstance(request, list)
+            and isinstance(boardfarm_env, (str, int, float, bool))
+            and boardfarm_env in request
+        ):
+            is_matching = True
+        elif (
+            isinstance(boardfarm_env, list)
+            and isinstance(request, (str, int, float, bool))
+            and request in boardfarm_env
+        ):
+            is_matching = True
+        elif (
+            isinstance(request, dict)
+            and isinstance(boardfarm_env, list)
+            and any(self.is_matching(item) for item in boardfarm_env)
+        ):
+            is_matching = True
+        elif (
+            isinstance(request, list)
+            and isinstance(boardfarm_env, list)
+            and all(item.is_matching(boardfarm_env) for item in self._items)
+        ):
+            is_matching = True
+        elif (
+            isinstance(request, list)
+            and isinstance(boardfarm_env, dict)
+            and any(item.is_matching(boardfarm_env) for item in self._items)
+        ):
+            is_matching = True
+        elif request == boardfarm_env:
+            is_matching = True
+        elif isinstance(boardfarm_env, str) and self._is_contains_request():
+            is_matching = self._perform_contains_check(boardfarm_env)
+        return is_matching
+
+
+def get_env_req_key(test_env_request: Any) -> str:  # noqa: ANN401
+    """Get canonical key of a test environment request.
+
+    Requests that only differ in the order of their dictionary keys share
+    the same key.
+
+    :param test_env_request: test environment request
+    :return: canonical test environment request key
+    """
+    return json.dumps(test_env_request, sort_keys=True, default=repr)
 
 
 def is_env_matching(test_env_request: Any, boardfarm_env: Any) -> bool:  # noqa: ANN401
@@ -46,66 +170,212 @@ def is_env_matching(test_env_request: Any, boardfarm_env: Any) -> bool:  # noqa:
     :param boardfarm_env: boardfarm environment data
     :return: True if test environment requirements are met, otherwise False
     """
-    is_matching = False
-    if test_env_request is None:
-        is_matching = True
-    elif (
-        isinstance(test_env_request, dict)
-        and isinstance(boardfarm_env, dict)
-        and all(
-            is_env_matching(v, boardfarm_env.get(k))
-            for k, v in test_env_request.items()
-        )
-    ):
-        is_matching = True
-    elif (
-        isinstance(test_env_request, list)
-        and isinstance(boardfarm_env, (str, int, float, bool))
-        and boardfarm_env in test_env_request
-    ):
-        is_matching = True
-    elif (
-        isinstance(boardfarm_env, list)
-        and isinstance(test_env_request, (str, int, float, bool))
-        and test_env_request in boardfarm_env
-    ):
-        is_matching = True
-    elif (
-        isinstance(test_env_request, dict)
-        and isinstance(boardfarm_env, list)
-        and any(is_env_matching(test_env_request, item) for item in boardfarm_env)
-    ):
-        is_matching = True
-    elif (
-        isinstance(test_env_request, list)
-        and isinstance(boardfarm_env, list)
-        and all(is_env_matching(item, boardfarm_env) for item in test_env_request)
-    ):
-        is_matching = True
-    elif (
-        isinstance(test_env_request, list)
-        and isinstance(boardfarm_env, dict)
-        and any(is_env_matching(item, boardfarm_env) for item in test_env_request)
-    ):
-        is_matching = True
-    elif test_env_request == boardfarm_env:
-        is_matching = True
-    elif (
-        isinstance(test_env_request, list)
-        and isinstance(boardfarm_env, str)
-        and all(
-            isinstance(contains_check_dict, dict) and len(contains_check_dict) == 1
-            for contains_check_dict in test_env_request
+    return _CompiledEnvRequest(test_env_request).is_matching(boardfarm_env)
+
+
+class EnvReqMatcher:  # pylint: disable=too-few-public-methods
+    """Match test environment requests against a boardfarm environment.
+
+    The boardfarm environment does not change once the session has started,
+    hence the match result of each distinct env_req marker is computed only
+    once and reused for every test carrying the same marker.
+    """
+
+    def __init__(self, boardfarm_env: Any) -> None:  # noqa: ANN401
+        """Initialize env_req matcher.
+
+        :param boardfarm_env: boardfarm environment data
+        """
+        self._boardfarm_env = boardfarm_env
+        self._results: dict[str, bool] = {}
+
+    def is_matching(self, test_env_request: Any) -> bool:  # noqa: ANN401
+        """Check test environment request is a subset of boardfarm environment.
+
+        :param test_env_request: test environment request
+        :return: True if test environment requirements are met, otherwise False
+        """
+        key = get_env_req_key(test_env_request)
+        if key not in self._results:
+            self._results[key] = _CompiledEnvRequest(test_env_request).is_matching(
+                self._boardfarm_env,
+            )
+        return self._results[key]
+
+
+def _get_env_req_leaves(
+    test_env_request: Any,  # noqa: ANN401
+    path: tuple[str, ...] = (),
+) -> set[tuple[tuple[str, ...], str]]:
+    if not isinstance(test_env_request, dict):
+        return {(path, get_env_req_key(test_env_request))}
+    leaves: set[tuple[tuple[str, ...], str]] = set()
+    for key, value in test_env_request.items():
+        leaves |= _get_env_req_leaves(value, (*path, key))
+    return leaves
+
+
+def get_env_affinity_order(test_env_requests: Sequence[Any]) -> list[int]:
+    """Get the execution order of tests grouping them by environment request.
+
+    Tests without an environment request run first. Tests requesting the same
+    environment run one after the other, keeping their relative order. Each
+    group of tests is followed by the remaining group with the closest
+    environment request, i.e. the least number of different values, so that
+    the board is reconfigured as little as possible between tests.
+
+    :param test_env_requests: environment request of each test, None if none
+    :return: indices of the tests in execution order
+    """
+    clusters: dict[str | None, list[int]] = {}
+    for index, test_env_request in enumerate(test_env_requests):
+        key = None if test_env_request is None else get_env_req_key(test_env_request)
+        clusters.setdefault(key, []).append(index)
+    order = clusters.pop(None, [])
+    leaves = {
+        key: _get_env_req_leaves(test_env_requests[indices[0]])
+        for key, indices in clusters.items()
+    }
+    remaining = list(clusters)
+    current = remaining[0] if remaining else None
+    while current is not None:
+        order.extend(clusters[current])
+        remaining.remove(current)
+        distances = [len(leaves[key] ^ leaves[current]) for key in remaining]
+        # the first of the closest groups, in order of appearance
+        current = remaining[distances.index(min(distances))] if remaining else None
+    return order
+
+
+class TestNamesIndex:  # pylint: disable=too-few-public-methods
+    """Index of the test names given to select the tests to be executed.
+
+    A test name selects the collected tests named ``test_<name>`` (dashes
+    replaced by underscores), their parametrized variants and the tests with a
+    ``<name>-`` parameter id. The names are indexed by length, so selecting a
+    test costs a few set lookups per separator in its name instead of a
+    comparison with every given test name.
+    """
+
+    __test__ = False  # Fix PytestCollectionWarning
+
+    def __init__(self, test_names: Iterable[str]) -> None:
+        """Index given test names.
+
+        :param test_names: names of the tests to be selected
+        """
+        self._names = set(test_names) - {""}
+        self._test_names = {f"test_{name.replace('-', '_')}" for name in self._names}
+        self._names_lengths = sorted({len(name) for name in self._names})
+        self._test_names_lengths = sorted({len(name) for name in self._test_names})
+
+    @staticmethod
+    def _has_name_before(
+        item_name: str,
+        separator: str,
+        names: set[str],
+        names_lengths: list[int],
+    ) -> bool:
+        end = item_name.find(separator)
+        while end != -1:
+            for length in names_lengths:
+                if length > end:
+                    break
+                if item_name[end - length : end] in names:
+                    return True
+            end = item_name.find(separator, end + 1)
+        return False
+
+    def is_selected(self, item_name: str) -> bool:
+        """Check whether the given collected test is selected.
+
+        :param item_name: name of the collected test item
+        :return: True if the test is selected, otherwise False
+        """
+        return (
+            item_name in self._test_names
+            or self._has_name_before(
+                item_name,
+                "[",
+                self._test_names,
+                self._test_names_lengths,
+            )
+            or self._has_name_before(item_name, "-", self._names, self._names_lengths)
         )
-    ):
-        is_matching = _perform_contains_check(test_env_request, boardfarm_env)
-    return is_matching
+
+
+class _LogTailHandler(logging.Handler):
+    """Log handler streaming the records to a file, keeping only a tail in memory.
+
+    The records are written without ANSI escape sequences as they are emitted,
+    so the memory usage does not grow with the amount of captured logs.
+    """
+
+    def __init__(self, log_file: Path, tail_lines: int) -> None:
+        """Initialize log tail handler.
+
+        :param log_file: file to write all the log records to
+        :param tail_lines: number of last log lines to keep in memory
+        """
+        super().__init__()
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = log_file.open("w", encoding="utf-8")
+        self.tail: deque[str] = deque(maxlen=tail_lines)
+        self.dropped_lines = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write log record to the log file and to the tail.
+
+        :param record: log record
+        """
+        try:
+            message = _remove_ansi_escape_sequences(self.format(record))
+            self._stream.write(f"{message}\n")
+            lines = message.splitlines()
+            self.dropped_lines += max(
+                len(self.tail) + len(lines) - (self.tail.maxlen or 0),
+                0,
+            )
+            self.tail.extend(lines)
+        except Exception:  # pylint: disable=broad-except  # noqa: BLE001
+            self.handleError(record)
+
+    def close(self) -> None:
+        """Close the log file."""
+        with self.lock:  # type: ignore[union-attr]
+            self._stream.close()
+        super().close()
+
+
+def _stream_boardfarm_logs(
+    logging_plugin: LoggingPlugin,
+    function: Callable,
+    capture_to: dict,
+    log_file: Path,
+    tail_lines: int,
+) -> None:
+    handler = _LogTailHandler(log_file, tail_lines)
+    handler.setFormatter(logging_plugin.formatter)
+    capture_to["log_file"] = str(log_file)
+    with catching_logs(handler, logging_plugin.log_level):
+        try:
+            function()
+        except Exception:  # we capture all exceptions
+            capture_to["exception"] = sys.exc_info()
+            raise
+        finally:
+            handler.close()
+            capture_to["logs"] = "\n".join(handler.tail).strip()
+            capture_to["dropped_lines"] = handler.dropped_lines
 
 
 def capture_boardfarm_logs(
     logging_plugin: LoggingPlugin,
     function: Callable,
     capture_to: dict,
+    *,
+    log_file: Path | None = None,
+    tail_lines: int = 1000,
 ) -> None:
     """Capture boardfarm logs on given function execution.
 
@@ -113,10 +383,26 @@ def capture_boardfarm_logs(
     Both logs and exceptions are captured to the dictionary with keys 'logs' and
     'exception'. These values will be used for html report generation.
 
+    When a log file is given, the logs are streamed to it and only the last
+    lines are captured, along with the 'log_file' path and the number of
+    'dropped_lines'.
+
     :param logging_plugin: pytest logging plugin
     :param function: function that requires log capture
     :param capture_to: dictionary instance to save captured logs
+    :param log_file: file to stream the logs to, defaults to None
+    :param tail_lines: number of last log lines to capture with a log file,
+        defaults to 1000
     """
+    if log_file is not None:
+        _stream_boardfarm_logs(
+            logging_plugin,
+            function,
+            capture_to,
+            log_file,
+            tail_lines,
+        )
+        return
     with catching_logs(
         logging_plugin.report_handler,
         logging_plugin.log_level,
@@ -1,13 +1,24 @@
-"""pytest plugin for boardfarm."""
+"""pytest plugin for boardfarm.
+
+This module is loaded by every pytest run through its ``pytest11`` entry
+point, hence the boardfarm plugin and boardfarm itself are only imported
+once the command line asks for them.
+"""
+
+from __future__ import annotations
 
 import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from _pytest.config.argparsing import Parser
-from _pytest.nodes import Item
-from pytest import Config  # noqa: PT013
+from pytest_boardfarm3 import boardfarm_fixtures, hookspecs
+from pytest_boardfarm3.lib.utils import TestNamesIndex
 
-from pytest_boardfarm3 import boardfarm_fixtures
-from pytest_boardfarm3.boardfarm_plugin import BOARDFARM_PLUGIN_NAME, BoardfarmPlugin
+if TYPE_CHECKING:
+    from _pytest.config import PytestPluginManager
+    from _pytest.config.argparsing import Parser
+    from _pytest.nodes import Item
+    from pytest import Config  # noqa: PT013
 
 sys.setrecursionlimit(3000)
 
@@ -27,6 +38,27 @@ def pytest_addoption(parser: Parser) -> None:
         default=None,
         help="Test names for which the execution will be performed",
     )
+    parser.addoption(
+        "--test-names-file",
+        action="store",
+        default=None,
+        help=(
+            "File with test names (whitespace or newline separated) for which"
+            " the execution will be performed"
+        ),
+    )
+
+
+def pytest_addhooks(pluginmanager: PytestPluginManager) -> None:
+    """Add the boardfarm hook specifications.
+
+    The specifications are added even without the boardfarm plugin, so that
+    the conftest files implementing the hooks are valid in every pytest run.
+
+    :param pluginmanager: pytest plugin manager
+    :type pluginmanager: PytestPluginManager
+    """
+    pluginmanager.add_hookspecs(hookspecs)
 
 
 def pytest_load_initial_conftests(early_config: Config, args: list[str]) -> None:
@@ -39,13 +71,20 @@ def pytest_load_initial_conftests(early_config: Config, args: list[str]) -> None
     """
     early_config.pluginmanager.register(boardfarm_fixtures)
     if any(x for x in args if (x in ("--help", "-h") or x.startswith("--board"))):
+        # pylint: disable-next=import-outside-toplevel
+        from pytest_boardfarm3.boardfarm_plugin import (
+            BOARDFARM_PLUGIN_NAME,
+            BoardfarmPlugin,
+        )
+
         early_config.pluginmanager.register(BoardfarmPlugin(), BOARDFARM_PLUGIN_NAME)
 
 
 def pytest_collection_modifyitems(config: Config, items: list[Item]) -> None:
     """Discover the tests in the folder.
 
-    Select the test from the tests folder based on the value provided for --test-names
+    Select the test from the tests folder based on the value provided for
+    --test-names and the names listed in --test-names-file
 
     :param config: pytest config
     :type config: Config
@@ -55,21 +94,18 @@ def pytest_collection_modifyitems(config: Config, items: list[Item]) -> None:
     selected_tests = []
     deselected_tests = []
     test_names = config.getoption("--test-names")
+    test_names_file = config.getoption("--test-names-file")
 
-    if not test_names:
+    if not test_names and not test_names_file:
         return
 
-    test_list = test_names.split(" ")
+    test_list = test_names.split(" ") if test_names else []
+    if test_names_file:
+        test_list.extend(Path(test_names_file).read_text(encoding="utf-8").split())
+    test_names_index = TestNamesIndex(test_list)
     for item in items:
-        for test in test_list:
-            test_name = f"test_{test.replace('-', '_')}"
-            if (
-                test_name == item.name
-                or f"{test_name}[" in item.name
-                or f"{test}-" in item.name
-            ):
-                selected_tests.append(item)
-                break
+        if test_names_index.is_selected(item.name):
+            selected_tests.append(item)
         else:
             deselected_tests.append(item)
     items[:] = selected_tests
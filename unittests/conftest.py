@@ -0,0 +1,93 @@
+"""Fixtures of the unit tests of pytest-boardfarm."""
+
+from __future__ import annotations
+
+import json
+import textwrap
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest import Pytester, RunResult  # noqa: PT013
+
+pytest_plugins = ["pytester"]
+
+# boardfarm plugin of the fake devices, registered by the test session conftest
+_FAKE_DEVICES_PLUGIN = """
+from boardfarm3 import hookimpl
+from boardfarm3.devices.base_devices import BoardfarmDevice
+from boardfarm3.main import get_plugin_manager
+
+
+class FakeDevice(BoardfarmDevice):
+    @hookimpl
+    def boardfarm_skip_boot(self):
+        pass
+
+    @hookimpl
+    def contingency_check(self, env_req):
+        with open("contingency_checks.log", "a") as log_file:
+            log_file.write(self.device_name + "\\n")
+
+
+class FakeDevices:
+    @hookimpl
+    def boardfarm_add_devices(self):
+        return {"fake": FakeDevice}
+
+
+get_plugin_manager().register(FakeDevices())
+"""
+
+
+class BoardfarmPytester:  # pylint: disable=too-few-public-methods
+    """Pytester of test sessions deploying a board of fake devices."""
+
+    def __init__(self, pytester: Pytester) -> None:
+        """Initialize boardfarm pytester.
+
+        :param pytester: pytester of the test session
+        :type pytester: Pytester
+        """
+        self.pytester = pytester
+        pytester.makeconftest(_FAKE_DEVICES_PLUGIN)
+        inventory = {"board1": {"devices": [{"name": "board", "type": "fake"}]}}
+        env = {"environment_def": {"board": {"eRouter_Provisioning_mode": "dual"}}}
+        pytester.makefile(".json", inventory=json.dumps(inventory), env=json.dumps(env))
+
+    def run(self, test_module: str, *args: str) -> RunResult:
+        """Run the tests of a module in a pytest subprocess.
+
+        :param test_module: source code of the test module
+        :type test_module: str
+        :param args: additional pytest command line arguments
+        :type args: str
+        :return: result of the pytest run
+        :rtype: RunResult
+        """
+        self.pytester.makepyfile(test_module=textwrap.dedent(test_module))
+        return self.pytester.runpytest_subprocess(
+            "-p",
+            "no:randomly",
+            "--board-name",
+            "board1",
+            "--inventory-config",
+            "inventory.json",
+            "--env-config",
+            "env.json",
+            "--skip-boot",
+            *args,
+        )
+
+
+@pytest.fixture()
+def boardfarm_pytester(pytester: Pytester) -> BoardfarmPytester:
+    """Pytester of test sessions deploying a board of fake devices.
+
+    :param pytester: pytester of the test session
+    :type pytester: Pytester
+    :return: boardfarm pytester
+    :rtype: BoardfarmPytester
+    """
+    return BoardfarmPytester(pytester)
@@ -0,0 +1,16 @@
+"""Unit tests for argument_parser module in pytest-boardfarm."""
+
+from _pytest.config.argparsing import Parser
+
+from pytest_boardfarm3.lib.argument_parser import ArgumentParser
+
+
+def test_argument_parser_keeps_option_names() -> None:
+    """Ensure the names of the options added by boardfarm are kept."""
+    argparser = ArgumentParser(Parser())
+    argparser.add_argument("--board-name", help="board name")
+    argparser.add_argument_group("plugin").add_argument(
+        "--plugin-option",
+        dest="option_of_plugin",
+    )
+    assert argparser.dests == ["board_name", "option_of_plugin"]
@@ -0,0 +1,519 @@
+"""Unit tests for boardfarm_plugin module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from argparse import Namespace
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import pytest
+from boardfarm3 import hookimpl
+from boardfarm3.plugins import setup_environment
+from boardfarm3.plugins.hookspecs import core, devices
+from pluggy import PluginManager
+
+from pytest_boardfarm3.boardfarm_plugin import BoardfarmPlugin
+from pytest_boardfarm3.lib.screenshots import ScreenshotStore
+from pytest_boardfarm3.lib.utils import EnvReqMatcher
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from _pytest.mark import Mark, MarkDecorator
+
+    from .conftest import BoardfarmPytester
+
+_ENV_CONFIG = {"environment_def": {"board": {"eRouter_Provisioning_mode": "dual"}}}
+_DUAL_ENV_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}}
+_IPV4_ENV_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["ipv4"]}}}
+
+
+class _FakeItem:
+    def __init__(self, name: str, env_req: dict | None) -> None:
+        self.name = name
+        self.marks: list[Mark] = []
+        if env_req is not None:
+            self.marks.append(pytest.mark.env_req(env_req).mark)
+
+    def get_closest_marker(self, name: str) -> Mark | None:
+        return next((mark for mark in self.marks if mark.name == name), None)
+
+    def add_marker(self, marker: MarkDecorator) -> None:
+        self.marks.append(marker.mark)
+
+
+def _filter_tests(env_req_filter: str) -> tuple[list, list]:
+    plugin = BoardfarmPlugin()
+    plugin._env_req_matcher = EnvReqMatcher(_ENV_CONFIG)
+    deselected_tests: list = []
+    config = SimpleNamespace(
+        option=SimpleNamespace(env_req_filter=env_req_filter),
+        hook=SimpleNamespace(
+            pytest_deselected=lambda items: deselected_tests.extend(items),
+        ),
+    )
+    items = [
+        _FakeItem("test_dual", _DUAL_ENV_REQ),
+        _FakeItem("test_ipv4", _IPV4_ENV_REQ),
+        _FakeItem("test_any", None),
+    ]
+    plugin._filter_tests_by_env_req(config, items)  # type: ignore[arg-type]
+    return items, deselected_tests
+
+
+def test_env_req_filter_setup_keeps_all_tests() -> None:
+    """Ensure the default filter leaves the tests to their setup."""
+    items, deselected_tests = _filter_tests("setup")
+    assert [item.name for item in items] == ["test_dual", "test_ipv4", "test_any"]
+    assert not deselected_tests
+    assert all(item.get_closest_marker("skip") is None for item in items)
+
+
+def test_env_req_filter_skip_marks_mismatching_tests() -> None:
+    """Ensure the skip filter keeps the mismatching tests, marked as skipped."""
+    items, deselected_tests = _filter_tests("skip")
+    assert [item.name for item in items] == ["test_dual", "test_ipv4", "test_any"]
+    assert not deselected_tests
+    skipped_tests = [
+        item.name for item in items if item.get_closest_marker("skip") is not None
+    ]
+    assert skipped_tests == ["test_ipv4"]
+    assert items[1].get_closest_marker("skip").kwargs == {
+        "reason": "Environment mismatch. Skipping",
+    }
+
+
+def test_env_req_filter_deselect_removes_mismatching_tests() -> None:
+    """Ensure the deselect filter removes and reports the mismatching tests."""
+    items, deselected_tests = _filter_tests("deselect")
+    assert [item.name for item in items] == ["test_dual", "test_any"]
+    assert [item.name for item in deselected_tests] == ["test_ipv4"]
+    assert all(item.get_closest_marker("skip") is None for item in items)
+
+
+class _FakeDeployment:
+    def __init__(self) -> None:
+        self.events: list[str] = []
+
+    @hookimpl
+    def boardfarm_register_devices(self) -> object:
+        return SimpleNamespace()
+
+    @hookimpl
+    def boardfarm_device_boot(self) -> None:
+        self.events.append("device_boot")
+
+    @hookimpl
+    async def boardfarm_setup_env(self, device_manager: object) -> object:
+        self.events.append("boardfarm_setup_env")
+        return device_manager
+
+
+def test_deploy_concurrency_falls_back_to_overridden_setup_env() -> None:
+    """Ensure an overridden boardfarm_setup_env hook is still called."""
+    fake_deployment = _FakeDeployment()
+    plugin_manager = PluginManager("boardfarm")
+    plugin_manager.add_hookspecs(core)
+    plugin_manager.add_hookspecs(devices)
+    plugin_manager.register(setup_environment)
+    plugin_manager.register(fake_deployment)
+    plugin = BoardfarmPlugin()
+    plugin._plugin_manager = plugin_manager
+    plugin._session_config = SimpleNamespace(  # type: ignore[assignment]
+        option=Namespace(deploy_concurrency=4, skip_boot=False),
+    )
+    plugin.event_loop = asyncio.new_event_loop()
+    try:
+        plugin.deploy_boardfarm_devices()
+    finally:
+        plugin.event_loop.close()
+    assert fake_deployment.events == ["boardfarm_setup_env"]
+    phases = plugin._deployment_profile.as_dict()["phases"]
+    assert [phase["name"] for phase in phases] == [
+        "boardfarm_register_devices",
+        "boardfarm_setup_env",
+    ]
+
+
+def test_negative_deployment_logs_tail_is_a_usage_error() -> None:
+    """Ensure a negative --deployment-logs-tail is rejected at configuration."""
+    config = SimpleNamespace(option=Namespace(deployment_logs_tail=-1))
+    with pytest.raises(pytest.UsageError, match="--deployment-logs-tail"):
+        BoardfarmPlugin().pytest_configure(config)  # type: ignore[arg-type]
+
+
+def test_kept_devices_are_reused_without_changing_the_options(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ensure kept devices are only connected to, the options are unchanged."""
+    kept_deployment = {
+        "board_name": "board1",
+        "kept_since": "2026-01-01T00:00:00+00:00",
+        "inventory_config": {"board1": {}},
+        "devices": {"board": "cpe"},
+    }
+    monkeypatch.setattr(
+        "pytest_boardfarm3.boardfarm_plugin.load_kept_deployment",
+        lambda _: kept_deployment,
+    )
+    plugin = BoardfarmPlugin()
+    option = Namespace(keep_devices=True, release_kept_devices=False, skip_boot=False)
+    plugin._session_config = SimpleNamespace(option=option)  # type: ignore[assignment]
+    assert plugin._reserve_devices() == {"board1": {}}
+    assert not option.skip_boot
+    assert plugin._get_deployment_cmdline_args().skip_boot
+
+
+def test_release_without_kept_devices_is_a_usage_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ensure nothing is reserved when no matching devices are kept."""
+    monkeypatch.setattr(
+        "pytest_boardfarm3.boardfarm_plugin.load_kept_deployment",
+        lambda _: None,
+    )
+    plugin = BoardfarmPlugin()
+    plugin._plugin_manager = SimpleNamespace(  # type: ignore[assignment]
+        hook=SimpleNamespace(boardfarm_reserve_devices=pytest.fail),
+    )
+    option = Namespace(
+        deployment_logs_tail=0,
+        board_pool=None,
+        keep_devices=False,
+        release_kept_devices=True,
+    )
+    plugin._session_config = SimpleNamespace(option=option)  # type: ignore[assignment]
+    with pytest.raises(pytest.UsageError, match="--release-kept-devices"):
+        plugin.pytest_configure(plugin._session_config)  # type: ignore[arg-type]
+    with pytest.raises(pytest.UsageError, match="--release-kept-devices"):
+        plugin._reserve_devices()
+
+
+def test_release_kept_devices_deselects_all_tests() -> None:
+    """Ensure a session releasing the kept devices does not run any test."""
+    deselected_tests: list = []
+    config = SimpleNamespace(
+        option=SimpleNamespace(
+            release_kept_devices=True,
+            env_req_order="collection",
+        ),
+        hook=SimpleNamespace(
+            pytest_deselected=lambda items: deselected_tests.extend(items),
+        ),
+    )
+    items = [_FakeItem("test_dual", _DUAL_ENV_REQ), _FakeItem("test_any", None)]
+    hook_wrapper = BoardfarmPlugin().pytest_collection_modifyitems(
+        config,  # type: ignore[arg-type]
+        items,  # type: ignore[arg-type]
+    )
+    next(hook_wrapper)
+    with pytest.raises(StopIteration):
+        next(hook_wrapper)
+    assert not items
+    assert [item.name for item in deselected_tests] == ["test_dual", "test_any"]
+
+
+def test_xdist_workers_without_board_pool_is_a_usage_error() -> None:
+    """Ensure several xdist workers cannot deploy the same --board-name."""
+    config = SimpleNamespace(
+        option=Namespace(
+            deployment_logs_tail=0,
+            dist="load",
+            tx=["2*popen"],
+            board_pool=None,
+        ),
+    )
+    with pytest.raises(pytest.UsageError, match="--board-pool"):
+        BoardfarmPlugin().pytest_configure(config)  # type: ignore[arg-type]
+
+
+def test_xdist_loadgroup_groups_tests_by_env_req() -> None:
+    """Ensure the tests requesting the same environment share a xdist group."""
+    config = SimpleNamespace(
+        option=SimpleNamespace(
+            release_kept_devices=False,
+            env_req_order="affinity",
+            env_req_filter="setup",
+            loadgroup=True,
+        ),
+    )
+    items = [
+        _FakeItem("test_dual", _DUAL_ENV_REQ),
+        _FakeItem("test_ipv4", _IPV4_ENV_REQ),
+        _FakeItem("test_dual_again", _DUAL_ENV_REQ),
+        _FakeItem("test_any", None),
+    ]
+    hook_wrapper = BoardfarmPlugin().pytest_collection_modifyitems(
+        config,  # type: ignore[arg-type]
+        items,  # type: ignore[arg-type]
+    )
+    next(hook_wrapper)
+    groups = {
+        item.name: getattr(item.get_closest_marker("xdist_group"), "args", None)
+        for item in items
+    }
+    assert groups["test_dual"] == groups["test_dual_again"]
+    assert groups["test_dual"] != groups["test_ipv4"]
+    assert groups["test_any"] is None
+
+
+def _log_test_reports(plugin: BoardfarmPlugin) -> None:
+    for when in ("setup", "call", "teardown"):
+        report = pytest.TestReport(
+            "test_a.py::test_a",
+            ("test_a.py", 0, "test_a"),
+            {},
+            "passed",
+            None,
+            when,  # type: ignore[arg-type]
+            boardfarm_timings={when: 1.0},
+        )
+        hook_wrapper = plugin.pytest_runtest_logreport(report)
+        next(hook_wrapper)
+        with pytest.raises(StopIteration):
+            next(hook_wrapper)
+
+
+@pytest.mark.parametrize(
+    ("test_timings_file", "has_timings"),
+    [(None, False), ("timings.jsonl", True)],
+)
+def test_test_timings_are_only_kept_to_be_saved(
+    test_timings_file: str | None,
+    has_timings: bool,
+) -> None:
+    """Ensure the timings of a test are not kept when they are not saved."""
+    plugin = BoardfarmPlugin()
+    plugin._session_config = SimpleNamespace(  # type: ignore[assignment]
+        option=Namespace(test_timings_file=test_timings_file),
+        pluginmanager=SimpleNamespace(getplugin=lambda _: None),
+    )
+    _log_test_reports(plugin)
+    assert bool(plugin._test_timings.get_timings("test_a.py::test_a")) is has_timings
+
+
+@pytest.mark.parametrize(
+    ("options", "has_column"),
+    [
+        ({}, False),
+        ({"device_io_metrics": True}, True),
+        ({"device_io_metrics_file": "device_io.jsonl"}, True),
+    ],
+)
+def test_device_io_metrics_are_opt_in(
+    options: dict[str, object],
+    has_column: bool,
+) -> None:
+    """Ensure the device I/O is only measured and shown when requested."""
+    option = Namespace(
+        deployment_logs_tail=0,
+        board_pool=None,
+        reprovision_retries=0,
+        fail_fast=False,
+        run_record_file=None,
+        device_io_metrics=False,
+        device_io_metrics_file=None,
+        async_logging=False,
+        release_kept_devices=False,
+    )
+    vars(option).update(options)
+    config = SimpleNamespace(
+        option=option,
+        stash={},
+        addinivalue_line=lambda *_: None,
+    )
+    plugin = BoardfarmPlugin()
+    plugin.pytest_configure(config)  # type: ignore[arg-type]
+    cells: list[str] = []
+    plugin.pytest_html_results_table_header(cells)
+    assert ("Device I/O" in cells[-1]) is has_column
+
+
+def test_screenshot_urls_and_missing_files_are_linked_as_is(tmp_path: Path) -> None:
+    """Ensure only the existing png files are saved in the screenshot store."""
+    screenshot_path = tmp_path / "screenshot.png"
+    screenshot_path.write_bytes(b"not an image")
+    pytest_html = SimpleNamespace(
+        extras=SimpleNamespace(
+            image=lambda content, name: ("image", name, content),
+            html=lambda content: ("html", content),
+        ),
+    )
+    item = SimpleNamespace(
+        nodeid="test_a.py::test_a",
+        stash={},
+        config=SimpleNamespace(
+            pluginmanager=SimpleNamespace(getplugin=lambda _: pytest_html),
+            option=SimpleNamespace(htmlpath=str(tmp_path / "report.html")),
+        ),
+    )
+    report = pytest.TestReport(
+        item.nodeid,
+        ("test_a.py", 0, "test_a"),
+        {},
+        "passed",
+        None,
+        "call",
+        user_properties=[
+            ("url", "https://screenshots/home.png"),
+            ("missing", str(tmp_path / "missing.png")),
+            ("screenshot", str(screenshot_path)),
+        ],
+    )
+    plugin = BoardfarmPlugin()
+    plugin._screenshot_store = ScreenshotStore(tmp_path / "screenshots")
+    hook_wrapper = plugin.pytest_runtest_makereport(item, None)  # type: ignore[arg-type]
+    next(hook_wrapper)
+    with pytest.raises(StopIteration):
+        hook_wrapper.send(SimpleNamespace(get_result=lambda: report))
+    extras = report.extras  # type: ignore[attr-defined]
+    assert extras[:2] == [
+        ("image", "url", "https://screenshots/home.png"),
+        ("image", "missing", str(tmp_path / "missing.png")),
+    ]
+    assert extras[2][0] == "html"
+    assert len(extras) == 3
+
+
+def test_fail_fast_reports_the_remaining_tests_at_once(
+    boardfarm_pytester: BoardfarmPytester,
+) -> None:
+    """Ensure the tests after a fail fast trip are reported without running."""
+    boardfarm_pytester.pytester.makepyfile(
+        protocol_log="""
+        def pytest_runtest_protocol(item):
+            with open("protocol.log", "a") as log_file:
+                log_file.write(item.name + "\\n")
+        """,
+    )
+    result = boardfarm_pytester.run(
+        """
+        import pexpect
+        import pytest
+
+        @pytest.mark.parametrize("index", range(3))
+        def test_dead(index):
+            raise pexpect.TIMEOUT("Timeout exceeded.")
+
+        def test_after():
+            pass
+        """,
+        "-p",
+        "protocol_log",
+        "--fail-fast",
+        "--fail-fast-device-errors",
+        "2",
+    )
+    result.assert_outcomes(failed=2, errors=2)
+    result.stdout.fnmatch_lines(
+        [
+            "*The remaining tests were not run: 2 consecutive tests failed*",
+            "ERROR test_module.py::test_dead[[]2[]] - Failed: Not run, the devices*",
+        ],
+    )
+    protocol_log = boardfarm_pytester.pytester.path / "protocol.log"
+    assert protocol_log.read_text().split() == ["test_dead[0]", "test_dead[1]"]
+
+
+def test_self_contained_html_embeds_screenshots(
+    boardfarm_pytester: BoardfarmPytester,
+) -> None:
+    """Ensure a self-contained report embeds the screenshots, without a store."""
+    result = boardfarm_pytester.run(
+        """
+        from pathlib import Path
+
+        def test_screenshot(record_property):
+            Path("screenshot.png").write_bytes(b"screenshot")
+            record_property("screenshot", str(Path("screenshot.png").resolve()))
+        """,
+        "--html",
+        "report.html",
+        "--self-contained-html",
+    )
+    result.assert_outcomes(passed=1)
+    path = boardfarm_pytester.pytester.path
+    # the content is recompressed by Pillow when it is a valid image
+    assert (
+        "data:image/png;base64,c2NyZWVuc2hvdA==" in (path / "report.html").read_text()
+    )
+    assert not (path / "boardfarm" / "screenshots").exists()
+
+
+def test_killed_session_leaves_partial_report(
+    boardfarm_pytester: BoardfarmPytester,
+) -> None:
+    """Ensure the boardfarm report of a killed session has its last state."""
+    boardfarm_pytester.run(
+        """
+        import os
+        import signal
+
+        def test_passed():
+            pass
+
+        def test_killed():
+            os.kill(os.getpid(), signal.SIGKILL)
+        """,
+        "--html",
+        "report.html",
+    )
+    path = boardfarm_pytester.pytester.path
+    assert not (path / "report.html").exists()
+    report_path = path / "boardfarm" / "report.json"
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert (report["board_name"], report["setup"]) == ("board1", "success")
+    assert report["devices"] == {"board": "fake"}
+    assert report["outcomes"] == {"passed": 1}
+    assert report["current_test"] == "test_module.py::test_killed"
+    assert (report["teardown"], report["complete"]) == ("not run", False)
+
+
+class _FakeCache:
+    def __init__(self, cache_dir: Path) -> None:
+        self._cache_dir = cache_dir
+        self._values: dict[str, object] = {}
+
+    def get(self, key: str, default: object) -> object:
+        return self._values.get(key, default)
+
+    def set(self, key: str, value: object) -> None:
+        self._values[key] = value
+
+    def mkdir(self, name: str) -> Path:
+        (self._cache_dir / name).mkdir(parents=True, exist_ok=True)
+        return self._cache_dir / name
+
+
+def test_cached_config_depends_on_boardfarm_options(tmp_path: Path) -> None:
+    """Ensure a config is parsed again when a boardfarm option changes."""
+    env_config = tmp_path / "env.json"
+    env_config.write_text('{"environment_def": {}}')
+    parsed_options: list[str] = []
+
+    def _parse_config(cmdline_args: Namespace, **_: object) -> dict[str, str]:
+        parsed_options.append(cmdline_args.plugin_option)
+        return {"plugin_option": cmdline_args.plugin_option}
+
+    plugin = BoardfarmPlugin()
+    plugin._boardfarm_option_names = ["plugin_option"]
+    plugin._inventory_config = {}
+    plugin._plugin_manager = SimpleNamespace(  # type: ignore[assignment]
+        list_name_plugin=list,
+        hook=SimpleNamespace(boardfarm_parse_config=_parse_config),
+    )
+    cache = _FakeCache(tmp_path / "cache")
+    for plugin_option in ("a", "a", "b"):
+        plugin._session_config = SimpleNamespace(  # type: ignore[assignment]
+            cache=cache,
+            option=Namespace(
+                cache_config=True,
+                env_config=str(env_config),
+                board_name="board1",
+                plugin_option=plugin_option,
+            ),
+        )
+        assert plugin._parse_config() == {"plugin_option": plugin_option}
+    assert parsed_options == ["a", "b"]
@@ -0,0 +1,42 @@
+"""Unit tests for circuit_breaker module in pytest-boardfarm."""
+
+import pexpect
+from boardfarm3.exceptions import DeviceConnectionError
+
+from pytest_boardfarm3.lib.circuit_breaker import CircuitBreaker
+
+
+def test_circuit_breaker_trips_on_consecutive_device_errors() -> None:
+    """Ensure the breaker trips once enough consecutive tests had a device error."""
+    breaker = CircuitBreaker(max_device_errors=2)
+    breaker.add_device_error("test_a", pexpect.TIMEOUT("Timeout exceeded."))
+    # only the first device error of a test is kept
+    breaker.add_device_error("test_a", DeviceConnectionError("teardown"))
+    breaker.end_test()
+    assert breaker.reason is None
+    breaker.add_device_error("test_b", DeviceConnectionError("console closed"))
+    breaker.end_test()
+    assert breaker.reason == (
+        "2 consecutive tests failed with a device error: test_a - TIMEOUT;"
+        " test_b - DeviceConnectionError('console closed')"
+    )
+
+
+def test_circuit_breaker_resets_on_test_without_device_error() -> None:
+    """Ensure only consecutive device errors trip the breaker."""
+    breaker = CircuitBreaker(max_device_errors=2)
+    breaker.add_device_error("test_a", pexpect.EOF("End Of File (EOF)."))
+    breaker.end_test()
+    breaker.end_test()
+    breaker.add_device_error("test_c", pexpect.EOF("End Of File (EOF)."))
+    breaker.end_test()
+    assert breaker.reason is None
+
+
+def test_circuit_breaker_keeps_first_reason() -> None:
+    """Ensure the root cause is the reason the breaker tripped first."""
+    breaker = CircuitBreaker(max_device_errors=1)
+    breaker.trip("boardfarm setup failed")
+    breaker.add_device_error("test_a", pexpect.TIMEOUT("Timeout exceeded."))
+    breaker.end_test()
+    assert breaker.reason == "boardfarm setup failed"
@@ -0,0 +1,91 @@
+"""Unit tests for config_cache module in pytest-boardfarm."""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from pytest_boardfarm3.lib.config_cache import BoardfarmConfigCache
+
+
+class _Cache:
+    """In memory pytest cache with a directory for the cached configs."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self._cache_dir = cache_dir
+        self._values: dict[str, Any] = {}
+
+    def get(self, key: str, default: Any) -> Any:
+        return self._values.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self._values[key] = value
+
+    def mkdir(self, name: str) -> Path:
+        (self._cache_dir / name).mkdir(parents=True, exist_ok=True)
+        return self._cache_dir / name
+
+
+@pytest.fixture()
+def config_cache(tmp_path: Path) -> BoardfarmConfigCache:
+    """Return a config cache in a temporary directory.
+
+    :param tmp_path: temporary directory
+    :type tmp_path: Path
+    :return: boardfarm config cache
+    :rtype: BoardfarmConfigCache
+    """
+    return BoardfarmConfigCache(_Cache(tmp_path / "cache"))  # type: ignore[arg-type]
+
+
+def test_config_cache_hit(config_cache: BoardfarmConfigCache, tmp_path: Path) -> None:
+    """Check a parsed config is reused while the env config is unchanged.
+
+    :param config_cache: boardfarm config cache
+    :type config_cache: BoardfarmConfigCache
+    :param tmp_path: temporary directory
+    :type tmp_path: Path
+    """
+    env_config = tmp_path / "env.json"
+    env_config.write_text('{"environment_def": {}}')
+    key = config_cache.get_key(str(env_config), {"devices": []}, board_name="b1")
+    assert config_cache.load(key) is None
+    config_cache.save(key, {"parsed": True})  # type: ignore[arg-type]
+    assert (
+        config_cache.get_key(str(env_config), {"devices": []}, board_name="b1") == key
+    )
+    assert config_cache.load(key) == {"parsed": True}
+    assert (
+        config_cache.get_key(str(env_config), {"devices": []}, board_name="b2") != key
+    )
+
+
+def test_config_cache_env_config_changed(
+    config_cache: BoardfarmConfigCache,
+    tmp_path: Path,
+) -> None:
+    """Check the cache key changes with the env config content.
+
+    :param config_cache: boardfarm config cache
+    :type config_cache: BoardfarmConfigCache
+    :param tmp_path: temporary directory
+    :type tmp_path: Path
+    """
+    env_config = tmp_path / "env.json"
+    env_config.write_text('{"environment_def": {}}')
+    key = config_cache.get_key(str(env_config), {})
+    env_config.write_text('{"environment_def": {"board": {}}}')
+    os.utime(env_config, ns=(1, 1))
+    assert config_cache.get_key(str(env_config), {}) != key
+
+
+def test_config_cache_skips_remote_env_config(
+    config_cache: BoardfarmConfigCache,
+) -> None:
+    """Check env configs fetched from a URL are not cached.
+
+    :param config_cache: boardfarm config cache
+    :type config_cache: BoardfarmConfigCache
+    """
+    assert config_cache.get_key("https://example.com/env.json", {}) is None
@@ -0,0 +1,78 @@
+"""Unit tests for contingency_cache module in pytest-boardfarm."""
+
+from pluggy import HookimplMarker, HookspecMarker, PluginManager
+
+from pytest_boardfarm3.lib.contingency_cache import ContingencyCheckCache
+
+_hookspec = HookspecMarker("boardfarm")
+_hookimpl = HookimplMarker("boardfarm")
+
+_DUAL_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}}
+_IPV4_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["ipv4"]}}}
+
+
+def test_contingency_check_cache_last_verified_request() -> None:
+    """Ensure only the last verified request is cached."""
+    cache = ContingencyCheckCache()
+    assert not cache.is_verified(_DUAL_REQ)
+    cache.set_verified(_DUAL_REQ)
+    assert cache.is_verified(_DUAL_REQ)
+    assert not cache.is_verified(_IPV4_REQ)
+    cache.set_verified(_IPV4_REQ)
+    assert not cache.is_verified(_DUAL_REQ)
+    assert cache.as_dict() == {"hits": 1, "misses": 3, "invalidations": 0}
+
+
+def test_contingency_check_cache_canonical_request() -> None:
+    """Ensure requests with a different key order share the cached check."""
+    cache = ContingencyCheckCache()
+    cache.set_verified({"environment_def": {"board": {"a": 1, "b": 2}}})
+    assert cache.is_verified({"environment_def": {"board": {"b": 2, "a": 1}}})
+
+
+def test_contingency_check_cache_invalidate() -> None:
+    """Ensure an invalidated cache runs the next contingency check."""
+    cache = ContingencyCheckCache()
+    cache.invalidate("nothing cached")
+    cache.set_verified(_DUAL_REQ)
+    cache.invalidate("test failed")
+    assert not cache.is_verified(_DUAL_REQ)
+    assert cache.as_dict() == {"hits": 0, "misses": 1, "invalidations": 1}
+
+
+class _DeviceHookspecs:
+    @_hookspec
+    def boardfarm_device_boot(self) -> None:
+        """Boot the device."""
+
+    @_hookspec
+    def contingency_check(self) -> None:
+        """Check the device."""
+
+
+class _Device:
+    @_hookimpl
+    def boardfarm_device_boot(self) -> None:
+        """Boot the device."""
+
+    @_hookimpl
+    def contingency_check(self) -> None:
+        """Check the device."""
+
+
+def test_contingency_check_cache_invalidate_on_boot() -> None:
+    """Ensure a device boot invalidates the cache until the monitoring is undone."""
+    plugin_manager = PluginManager("boardfarm")
+    plugin_manager.add_hookspecs(_DeviceHookspecs)
+    plugin_manager.register(_Device(), name="board")
+    cache = ContingencyCheckCache()
+    with cache.invalidate_on_boot(plugin_manager):
+        cache.set_verified(_DUAL_REQ)
+        plugin_manager.hook.contingency_check()
+        assert cache.is_verified(_DUAL_REQ)
+        plugin_manager.hook.boardfarm_device_boot()
+        assert not cache.is_verified(_DUAL_REQ)
+    cache.set_verified(_DUAL_REQ)
+    plugin_manager.hook.boardfarm_device_boot()
+    assert cache.is_verified(_DUAL_REQ)
+    assert cache.invalidations == 1
@@ -0,0 +1,191 @@
+"""Unit tests for deployment module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import asyncio
+from argparse import Namespace
+from types import SimpleNamespace
+
+import pytest
+from boardfarm3 import hookimpl
+from boardfarm3.plugins import setup_environment
+from boardfarm3.plugins.hookspecs import core, devices
+from pluggy import PluginManager
+
+from pytest_boardfarm3.lib.deployment import (
+    SETUP_ENV_HOOKS,
+    is_setup_env_overridden,
+    measure_setup_env_stages,
+    setup_env_concurrently,
+)
+from pytest_boardfarm3.lib.deployment_profile import DeploymentProfile
+
+
+class _FakeDevice:
+    def __init__(self, name: str, events: list[str], error: str | None = None):
+        self.device_name = name
+        self._events = events
+        self._error = error
+
+    async def _run(self, hook_name: str) -> None:
+        self._events.append(f"{self.device_name} {hook_name} start")
+        await asyncio.sleep(0.01)
+        self._events.append(f"{self.device_name} {hook_name} end")
+        if self._error:
+            raise RuntimeError(self._error)
+
+    @hookimpl
+    async def boardfarm_device_boot_async(self) -> None:
+        await self._run("boot")
+
+    @hookimpl
+    async def boardfarm_device_configure_async(self) -> None:
+        await self._run("configure")
+
+
+class _FirstFakeDevice(_FakeDevice):
+    @hookimpl(tryfirst=True)
+    async def boardfarm_device_boot_async(self) -> None:
+        await self._run("boot")
+
+
+class _FakeServer:
+    def __init__(self, name: str, events: list[str]) -> None:
+        self.device_name = name
+        self._events = events
+
+    @hookimpl
+    def boardfarm_server_boot(self) -> None:
+        self._events.append(f"{self.device_name} server_boot")
+
+
+class _FakeBootedServer(_FakeServer):
+    # boardfarm has no boardfarm_device_boot_async hook specification
+    @hookimpl
+    def boardfarm_device_boot(self) -> None:
+        self._events.append(f"{self.device_name} device_boot")
+
+
+class _SetupEnvOverride:
+    def __init__(self, events: list[str]) -> None:
+        self._events = events
+
+    @hookimpl
+    async def boardfarm_setup_env(self, device_manager: object) -> object:
+        self._events.append("override")
+        return device_manager
+
+
+def _get_plugin_manager(*plugins: object) -> PluginManager:
+    plugin_manager = PluginManager("boardfarm")
+    plugin_manager.add_hookspecs(core)
+    plugin_manager.add_hookspecs(devices)
+    plugin_manager.register(setup_environment)
+    for plugin in plugins:
+        plugin_manager.register(plugin, getattr(plugin, "device_name", None))
+    return plugin_manager
+
+
+def _setup_env_concurrently(
+    plugin_manager: PluginManager,
+    profile: DeploymentProfile | None = None,
+) -> dict[str, dict[str, float]]:
+    durations: dict[str, dict[str, float]] = {}
+    asyncio.run(
+        setup_env_concurrently(
+            plugin_manager=plugin_manager,
+            config=None,  # type: ignore[arg-type]
+            cmdline_args=Namespace(skip_boot=False),
+            device_manager=None,  # type: ignore[arg-type]
+            concurrency=4,
+            durations=durations,
+            profile=profile,
+        ),
+    )
+    return durations
+
+
+def test_setup_env_concurrently_stages_order() -> None:
+    """Ensure the stages run one after the other, their devices concurrently."""
+    events: list[str] = []
+    profile = DeploymentProfile()
+    durations = _setup_env_concurrently(
+        _get_plugin_manager(
+            _FakeDevice("board", events),
+            _FakeDevice("lan", events),
+            _FakeServer("wan", events),
+        ),
+        profile,
+    )
+    assert events[0] == "wan server_boot"
+    assert sorted(events[1:3]) == ["board boot start", "lan boot start"]
+    assert sorted(events[5:7]) == ["board configure start", "lan configure start"]
+    assert [phase["name"] for phase in profile.as_dict()["phases"]] == list(
+        SETUP_ENV_HOOKS,
+    )
+    assert sorted(durations) == ["board", "lan", "wan"]
+    assert sorted(durations["board"]) == [
+        "boardfarm_device_boot",
+        "boardfarm_device_configure",
+    ]
+
+
+def test_setup_env_concurrently_keeps_tryfirst_order() -> None:
+    """Ensure a tryfirst device hook is done before the others start."""
+    events: list[str] = []
+    _setup_env_concurrently(
+        _get_plugin_manager(
+            _FakeDevice("lan", events),
+            _FirstFakeDevice("board", events),
+            _FakeDevice("wifi", events),
+        ),
+    )
+    assert events[:2] == ["board boot start", "board boot end"]
+    assert sorted(events[2:4]) == ["lan boot start", "wifi boot start"]
+
+
+def test_setup_env_concurrently_propagates_errors() -> None:
+    """Ensure a failing device hook fails its stage once its devices are done."""
+    events: list[str] = []
+    with pytest.raises(RuntimeError, match="boot failure"):
+        _setup_env_concurrently(
+            _get_plugin_manager(
+                _FakeDevice("board", events, "boot failure"),
+                _FakeDevice("lan", events),
+            ),
+        )
+    assert "lan boot end" in events
+    assert not [event for event in events if "configure" in event]
+
+
+def test_is_setup_env_overridden() -> None:
+    """Ensure another boardfarm_setup_env implementation is detected."""
+    assert not is_setup_env_overridden(_get_plugin_manager())
+    assert is_setup_env_overridden(_get_plugin_manager(_SetupEnvOverride([])))
+
+
+def test_measure_setup_env_stages() -> None:
+    """Ensure the stages of the boardfarm_setup_env hook call are measured."""
+    events: list[str] = []
+    server = _FakeBootedServer("wan", events)
+    plugin_manager = _get_plugin_manager(server)
+    device_manager = SimpleNamespace(get_devices_by_type=lambda _: {"wan": server})
+    profile = DeploymentProfile()
+    with measure_setup_env_stages(plugin_manager, profile):
+        asyncio.run(
+            plugin_manager.hook.boardfarm_setup_env(
+                config=None,
+                cmdline_args=Namespace(skip_boot=False),
+                plugin_manager=plugin_manager,
+                device_manager=device_manager,
+            ),
+        )
+    plugin_manager.hook.boardfarm_server_boot(
+        config=None,
+        cmdline_args=None,
+        device_manager=None,
+    )
+    phases = profile.as_dict()["phases"]
+    assert [phase["name"] for phase in phases] == list(SETUP_ENV_HOOKS)
+    assert all(phase["duration"] is not None for phase in phases)
+    assert events == ["wan server_boot", "wan device_boot", "wan server_boot"]
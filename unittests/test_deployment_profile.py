@@ -0,0 +1,44 @@
+"""Unit tests for deployment_profile module in pytest-boardfarm."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from pytest_boardfarm3.lib.deployment_profile import DeploymentProfile
+
+
+def test_deployment_profile_critical_path(tmp_path: Path) -> None:
+    """Check the slowest device of each stage is part of the critical path.
+
+    :param tmp_path: temporary directory
+    :type tmp_path: Path
+    """
+    profile = DeploymentProfile()
+    with profile.measure("boardfarm_reserve_devices", "session"):
+        pass
+    with profile.measure("boardfarm_device_boot", "setup"):
+        pass
+    device_durations = {
+        "board": {"boardfarm_device_boot": 12.0},
+        "lan": {"boardfarm_device_boot": 3.0},
+    }
+    profile.save(str(tmp_path / "profile.json"), device_durations)
+    saved_profile = json.loads((tmp_path / "profile.json").read_text())
+    assert [phase["name"] for phase in saved_profile["phases"]] == [
+        "boardfarm_reserve_devices",
+        "boardfarm_device_boot",
+    ]
+    assert "device" not in saved_profile["critical_path"][0]
+    assert saved_profile["critical_path"][1]["device"] == "board"
+    assert saved_profile["critical_path"][1]["device_duration"] == 12.0
+
+
+def test_deployment_profile_failed_phase() -> None:
+    """Check a failing boardfarm hook is recorded with its duration."""
+    profile = DeploymentProfile()
+    with pytest.raises(ValueError, match="boom"), profile.measure("hook", "setup"):
+        raise ValueError("boom")  # noqa: EM101
+    phase = profile.as_dict()["phases"][0]
+    assert phase["status"] == "failed"
+    assert phase["duration"] is not None
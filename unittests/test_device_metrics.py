@@ -0,0 +1,68 @@
+"""Unit tests for device_metrics module in pytest-boardfarm."""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from boardfarm3.lib.boardfarm_pexpect import BoardfarmPexpect
+
+from pytest_boardfarm3.lib.device_metrics import (
+    DeviceIOMonitor,
+    get_total_metrics,
+    save_device_metrics,
+)
+
+
+class _Connection(BoardfarmPexpect):
+    """Pexpect session echoing the commands, without any spawned process."""
+
+    def __init__(self) -> None:  # pylint: disable=super-init-not-called
+        self.logfile = self.logfile_read = self.logfile_send = None
+
+    def execute_command(self, command: str, timeout: int = -1) -> str:  # noqa: ARG002
+        self._log(f"{command}\n", "send")
+        self._log(f"{command}\noutput\n", "read")
+        return "output"
+
+
+def _get_device_manager(**devices: Any) -> Any:
+    return SimpleNamespace(get_devices_by_type=lambda _device_type: devices)
+
+
+def test_device_io_monitor() -> None:
+    """Ensure the I/O of the device connections is counted per device."""
+    console = _Connection()
+    device = SimpleNamespace(_console=console, hw=SimpleNamespace(_ssh=_Connection()))
+    device_manager = _get_device_manager(dev1=device)
+    monitor = DeviceIOMonitor()
+    monitor.instrument(device_manager)
+    # instrumenting again must not count twice
+    monitor.instrument(device_manager)
+    assert console.execute_command("ls") == "output"
+    device.hw._ssh.execute_command("uptime")
+    metrics = monitor.get_metrics()["dev1"]
+    assert metrics["bytes_sent"] == len("ls\n") + len("uptime\n")
+    assert metrics["bytes_received"] == len("ls\noutput\n") + len("uptime\noutput\n")
+    assert metrics["commands"] == 2
+    assert metrics["command_time"] >= metrics["max_command_time"] > 0
+    monitor.reset()
+    assert monitor.get_metrics() == {}
+
+
+def test_device_metrics_totals_and_file(tmp_path: Path) -> None:
+    """Ensure the device metrics are summed over tests and saved per test."""
+    tests_metrics = {
+        "test_a": {"dev1": {"bytes_sent": 1, "commands": 1, "max_command_time": 2}},
+        "test_b": {"dev1": {"bytes_sent": 2, "commands": 1, "max_command_time": 1}},
+    }
+    assert get_total_metrics(tests_metrics) == {
+        "dev1": {"bytes_sent": 3, "commands": 2, "max_command_time": 2},
+    }
+    save_device_metrics(str(tmp_path / "io.jsonl"), tests_metrics)
+    assert [
+        json.loads(line) for line in (tmp_path / "io.jsonl").read_text().splitlines()
+    ] == [
+        {"nodeid": nodeid, "devices": devices}
+        for nodeid, devices in tests_metrics.items()
+    ]
@@ -0,0 +1,81 @@
+"""Unit tests for distributed module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from pytest_boardfarm3.exceptions import BoardfarmPluginError
+from pytest_boardfarm3.lib.distributed import (
+    get_env_req_group,
+    get_worker_board_name,
+    get_xdist_worker_id,
+    get_xdist_workers_count,
+)
+
+
+def _get_worker_config(worker_id: str | None, board_pool: str = "") -> SimpleNamespace:
+    config = SimpleNamespace(option=SimpleNamespace(board_pool=board_pool))
+    if worker_id is not None:
+        config.workerinput = {"workerid": worker_id}
+    return config
+
+
+def test_get_xdist_worker_id() -> None:
+    """Ensure the worker id is only given in a xdist worker."""
+    assert get_xdist_worker_id(_get_worker_config("gw3")) == "gw3"  # type: ignore[arg-type]
+    assert get_xdist_worker_id(_get_worker_config(None)) is None  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize(
+    ("worker_id", "board_name"),
+    [("gw0", "board1"), ("gw1", "board2"), ("gw2", "board3")],
+)
+def test_get_worker_board_name(worker_id: str, board_name: str) -> None:
+    """Ensure each worker gets its own board of the pool.
+
+    :param worker_id: xdist worker id
+    :type worker_id: str
+    :param board_name: expected board name
+    :type board_name: str
+    """
+    config = _get_worker_config(worker_id, " board1, board2,,board3 ")
+    assert get_worker_board_name(config) == board_name  # type: ignore[arg-type]
+
+
+def test_get_worker_board_name_more_workers_than_boards() -> None:
+    """Ensure an error is raised when there is no board left for a worker."""
+    config = _get_worker_config("gw2", "board1,board2")
+    with pytest.raises(BoardfarmPluginError, match="run at most 2 workers"):
+        get_worker_board_name(config)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize(
+    ("dist", "tx", "workers_count"),
+    [
+        ("no", [], 0),
+        ("load", ["popen"] * 4, 4),
+        ("loadgroup", ["2*popen", "ssh=host"], 3),
+    ],
+)
+def test_get_xdist_workers_count(dist: str, tx: list[str], workers_count: int) -> None:
+    """Ensure the workers of the --tx specifications are counted.
+
+    :param dist: xdist distribution mode
+    :type dist: str
+    :param tx: xdist --tx specifications
+    :type tx: list[str]
+    :param workers_count: expected number of workers
+    :type workers_count: int
+    """
+    config = SimpleNamespace(option=SimpleNamespace(dist=dist, tx=tx))
+    assert get_xdist_workers_count(config) == workers_count  # type: ignore[arg-type]
+
+
+def test_get_env_req_group() -> None:
+    """Ensure the tests requesting the same environment share a group."""
+    first_group = get_env_req_group({"board": {"mode": "dual", "model": None}})
+    assert first_group == get_env_req_group({"board": {"model": None, "mode": "dual"}})
+    assert first_group != get_env_req_group({"board": {"mode": "ipv4"}})
+    assert first_group.startswith("env_req-")
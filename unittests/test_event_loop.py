@@ -0,0 +1,60 @@
+"""Unit tests for event_loop module in pytest-boardfarm."""
+
+import asyncio
+
+from pytest_boardfarm3.lib.event_loop import (
+    close_session_event_loop,
+    new_session_event_loop,
+)
+
+
+def test_session_event_loop_is_reused() -> None:
+    """Ensure async resources created on the session loop outlive a call."""
+    event_loop, previous_event_loop = new_session_event_loop()
+    try:
+        assert asyncio.get_event_loop() is event_loop
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        event_loop.run_until_complete(queue.put(1))
+        assert event_loop.run_until_complete(queue.get()) == 1
+    finally:
+        close_session_event_loop(event_loop, previous_event_loop)
+    assert event_loop.is_closed()
+
+
+def test_close_session_event_loop_cancels_pending_tasks() -> None:
+    """Ensure tasks still pending at the end of the session are cancelled."""
+    event_loop, previous_event_loop = new_session_event_loop()
+    task = event_loop.create_task(asyncio.sleep(3600))
+    event_loop.run_until_complete(asyncio.to_thread(lambda: None))
+    close_session_event_loop(event_loop, previous_event_loop)
+    assert task.cancelled()
+    assert event_loop.is_closed()
+    close_session_event_loop(event_loop, previous_event_loop)
+
+
+def test_close_session_event_loop_restores_previous_loop() -> None:
+    """Ensure the loop current before the session one is current again."""
+    other_event_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(other_event_loop)
+    try:
+        event_loop, previous_event_loop = new_session_event_loop()
+        assert previous_event_loop is other_event_loop
+        assert asyncio.get_event_loop() is event_loop
+        close_session_event_loop(event_loop, previous_event_loop)
+        assert asyncio.get_event_loop() is other_event_loop
+    finally:
+        asyncio.set_event_loop(None)
+        other_event_loop.close()
+
+
+def test_close_session_event_loop_keeps_other_loop() -> None:
+    """Ensure a loop set by another plugin during the session stays current."""
+    event_loop, previous_event_loop = new_session_event_loop()
+    other_event_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(other_event_loop)
+    try:
+        close_session_event_loop(event_loop, previous_event_loop)
+        assert asyncio.get_event_loop() is other_event_loop
+    finally:
+        asyncio.set_event_loop(None)
+        other_event_loop.close()
@@ -0,0 +1,76 @@
+"""Unit tests for html_report module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import gzip
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from pytest_boardfarm3.lib.html_report import get_boardfarm_html_table_report
+from pytest_boardfarm3.lib.report_model import BoardfarmReport
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _get_html_report(
+    tmp_path: Path,
+    report_sidecars: str,
+    *,
+    self_contained_html: bool = False,
+) -> str:
+    session_config = SimpleNamespace(
+        option=SimpleNamespace(
+            board_name="board1",
+            env_config="env.json",
+            inventory_config="inventory.json",
+            report_sidecars=report_sidecars,
+            htmlpath=str(tmp_path / "report.html"),
+            self_contained_html=self_contained_html,
+        ),
+    )
+    report = BoardfarmReport()
+    report.set_config(session_config, None)  # type: ignore[arg-type]
+    report.set_setup(
+        {"logs": "setup logs"},
+        SimpleNamespace(get_devices_by_type=lambda _: {}),  # type: ignore[arg-type]
+    )
+    return get_boardfarm_html_table_report(
+        session_config,  # type: ignore[arg-type]
+        report,
+    )
+
+
+def test_report_without_sidecars(tmp_path: Path) -> None:
+    """Ensure the deployment logs are inlined without sidecars."""
+    html_report = _get_html_report(tmp_path, "none")
+    assert ">setup logs</div>" in html_report
+    assert "data-src" not in html_report
+    assert not (tmp_path / "boardfarm").exists()
+
+
+def test_report_with_plain_sidecars(tmp_path: Path) -> None:
+    """Ensure the plain sidecars are saved and loaded in an iframe on click."""
+    html_report = _get_html_report(tmp_path, "plain")
+    sidecar_path = tmp_path / "boardfarm" / "setup_logs.txt"
+    assert sidecar_path.read_text(encoding="utf-8") == "setup logs"
+    assert 'data-src="boardfarm/setup_logs.txt"' in html_report
+    assert ">setup logs</div>" not in html_report
+    assert "document.createElement('iframe')" in html_report
+
+
+def test_report_with_gzip_sidecars(tmp_path: Path) -> None:
+    """Ensure the gzip sidecars are saved compressed, linked under file://."""
+    html_report = _get_html_report(tmp_path, "gzip")
+    sidecar_path = tmp_path / "boardfarm" / "setup_logs.txt.gz"
+    assert gzip.decompress(sidecar_path.read_bytes()) == b"setup logs"
+    assert 'data-src="boardfarm/setup_logs.txt.gz"' in html_report
+    assert "location.protocol == 'file:'" in html_report
+
+
+def test_self_contained_report_has_no_sidecars(tmp_path: Path) -> None:
+    """Ensure a self-contained report inlines the logs despite the sidecars."""
+    html_report = _get_html_report(tmp_path, "plain", self_contained_html=True)
+    assert ">setup logs</div>" in html_report
+    assert "data-src" not in html_report
+    assert not (tmp_path / "boardfarm").exists()
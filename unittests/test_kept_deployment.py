@@ -0,0 +1,115 @@
+"""Unit tests for kept_deployment module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import json
+from argparse import Namespace
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+from pytest_boardfarm3.lib import kept_deployment
+from pytest_boardfarm3.lib.kept_deployment import (
+    clear_kept_deployment,
+    get_deployment_fingerprint,
+    load_kept_deployment,
+    save_kept_deployment,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+class _FakeCache:
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+
+    def get(self, key: str, default: Any) -> Any:
+        return self.values.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self.values[key] = value
+
+
+def _get_session_config(
+    inventory_config: str,
+    env_config: str,
+    cache: _FakeCache | None = None,
+) -> SimpleNamespace:
+    session_config = SimpleNamespace(
+        option=Namespace(
+            board_name="board1",
+            inventory_config=inventory_config,
+            env_config=env_config,
+            ignore_devices="",
+        ),
+    )
+    if cache is not None:
+        session_config.cache = cache
+    return session_config
+
+
+def _write_configs(tmp_path: Path, env_config: dict) -> tuple[str, str]:
+    inventory_path = tmp_path / "inventory.json"
+    inventory_path.write_text(json.dumps({"board1": {}}), encoding="utf-8")
+    env_path = tmp_path / "env.json"
+    env_path.write_text(json.dumps(env_config), encoding="utf-8")
+    return str(inventory_path), str(env_path)
+
+
+def test_fingerprint_changes_with_config_file_content(tmp_path: Path) -> None:
+    """Ensure the fingerprint depends on the content of the config files."""
+    session_config = _get_session_config(*_write_configs(tmp_path, {"a": 1}))
+    fingerprint = get_deployment_fingerprint(session_config)  # type: ignore[arg-type]
+    assert fingerprint == get_deployment_fingerprint(session_config)  # type: ignore[arg-type]
+    _write_configs(tmp_path, {"a": 2})
+    assert fingerprint != get_deployment_fingerprint(session_config)  # type: ignore[arg-type]
+
+
+def test_fingerprint_changes_with_config_url_content(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ensure the fingerprint depends on the content of the config URLs."""
+    env_configs = {"https://configs/env.json": {"a": 1}}
+    monkeypatch.setattr(
+        kept_deployment,
+        "get_json",
+        lambda url: env_configs.get(url, {}),
+    )
+    session_config = _get_session_config(
+        "https://configs/inventory.json",
+        "https://configs/env.json",
+    )
+    fingerprint = get_deployment_fingerprint(session_config)  # type: ignore[arg-type]
+    env_configs["https://configs/env.json"] = {"a": 2}
+    assert fingerprint != get_deployment_fingerprint(session_config)  # type: ignore[arg-type]
+
+
+def test_kept_deployment_is_reused_with_same_fingerprint(tmp_path: Path) -> None:
+    """Ensure a kept deployment is only reused by a matching session."""
+    cache = _FakeCache()
+    session_config = _get_session_config(*_write_configs(tmp_path, {"a": 1}), cache)
+    device_manager = SimpleNamespace(
+        get_devices_by_type=lambda _: {"board": SimpleNamespace(device_type="cpe")},
+    )
+    save_kept_deployment(
+        session_config,  # type: ignore[arg-type]
+        {"board1": {}},
+        device_manager,  # type: ignore[arg-type]
+    )
+    kept = load_kept_deployment(session_config)  # type: ignore[arg-type]
+    assert kept is not None
+    assert kept["devices"] == {"board": "cpe"}
+    assert kept["inventory_config"] == {"board1": {}}
+    _write_configs(tmp_path, {"a": 2})
+    assert load_kept_deployment(session_config) is None  # type: ignore[arg-type]
+    _write_configs(tmp_path, {"a": 1})
+    clear_kept_deployment(session_config)  # type: ignore[arg-type]
+    assert load_kept_deployment(session_config) is None  # type: ignore[arg-type]
+
+
+def test_kept_deployment_without_cache(tmp_path: Path) -> None:
+    """Ensure nothing is kept nor reused when the pytest cache is disabled."""
+    session_config = _get_session_config(*_write_configs(tmp_path, {"a": 1}))
+    assert load_kept_deployment(session_config) is None  # type: ignore[arg-type]
@@ -0,0 +1,85 @@
+"""Unit tests for log_queue module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import io
+import logging
+import queue
+import threading
+
+from pytest_boardfarm3.lib.log_queue import QueueLoggingPipeline, _BoundedQueueHandler
+
+
+class _BlockingStream(io.StringIO):
+    """Stream blocking the writes until it is released."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writing = threading.Event()
+        self.released = threading.Event()
+
+    def write(self, text: str) -> int:
+        self.writing.set()
+        self.released.wait(timeout=10)
+        return super().write(text)
+
+
+def _get_logger(name: str, stream: io.StringIO) -> logging.Logger:
+    handler = logging.StreamHandler(stream)
+    handler.set_name(name)
+    handler.setFormatter(logging.Formatter("%(name)s %(message)s"))
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_queue_logging_pipeline_writes_records() -> None:
+    """Ensure the records are written in order with the original handlers."""
+    stream = io.StringIO()
+    logger = _get_logger("log-queue-test", stream)
+    handlers = list(logger.handlers)
+    pipeline = QueueLoggingPipeline(queue_size=100, batch_size=3)
+    pipeline.start([logger])
+    assert logger.handlers != handlers
+    for index in range(10):
+        logger.debug("record %s", index)
+    pipeline.stop()
+    assert logger.handlers == handlers
+    assert stream.getvalue().splitlines() == [
+        f"log-queue-test record {index}" for index in range(10)
+    ]
+    assert pipeline.get_dropped_records() == {}
+
+
+def test_queue_logging_pipeline_drops_records_when_full() -> None:
+    """Ensure records are dropped and counted instead of blocking the logger."""
+    stream = _BlockingStream()
+    logger = _get_logger("log-queue-full-test", stream)
+    pipeline = QueueLoggingPipeline(queue_size=1)
+    pipeline.start([logger])
+    logger.info("written")
+    assert stream.writing.wait(timeout=10)
+    logger.info("queued")
+    logger.info("dropped")
+    logger.info("dropped")
+    stream.released.set()
+    pipeline.stop()
+    assert stream.getvalue().splitlines() == [
+        "log-queue-full-test written",
+        "log-queue-full-test queued",
+    ]
+    assert pipeline.get_dropped_records() == {"log-queue-full-test": 2}
+
+
+def test_queue_handler_queues_raw_records() -> None:
+    """Ensure the records are queued without being formatted or copied."""
+    log_queue: queue.Queue = queue.Queue()
+    target = logging.StreamHandler(io.StringIO())
+    target.setFormatter(logging.Formatter("%(name)s %(message)s"))
+    record = logging.makeLogRecord({"msg": "read %s", "args": ("line",)})
+    _BoundedQueueHandler(log_queue, target).handle(record)
+    assert log_queue.get_nowait() == (target, record)
+    assert (record.msg, record.args) == ("read %s", ("line",))
+    assert not hasattr(record, "message")
@@ -0,0 +1,84 @@
+"""Unit tests for pytest_plugin module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# modules only needed once the boardfarm plugin is registered
+_BOARDFARM_MODULES = (
+    "boardfarm3.main",
+    "boardfarm3.lib.boardfarm_config",
+    "boardfarm3.lib.device_manager",
+    "pytest_boardfarm3.boardfarm_plugin",
+    "pytest_boardfarm3.configs",
+)
+
+
+def _run_pytest(tmp_path: Path, *args: str) -> subprocess.CompletedProcess:
+    (tmp_path / "test_modules.py").write_text(
+        "import sys\n\n\n"
+        "def test_boardfarm_modules(pytestconfig):\n"
+        f"    imported = [name for name in {_BOARDFARM_MODULES} if name in sys.modules]\n"
+        "    registered = pytestconfig.pluginmanager.has_plugin('boardfarm')\n"
+        "    print('BOARDFARM', registered, imported)\n",
+        encoding="utf-8",
+    )
+    return subprocess.run(
+        [sys.executable, "-m", "pytest", "-s", "-p", "no:cacheprovider", *args],  # noqa: S603
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def test_plugin_import_defers_boardfarm() -> None:
+    """Ensure importing the pytest11 entry point does not import boardfarm."""
+    code = (
+        "import sys\n"
+        "import pytest_boardfarm3.pytest_plugin\n"
+        f"print([name for name in {_BOARDFARM_MODULES} if name in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_pytest_run_without_board_does_not_import_boardfarm(tmp_path: Path) -> None:
+    """Ensure a pytest run without --board neither imports nor registers it."""
+    result = _run_pytest(tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "BOARDFARM False []" in result.stdout
+
+
+def test_pytest_help_registers_boardfarm_plugin(tmp_path: Path) -> None:
+    """Ensure the boardfarm options are still listed by pytest --help."""
+    result = _run_pytest(tmp_path, "--help")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "--board-name" in result.stdout
+
+
+def test_pytest_run_without_board_skips_step_timeline(tmp_path: Path) -> None:
+    """Ensure a run without --board logs steps without timing each test."""
+    (tmp_path / "conftest.py").write_text(
+        "def pytest_runtest_logreport(report):\n"
+        "    print('STEPS', report.when, hasattr(report, 'boardfarm_steps'))\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "test_steps.py").write_text(
+        "def test_steps(bf_logger):\n    bf_logger.log_step('Connect to DUT')\n",
+        encoding="utf-8",
+    )
+    result = _run_pytest(tmp_path, "test_steps.py")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "STEPS call False" in result.stdout
+    assert "STEPS call True" not in result.stdout
@@ -0,0 +1,137 @@
+"""Unit tests for report_model module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import json
+import sys
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pytest_boardfarm3.lib.html_report import get_boardfarm_html_table_report
+from pytest_boardfarm3.lib.report_model import (
+    BoardfarmReport,
+    ReportFile,
+    get_stage_report,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _get_session_config() -> SimpleNamespace:
+    return SimpleNamespace(
+        option=SimpleNamespace(
+            board_name="board1",
+            env_config="env.json",
+            inventory_config="inventory.json",
+            report_sidecars="none",
+        ),
+    )
+
+
+def test_report_without_deployment() -> None:
+    """Ensure the report of a session that did not deploy has empty details."""
+    report = BoardfarmReport()
+    report.set_config(_get_session_config(), None)  # type: ignore[arg-type]
+    session = report.as_dict()
+    assert session["board_name"] == "board1"
+    assert session["image"] is None
+    assert session["env_config"] is None
+    assert session["setup"] == session["teardown"] == "not run"
+    assert session["devices"] == {}
+    assert "workers" not in session
+    html_report = get_boardfarm_html_table_report(
+        _get_session_config(),  # type: ignore[arg-type]
+        report,
+    )
+    assert "Boardfarm setup" not in html_report
+    assert "Deployed devices" not in html_report
+
+
+def test_report_is_updated_per_phase() -> None:
+    """Ensure the report holds the details of each completed phase."""
+    report = BoardfarmReport()
+    report.set_config(
+        _get_session_config(),  # type: ignore[arg-type]
+        SimpleNamespace(  # type: ignore[arg-type]
+            env_config={"environment_def": {"board": {"image_uri": "image1"}}},
+            inventory_config={"board1": {"devices": []}},
+        ),
+    )
+    assert report.image == "image1"
+    assert report.formatted_inventory_config.startswith('{\n    "board1"')
+    report.set_setup(
+        {"logs": "setup logs", "device_durations": {"board": {"boot": 1.0}}},
+        SimpleNamespace(  # type: ignore[arg-type]
+            get_devices_by_type=lambda _: {"board": SimpleNamespace(device_type="cpe")},
+        ),
+    )
+    assert report.as_dict()["devices"] == {"board": "cpe"}
+    assert report.teardown.status == "not run"
+    error = ValueError("boom")
+    try:
+        raise error
+    except ValueError:
+        report.set_teardown({"exception": sys.exc_info()}, {"phases": []})
+    assert report.setup.status == "success"
+    assert report.teardown.failed
+    assert "raise error" in report.teardown.traceback
+    html_report = get_boardfarm_html_table_report(
+        _get_session_config(),  # type: ignore[arg-type]
+        report,
+    )
+    assert "Failed - ValueError('boom')" in html_report
+    assert '{"board": "cpe"}' in html_report
+
+
+def test_get_stage_report() -> None:
+    """Ensure a stage report is built from the data captured for the stage."""
+    stage_report = get_stage_report({"logs": "logs", "dropped_lines": 2})
+    assert stage_report.status == "success"
+    assert stage_report.dropped_lines == 2
+    assert stage_report.log_file is None
+    assert not stage_report.failed
+
+
+def _get_report(when: str, outcome: str) -> pytest.TestReport:
+    return pytest.TestReport(
+        "test_a.py::test_a",
+        ("test_a.py", 0, "test_a"),
+        {},
+        outcome,  # type: ignore[arg-type]
+        None,
+        when,  # type: ignore[arg-type]
+    )
+
+
+def test_report_counts_the_completed_tests() -> None:
+    """Ensure a test is counted with its outcome once its teardown is reported."""
+    report = BoardfarmReport()
+    report.add_test_report(_get_report("setup", "passed"))
+    report.add_test_report(_get_report("call", "failed"))
+    assert (report.current_test, report.outcomes) == ("test_a.py::test_a", {})
+    report.add_test_report(_get_report("teardown", "passed"))
+    assert (report.current_test, report.outcomes) == (None, {"failed": 1})
+
+
+def test_report_file_stays_readable(tmp_path: Path) -> None:
+    """Ensure the saved report is replaced, without truncating the file."""
+    path = tmp_path / "boardfarm" / "report.json"
+    report_file = ReportFile()
+    report_file.open(path)
+    report = BoardfarmReport()
+    report.set_config(_get_session_config(), None)  # type: ignore[arg-type]
+    report.add_test_report(_get_report("setup", "passed"))
+    report_file.save(report)
+    size = path.stat().st_size
+    report.add_test_report(_get_report("teardown", "passed"))
+    report_file.save(report)
+    report_file.close()
+    assert path.stat().st_size == size
+    saved_report = json.loads(path.read_text(encoding="utf-8"))
+    assert saved_report["board_name"] == "board1"
+    assert saved_report["current_test"] is None
+    assert saved_report["outcomes"] == {}
+    assert not saved_report["complete"]
@@ -0,0 +1,251 @@
+"""Unit tests for retry module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import html
+import json
+from typing import TYPE_CHECKING
+
+from pytest import TestReport  # noqa: PT013
+
+from pytest_boardfarm3.lib.retry import ReprovisionRetry, get_used_devices
+
+if TYPE_CHECKING:
+    from .conftest import BoardfarmPytester
+
+_ENV_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}}
+_METRICS = {"bytes_sent": 0, "bytes_received": 0, "commands": 0}
+
+
+def _get_report(when: str, outcome: str, **extra: object) -> TestReport:
+    return TestReport(
+        "test_a.py::test_a",
+        ("test_a.py", 0, "test_a"),
+        {},
+        outcome,  # type: ignore[arg-type]
+        None,
+        when,  # type: ignore[arg-type]
+        **extra,
+    )
+
+
+def _get_reports(setup_outcome: str, call_outcome: str) -> list[TestReport]:
+    return [
+        _get_report("setup", setup_outcome),
+        _get_report("call", call_outcome),
+        _get_report(
+            "teardown",
+            "passed",
+            boardfarm_device_io={
+                "board": {**_METRICS, "bytes_received": 10},
+                "lan": _METRICS,
+            },
+        ),
+    ]
+
+
+def test_get_used_devices() -> None:
+    """Ensure only the devices which exchanged data are used by the test."""
+    assert get_used_devices(_get_reports("passed", "failed")[-1]) == ["board"]
+    assert get_used_devices(_get_report("teardown", "passed")) == []
+
+
+def test_reprovision_retry_reprovisions_failed_call() -> None:
+    """Ensure only a failed call phase is re-run, after reprovisioning."""
+    reprovisions: list[tuple[dict, list[str]]] = []
+
+    def _reprovision(env_req: dict, reports: list[TestReport]) -> list[str]:
+        reprovisions.append((env_req, get_used_devices(reports[-1])))
+        return get_used_devices(reports[-1])
+
+    retry = ReprovisionRetry(1, _reprovision)
+    # pylint: disable=protected-access
+    assert not retry._reprovision_for_rerun(_ENV_REQ, _get_reports("passed", "passed"))
+    assert not retry._reprovision_for_rerun(_ENV_REQ, _get_reports("failed", "passed"))
+    assert retry._reprovision_for_rerun(_ENV_REQ, _get_reports("passed", "failed"))
+    assert reprovisions == [(_ENV_REQ, ["board"])]
+    assert retry.as_dict()["reprovisioned_devices"] == {"board": 1}
+
+
+def test_reprovision_retry_failed_reprovision() -> None:
+    """Ensure a test is not re-run when its devices cannot be reprovisioned."""
+
+    def _reprovision(_env_req: dict, _reports: list[TestReport]) -> list[str]:
+        err_msg = "contingency check failed"
+        raise ConnectionError(err_msg)
+
+    retry = ReprovisionRetry(1, _reprovision)
+    # pylint: disable-next=protected-access
+    assert not retry._reprovision_for_rerun(_ENV_REQ, _get_reports("passed", "failed"))
+    assert retry.as_dict() == {
+        "rerun_tests": 0,
+        "reruns": 0,
+        "recovered_tests": 0,
+        "reprovisioned_devices": {},
+    }
+
+
+def test_reprovision_retry_test_status() -> None:
+    """Ensure the failed attempts of the re-run tests have their own status."""
+    rerun_report = _get_report("call", "rerun")
+    assert ReprovisionRetry.pytest_report_teststatus(rerun_report) == (
+        "rerun",
+        "R",
+        ("RERUN", {"yellow": True}),
+    )
+    assert (
+        ReprovisionRetry.pytest_report_teststatus(_get_report("call", "failed")) is None
+    )
+
+
+def test_reprovision_retry_protocol(boardfarm_pytester: BoardfarmPytester) -> None:
+    """Ensure a failed attempt is reported as rerun, without its teardown."""
+    boardfarm_pytester.pytester.makepyfile(
+        report_log="""
+        def pytest_runtest_logreport(report):
+            with open("reports.log", "a") as log_file:
+                log_file.write(f"{report.when} {report.outcome}\\n")
+        """,
+    )
+    result = boardfarm_pytester.run(
+        """
+        from pathlib import Path
+
+        import pytest
+
+        @pytest.mark.env_req(
+            {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}},
+        )
+        def test_flaky():
+            attempts = Path("attempts.log")
+            with attempts.open("a") as attempts_file:
+                attempts_file.write("attempt\\n")
+            assert len(attempts.read_text().split()) > 1
+        """,
+        "-p",
+        "report_log",
+        "--reprovision-retries",
+        "1",
+        "--run-record-file",
+        "record.jsonl",
+        "--html",
+        "report.html",
+    )
+    outcomes = result.parseoutcomes()
+    assert (outcomes["passed"], outcomes["rerun"]) == (1, 1)
+    assert "failed" not in outcomes
+    path = boardfarm_pytester.pytester.path
+    assert (path / "reports.log").read_text().splitlines() == [
+        "setup passed",
+        "call rerun",
+        "setup passed",
+        "call passed",
+        "teardown passed",
+    ]
+    # the re-run setup does not check the devices reprovisioned for it
+    assert (path / "contingency_checks.log").read_text().split() == ["board"] * 2
+    records = [
+        json.loads(line) for line in (path / "record.jsonl").read_text().splitlines()
+    ]
+    test_record = next(record for record in records if record["record"] == "test")
+    assert (test_record["outcome"], test_record["reruns"]) == ("passed", 1)
+    assert records[-1]["reruns"]["recovered_tests"] == 1
+    html_report = html.unescape((path / "report.html").read_text())
+    assert '"result": "Rerun"' in html_report
+    assert "1 tests re-run 1 times, 1 passed after" in html_report
+
+
+def test_reprovision_retry_invalidates_contingency_cache(
+    boardfarm_pytester: BoardfarmPytester,
+) -> None:
+    """Ensure the test following a reprovisioned re-run checks its devices."""
+    result = boardfarm_pytester.run(
+        """
+        from pathlib import Path
+
+        import pytest
+
+        ENV_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}}
+
+        @pytest.mark.env_req(ENV_REQ)
+        def test_flaky():
+            attempts = Path("attempts.log")
+            with attempts.open("a") as attempts_file:
+                attempts_file.write("attempt\\n")
+            assert len(attempts.read_text().split()) > 1
+
+        @pytest.mark.env_req(ENV_REQ)
+        def test_next():
+            pass
+        """,
+        "--reprovision-retries",
+        "1",
+        "--cache-contingency-checks",
+    )
+    outcomes = result.parseoutcomes()
+    assert (outcomes["passed"], outcomes["rerun"]) == (2, 1)
+    # setup and reprovisioning of test_flaky, setup of test_next
+    checks = (boardfarm_pytester.pytester.path / "contingency_checks.log").read_text()
+    assert checks.split() == ["board"] * 3
+
+
+def test_reprovision_retry_reuses_sessions_of_passed_attempt(
+    boardfarm_pytester: BoardfarmPytester,
+) -> None:
+    """Ensure the sessions of a test passed after a re-run are not closed."""
+    boardfarm_pytester.pytester.makepyfile(
+        session_pool_plugin="""
+        import itertools
+
+        from boardfarm3.devices.base_devices import BoardfarmDevice
+
+        _SESSION_IDS = itertools.count()
+
+        def _close_session(session):
+            with open("sessions.log", "a") as sessions_file:
+                sessions_file.write(f"close {session}\\n")
+
+        def pytest_boardfarm_session_pools(pools):
+            pools.register(
+                "shell",
+                BoardfarmDevice,
+                lambda device: next(_SESSION_IDS),
+                _close_session,
+            )
+        """,
+    )
+    result = boardfarm_pytester.run(
+        """
+        from pathlib import Path
+
+        import pytest
+
+        ENV_REQ = {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}}
+
+        def _use_session(device_sessions):
+            with open("sessions.log", "a") as sessions_file:
+                sessions_file.write(f"use {device_sessions('shell')}\\n")
+
+        @pytest.mark.env_req(ENV_REQ)
+        def test_flaky(device_sessions):
+            _use_session(device_sessions)
+            attempts = Path("attempts.log")
+            with attempts.open("a") as attempts_file:
+                attempts_file.write("attempt\\n")
+            assert len(attempts.read_text().split()) > 1
+
+        @pytest.mark.env_req(ENV_REQ)
+        def test_next(device_sessions):
+            _use_session(device_sessions)
+        """,
+        "-p",
+        "session_pool_plugin",
+        "--reprovision-retries",
+        "1",
+    )
+    outcomes = result.parseoutcomes()
+    assert (outcomes["passed"], outcomes["rerun"]) == (2, 1)
+    # the session of the failed attempt is closed, the one of the passed
+    # attempt is given back to the pool and closed with it
+    sessions = (boardfarm_pytester.pytester.path / "sessions.log").read_text()
+    assert sessions.splitlines() == ["use 0", "close 0", "use 1", "use 1", "close 1"]
@@ -0,0 +1,90 @@
+"""Unit tests for run_record module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from pytest import TestReport  # noqa: PT013
+
+from pytest_boardfarm3.lib.run_record import RunRecorder, get_stage_status
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _get_report(when: str, outcome: str, **extra: object) -> TestReport:
+    return TestReport(
+        "test_a.py::test_a",
+        ("test_a.py", 0, "test_a"),
+        {},
+        outcome,  # type: ignore[arg-type]
+        "test_a.py:1: AssertionError" if outcome == "failed" else None,
+        when,  # type: ignore[arg-type]
+        duration=1.0,
+        **extra,
+    )
+
+
+def test_run_recorder_writes_records_as_tests_complete(tmp_path: Path) -> None:
+    """Ensure a test record is written once the test completes."""
+    start_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    record_path = tmp_path / "run.jsonl"
+    recorder = RunRecorder()
+    recorder.open(str(record_path))
+    recorder.write_session({"board_name": "board1"})
+    recorder.add_report(
+        _get_report(
+            "setup",
+            "passed",
+            test_start_time=start_time,
+            boardfarm_timings={"fixture_setup": 1.0},
+        ),
+    )
+    recorder.add_report(_get_report("call", "failed", boardfarm_steps=[{"index": 1}]))
+    assert len(record_path.read_text().splitlines()) == 1
+    recorder.add_report(
+        _get_report("teardown", "passed", boardfarm_device_io={"board": {}}),
+    )
+    # the record of the test is flushed before the session ends
+    assert len(record_path.read_text().splitlines()) == 2
+    recorder.write_session({"board_name": "board1"})
+    recorder.close()
+    first_session, test, session = (
+        json.loads(line) for line in record_path.read_text().splitlines()
+    )
+    assert first_session["record"] == session["record"] == "session"
+    assert first_session["outcomes"] == {}
+    assert session["board_name"] == "board1"
+    assert session["outcomes"] == {"failed": 1}
+    assert test == {
+        "record": "test",
+        "run_id": session["run_id"],
+        "nodeid": "test_a.py::test_a",
+        "outcome": "failed",
+        "start_time": "2024-01-01T00:00:00+00:00",
+        "duration": 3.0,
+        "reruns": 0,
+        "message": "test_a.py:1: AssertionError",
+        "timings": {"fixture_setup": 1.0},
+        "steps": [{"index": 1}],
+        "device_io": {"board": {}},
+    }
+
+
+def test_run_recorder_without_file() -> None:
+    """Ensure nothing is recorded when no record file is opened."""
+    recorder = RunRecorder()
+    recorder.add_report(_get_report("teardown", "passed"))
+    recorder.write_session({})
+    recorder.close()
+
+
+def test_get_stage_status() -> None:
+    assert get_stage_status({}) == "not run"
+    assert get_stage_status({"logs": ""}) == "success"
+    error = ValueError("boom")
+    assert get_stage_status({"exception": (ValueError, error, None)}) == (
+        "failed - ValueError('boom')"
+    )
@@ -0,0 +1,81 @@
+"""Unit tests for screenshots module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import base64
+import io
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pytest_boardfarm3.lib import screenshots
+from pytest_boardfarm3.lib.screenshots import ScreenshotStore, get_screenshot_base64
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _save_screenshot(path: Path, color: str) -> str:
+    Image.new("RGB", (800, 600), color).save(path)
+    return str(path)
+
+
+def test_screenshot_store_deduplicates_screenshots(tmp_path: Path) -> None:
+    """Ensure identical screenshots are saved once, with a thumbnail."""
+    store = ScreenshotStore(tmp_path / "store", max_size=400, thumbnail_size=100)
+    first = store.add(_save_screenshot(tmp_path / "first.png", "red"))
+    second = store.add(_save_screenshot(tmp_path / "second.png", "red"))
+    other = store.add(_save_screenshot(tmp_path / "other.png", "blue"))
+    assert first == second != other
+    assert len(list((tmp_path / "store").iterdir())) == 4
+    path, thumbnail_path = first
+    with Image.open(path) as image:
+        assert image.size == (400, 300)
+    with Image.open(thumbnail_path) as thumbnail:
+        assert thumbnail.size == (100, 75)
+
+
+def test_screenshot_store_without_pillow(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ensure screenshots are saved as is when Pillow is not installed."""
+    monkeypatch.setattr(screenshots, "Image", None)
+    screenshot_path = _save_screenshot(tmp_path / "screenshot.png", "red")
+    path, thumbnail_path = ScreenshotStore(tmp_path / "store").add(screenshot_path)
+    assert path == thumbnail_path
+    assert path.read_bytes() == (tmp_path / "screenshot.png").read_bytes()
+
+
+def test_screenshot_store_keeps_unreadable_images(tmp_path: Path) -> None:
+    """Ensure a screenshot Pillow cannot read is saved as is."""
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    path, thumbnail_path = ScreenshotStore(tmp_path / "store").add(
+        str(tmp_path / "broken.png"),
+    )
+    assert path.read_bytes() == thumbnail_path.read_bytes() == b"not an image"
+
+
+def test_screenshot_store_keeps_sizes_apart(tmp_path: Path) -> None:
+    """Ensure a session with another max size does not reuse saved screenshots."""
+    screenshot_path = _save_screenshot(tmp_path / "screenshot.png", "red")
+    small_path, _ = ScreenshotStore(tmp_path / "store", max_size=200).add(
+        screenshot_path,
+    )
+    large_path, _ = ScreenshotStore(tmp_path / "store", max_size=400).add(
+        screenshot_path,
+    )
+    with Image.open(small_path) as small, Image.open(large_path) as large:
+        assert (small.size, large.size) == ((200, 150), (400, 300))
+
+
+def test_screenshot_base64_is_downsized(tmp_path: Path) -> None:
+    """Ensure the embedded screenshots are downsized to the maximum size."""
+    content = get_screenshot_base64(
+        _save_screenshot(tmp_path / "screenshot.png", "red"),
+        max_size=400,
+    )
+    with Image.open(io.BytesIO(base64.b64decode(content))) as image:
+        assert image.size == (400, 300)
@@ -0,0 +1,159 @@
+"""Unit tests for session_pool module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import textwrap
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from pytest_boardfarm3.exceptions import BoardfarmPluginError
+from pytest_boardfarm3.lib.session_pool import SessionPools
+
+
+class _Device:
+    def __init__(self, device_name: str) -> None:
+        self.device_name = device_name
+
+
+class _OtherDevice(_Device):
+    pass
+
+
+def _get_device_manager(*devices: _Device) -> SimpleNamespace:
+    return SimpleNamespace(
+        get_devices_by_type=lambda device_type: {
+            device.device_name: device
+            for device in devices
+            if isinstance(device, device_type)
+        },
+    )
+
+
+def test_session_pools_warm_up_and_reuse_sessions() -> None:
+    """Ensure the sessions are opened in the background and reused."""
+    thread_names: list[str] = []
+    closed_sessions: list[object] = []
+
+    def _open_session(device: _Device) -> tuple[str, object]:
+        thread_names.append(threading.current_thread().name)
+        return device.device_name, object()
+
+    pools = SessionPools()
+    pools.register(
+        "shell",
+        _OtherDevice,  # type: ignore[arg-type]
+        _open_session,
+        closed_sessions.append,
+        size=2,
+    )
+    pools.warm_up(
+        _get_device_manager(_Device("lan"), _OtherDevice("wan")),  # type: ignore[arg-type]
+    )
+    pool = pools.get_pool("shell")
+    session = pool.acquire()
+    assert session[0] == "wan"
+    pool.release(session)
+    assert pool.acquire() is session
+    pools.close()
+    assert len(thread_names) == 2
+    assert all(name.startswith("boardfarm-session-pool") for name in thread_names)
+    # the acquired session is not given back to the pool, it is not closed
+    assert len(closed_sessions) == 1
+    assert closed_sessions[0] is not session
+
+
+def test_session_pool_opens_session_when_empty() -> None:
+    """Ensure a session is opened on demand once the pool is exhausted."""
+    pools = SessionPools()
+    pools.register("shell", _Device, lambda _device: object(), size=1)  # type: ignore[arg-type]
+    pools.warm_up(_get_device_manager(_Device("lan")))  # type: ignore[arg-type]
+    pool = pools.get_pool("shell", "lan")
+    assert pool.acquire() is not pool.acquire()
+    pools.close()
+
+
+def test_session_pool_reopens_failed_warm_up_session() -> None:
+    """Ensure a session failing to warm up is opened again by the test."""
+    attempts: list[int] = []
+
+    def _open_session(_device: _Device) -> int:
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            err_msg = "console closed"
+            raise ConnectionError(err_msg)
+        return len(attempts)
+
+    pools = SessionPools()
+    pools.register("shell", _Device, _open_session)  # type: ignore[arg-type]
+    pools.warm_up(_get_device_manager(_Device("lan")))  # type: ignore[arg-type]
+    assert pools.get_pool("shell").acquire() == 2
+    pools.close()
+
+
+def test_session_pools_unknown_pool() -> None:
+    pools = SessionPools()
+    pools.register("shell", _Device, lambda device: device)  # type: ignore[arg-type]
+    pools.register("wan_shell", _OtherDevice, lambda device: device)  # type: ignore[arg-type]
+    pools.warm_up(_get_device_manager(_Device("lan")))  # type: ignore[arg-type]
+    with pytest.raises(BoardfarmPluginError, match="no device of its type"):
+        pools.get_pool("wan_shell")
+    with pytest.raises(BoardfarmPluginError, match="for device 'wan'"):
+        pools.get_pool("shell", "wan")
+    pools.close()
+
+
+def test_session_pools_close_abandons_hung_sessions(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Ensure closing the pools does not wait for a hung session forever."""
+    opened = threading.Event()
+    hung = threading.Event()
+
+    def _open_session(_device: _Device) -> object:
+        opened.set()
+        hung.wait()
+        return object()
+
+    pools = SessionPools()
+    pools.register("shell", _Device, _open_session)  # type: ignore[arg-type]
+    pools.warm_up(_get_device_manager(_Device("lan")))  # type: ignore[arg-type]
+    opened.wait()
+    try:
+        pools.close(timeout=0.1)
+    finally:
+        hung.set()
+    assert "Abandoning 1 shell sessions of lan still being opened." in caplog.text
+
+
+def test_session_pools_hung_session_does_not_block_exit() -> None:
+    """Ensure the interpreter exits with a session hung in the pool thread."""
+    script = textwrap.dedent(
+        """
+        import threading
+        from types import SimpleNamespace
+
+        from pytest_boardfarm3.lib.session_pool import SessionPools
+
+        opened = threading.Event()
+
+        def open_session(device):
+            opened.set()
+            threading.Event().wait()
+
+        pools = SessionPools()
+        pools.register("shell", object, open_session)
+        pools.warm_up(
+            SimpleNamespace(
+                get_devices_by_type=lambda _: {"lan": SimpleNamespace(device_name="lan")},
+            ),
+        )
+        opened.wait()
+        pools.close(timeout=0.1)
+        """,
+    )
+    # a non-daemon thread would be joined at exit, i.e. forever
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)  # noqa: S603
@@ -0,0 +1,56 @@
+"""Unit tests for test_logger module in pytest-boardfarm."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from pytest_boardfarm3.lib.test_logger import TestLogger
+
+if TYPE_CHECKING:
+    import pytest
+
+
+def test_log_step_records_timeline(caplog: pytest.LogCaptureFixture) -> None:
+    """Ensure the steps of a test are recorded with their index and timing."""
+    test_logger = TestLogger()
+    test_logger.start_test("tests/test_a.py::test_a[param 1]")
+    with caplog.at_level(logging.INFO, logger="test-logger"):
+        test_logger.log_step("first step")
+        test_logger.log_step("second step")
+    steps = test_logger.get_steps()
+    assert [(step["index"], step["message"]) for step in steps] == [
+        (1, "first step"),
+        (2, "second step"),
+    ]
+    assert {step["test"] for step in steps} == {"tests/test_a.py::test_a[param 1]"}
+    assert steps[1]["elapsed"] == steps[1]["timestamp"] - steps[0]["timestamp"]
+    assert caplog.messages[0] == "[*****LOGGING-STEP*****][test_a[param_1]][first step]"
+    assert caplog.records[1].boardfarm_step == steps[1]
+
+
+def test_pop_new_steps_returns_steps_of_each_phase() -> None:
+    """Ensure each test phase gets the steps logged since the previous phase."""
+    test_logger = TestLogger()
+    test_logger.start_test("test_a.py::test_a")
+    test_logger.log_step("setup step")
+    assert [step["message"] for step in test_logger.pop_new_steps()] == ["setup step"]
+    assert test_logger.pop_new_steps() == []
+    test_logger.log_step("call step")
+    assert [step["message"] for step in test_logger.pop_new_steps()] == ["call step"]
+    assert len(test_logger.get_steps()) == 2
+    test_logger.start_test("test_a.py::test_b")
+    assert test_logger.get_steps() == []
+
+
+def test_log_step_without_timeline(
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ensure steps logged outside of a timeline use the current test name."""
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", "test_a.py::test_a (call)")
+    test_logger = TestLogger()
+    with caplog.at_level(logging.INFO, logger="test-logger"):
+        test_logger.log_step("step")
+    assert caplog.messages == ["[*****LOGGING-STEP*****][test_a][step]"]
+    assert test_logger.get_steps() == []
@@ -0,0 +1,72 @@
+"""Unit tests for test_timings module in pytest-boardfarm."""
+
+import json
+from pathlib import Path
+
+from pytest import TestReport  # noqa: PT013
+
+from pytest_boardfarm3.lib.test_timings import TestTimingsRecorder
+
+
+def _get_report(when: str, outcome: str, timings: dict[str, float]) -> TestReport:
+    return TestReport(
+        "test_a.py::test_a",
+        ("test_a.py", 0, "test_a"),
+        {},
+        outcome,  # type: ignore[arg-type]
+        None,
+        when,  # type: ignore[arg-type]
+        boardfarm_timings=timings,
+    )
+
+
+def test_test_timings_recorder_merges_phases(tmp_path: Path) -> None:
+    """Ensure the timings of the phases of a test are saved as one record."""
+    recorder = TestTimingsRecorder()
+    recorder.add_report(
+        _get_report("setup", "passed", {"contingency_check": 2.0, "fixture_setup": 1}),
+    )
+    recorder.add_report(_get_report("call", "passed", {"call": 3.0}))
+    recorder.add_report(_get_report("teardown", "passed", {"teardown": 0.5}))
+    timings = {
+        "contingency_check": 2.0,
+        "fixture_setup": 1,
+        "call": 3.0,
+        "teardown": 0.5,
+    }
+    assert recorder.get_timings("test_a.py::test_a") == timings
+    recorder.save(str(tmp_path / "timings.jsonl"))
+    assert [
+        json.loads(line)
+        for line in (tmp_path / "timings.jsonl").read_text().splitlines()
+    ] == [{"nodeid": "test_a.py::test_a", "outcome": "passed", "timings": timings}]
+
+
+def test_test_timings_recorder_outcome() -> None:
+    """Ensure a failed setup or teardown is recorded as an error."""
+    recorder = TestTimingsRecorder()
+    recorder.add_report(_get_report("setup", "passed", {}))
+    recorder.add_report(_get_report("call", "failed", {"call": 1.0}))
+    recorder.add_report(_get_report("teardown", "failed", {}))
+    assert recorder._records["test_a.py::test_a"]["outcome"] == "error"
+    assert recorder.get_timings("test_a.py::test_b") == {}
+
+
+def test_test_timings_recorder_merges_steps(tmp_path: Path) -> None:
+    """Ensure the steps logged in the phases of a test are saved in order."""
+    recorder = TestTimingsRecorder()
+    setup_report = _get_report("setup", "passed", {})
+    setup_report.boardfarm_steps = [{"index": 1, "message": "setup step"}]  # type: ignore[attr-defined]
+    call_report = _get_report("call", "passed", {"call": 1.0})
+    call_report.boardfarm_steps = [{"index": 2, "message": "call step"}]  # type: ignore[attr-defined]
+    recorder.add_report(setup_report)
+    recorder.add_report(call_report)
+    recorder.add_report(_get_report("teardown", "passed", {}))
+    steps = [
+        {"index": 1, "message": "setup step"},
+        {"index": 2, "message": "call step"},
+    ]
+    assert recorder.get_steps("test_a.py::test_a") == steps
+    assert recorder.get_steps("test_a.py::test_b") == []
+    recorder.save(str(tmp_path / "timings.jsonl"))
+    assert json.loads((tmp_path / "timings.jsonl").read_text())["steps"] == steps
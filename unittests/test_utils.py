@@ -1,8 +1,19 @@
 """Unit tests for utils module in pytest-boardfarm."""
 
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
 
-from pytest_boardfarm3.lib.utils import is_env_matching
+from pytest_boardfarm3.lib.utils import (
+    EnvReqMatcher,
+    TestNamesIndex,
+    capture_boardfarm_logs,
+    get_env_affinity_order,
+    get_env_req_key,
+    is_env_matching,
+)
 
 env_boot_file = {
     "environment_def": {
@@ -180,3 +191,153 @@ def test_contains_check_combinations(
     """
     test_req = {"environment_def": {"board": {"boot_file": contains_check_list}}}
     assert is_env_matching(test_req, env_boot_file) == expected
+
+
+def test_env_req_matcher_same_result_as_is_env_matching() -> None:
+    """Check the memoized matcher agrees with the plain env_req check."""
+    matcher = EnvReqMatcher(env_boot_file)
+    for test_req in (
+        {"environment_def": {"board": {"eRouter_Provisioning_mode": ["dual"]}}},
+        {"environment_def": {"board": {"eRouter_Provisioning_mode": ["ipv4"]}}},
+        {"environment_def": {"board": {"boot_file": [{"contains_exact": "Main"}]}}},
+        {"environment_def": None},
+    ):
+        assert matcher.is_matching(test_req) == is_env_matching(
+            test_req,
+            env_boot_file,
+        )
+
+
+def test_env_req_matcher_memoizes_canonical_request() -> None:
+    """Check requests with a different key order share one cached result."""
+    matcher = EnvReqMatcher(env_boot_file)
+    first_req = {
+        "environment_def": {
+            "board": {"eRouter_Provisioning_mode": "dual", "boot_file": None},
+        },
+    }
+    second_req = {
+        "environment_def": {
+            "board": {"boot_file": None, "eRouter_Provisioning_mode": "dual"},
+        },
+    }
+    assert get_env_req_key(first_req) == get_env_req_key(second_req)
+    assert matcher.is_matching(first_req)
+    assert matcher.is_matching(second_req)
+    assert len(matcher._results) == 1
+
+
+def _get_board_env_req(**board: str) -> dict:
+    return {"environment_def": {"board": board}}
+
+
+def test_get_env_affinity_order() -> None:
+    """Check tests are grouped by request, closest requests being adjacent."""
+    dual = _get_board_env_req(eRouter_Provisioning_mode="dual", model="A")
+    ipv4 = _get_board_env_req(eRouter_Provisioning_mode="ipv4", model="B")
+    dual_b = _get_board_env_req(eRouter_Provisioning_mode="dual", model="B")
+    env_requests = [dual, ipv4, None, dual_b, ipv4, dual, None]
+    assert get_env_affinity_order(env_requests) == [2, 6, 0, 5, 3, 1, 4]
+
+
+def test_get_env_affinity_order_canonical_request() -> None:
+    """Check requests with a different key order are in the same group."""
+    first_req = _get_board_env_req(eRouter_Provisioning_mode="dual", model="A")
+    second_req = _get_board_env_req(model="A", eRouter_Provisioning_mode="dual")
+    ipv4_req = _get_board_env_req(eRouter_Provisioning_mode="ipv4")
+    assert get_env_affinity_order([first_req, ipv4_req, second_req]) == [0, 2, 1]
+
+
+def test_get_env_affinity_order_without_requests() -> None:
+    """Check the order of tests without env_req marker is kept."""
+    assert get_env_affinity_order([None, None]) == [0, 1]
+    assert get_env_affinity_order([]) == []
+
+
+def test_env_req_matcher_unknown_contains_check() -> None:
+    """Check invalid contains checks are not cached and raise every time."""
+    matcher = EnvReqMatcher(env_boot_file)
+    test_req = {
+        "environment_def": {"board": {"boot_file": [{"contains_abc": "Main"}]}},
+    }
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Invalid contains checks"):
+            matcher.is_matching(test_req)
+
+
+def _is_selected_by_names(item_name: str, test_names: list[str]) -> bool:
+    for test in test_names:
+        test_name = f"test_{test.replace('-', '_')}"
+        if (
+            test_name == item_name
+            or f"{test_name}[" in item_name
+            or f"{test}-" in item_name
+        ):
+            return True
+    return False
+
+
+@pytest.mark.parametrize(
+    "item_name",
+    [
+        "test_tc_101",
+        "test_tc_101[ipv4]",
+        "test_tc_1011",
+        "test_tc_1011[ipv4]",
+        "test_other[TC-101-ipv4]",
+        "test_other[XTC-101-ipv4]",
+        "test_other[TC-10-ipv4]",
+        "test_other[TC-101]",
+        "test_abc_def",
+        "test_abc-def",
+        "test_unrelated",
+    ],
+)
+def test_test_names_index(item_name: str) -> None:
+    """Check the indexed selection matches the plain name by name selection.
+
+    :param item_name: collected test item name
+    :type item_name: str
+    """
+    test_names = ["TC-101", "abc-def", "tc-1011", "short"]
+    assert TestNamesIndex(test_names).is_selected(item_name) == _is_selected_by_names(
+        item_name,
+        test_names,
+    )
+
+
+def test_test_names_index_ignores_empty_names() -> None:
+    """Check consecutive spaces in --test-names do not select every test."""
+    test_names_index = TestNamesIndex("TC-101  abc".split(" "))
+    assert not test_names_index.is_selected("test_other[ipv4-dual]")
+    assert test_names_index.is_selected("test_abc")
+
+
+def test_capture_boardfarm_logs_to_file(tmp_path: Path) -> None:
+    """Check streamed logs are written in full while only the tail is kept.
+
+    :param tmp_path: temporary directory
+    :type tmp_path: Path
+    """
+    logging_plugin = SimpleNamespace(
+        formatter=logging.Formatter("%(message)s"),
+        log_level=logging.INFO,
+    )
+    capture_to: dict = {}
+
+    def _deploy() -> None:
+        for index in range(10):
+            logging.getLogger("test-capture").info("\x1b[32mline %s\x1b[0m", index)
+
+    capture_boardfarm_logs(
+        logging_plugin,  # type: ignore[arg-type]
+        _deploy,
+        capture_to,
+        log_file=tmp_path / "boardfarm_setup.log",
+        tail_lines=3,
+    )
+    assert (tmp_path / "boardfarm_setup.log").read_text().splitlines() == [
+        f"line {index}" for index in range(10)
+    ]
+    assert capture_to["logs"] == "line 7\nline 8\nline 9"
+    assert capture_to["dropped_lines"] == 7